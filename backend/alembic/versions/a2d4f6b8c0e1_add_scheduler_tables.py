@@ -0,0 +1,48 @@
+"""add scheduler_leases and scheduler_runs tables
+
+Revision ID: a2d4f6b8c0e1
+Revises: f1c7d9e2a4b6
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d4f6b8c0e1'
+down_revision = 'f1c7d9e2a4b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('scheduler_leases',
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=True),
+    sa.Column('expira_en', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_slot', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+    op.create_table('scheduler_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job', sa.String(length=100), nullable=True),
+    sa.Column('owner', sa.String(length=100), nullable=True),
+    sa.Column('slot', sa.DateTime(), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_en', sa.DateTime(), nullable=True),
+    sa.Column('duracion_ms', sa.Integer(), nullable=True),
+    sa.Column('resultado', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scheduler_runs_job'), 'scheduler_runs', ['job'], unique=False)
+    op.create_index(op.f('ix_scheduler_runs_iniciado_en'), 'scheduler_runs', ['iniciado_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scheduler_runs_iniciado_en'), table_name='scheduler_runs')
+    op.drop_index(op.f('ix_scheduler_runs_job'), table_name='scheduler_runs')
+    op.drop_table('scheduler_runs')
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,26 @@
+"""add lease to payment_reminder_runs
+
+Revision ID: b3f5d7a9c1e4
+Revises: f1c3e5a7b9d2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f5d7a9c1e4'
+down_revision = 'f1c3e5a7b9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('payment_reminder_runs', sa.Column('owner', sa.String(length=100), nullable=True))
+    op.add_column('payment_reminder_runs', sa.Column('lease_expira_en', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('payment_reminder_runs', 'lease_expira_en')
+    op.drop_column('payment_reminder_runs', 'owner')
@@ -0,0 +1,30 @@
+"""add dietas.fecha_vencimiento and notifications.referencia_id
+
+Revision ID: b5e7a9c1d3f2
+Revises: a2d4f6b8c0e1
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e7a9c1d3f2'
+down_revision = 'a2d4f6b8c0e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('dietas', sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_dietas_fecha_vencimiento'), 'dietas', ['fecha_vencimiento'], unique=False)
+    op.add_column('notifications', sa.Column('referencia_id', sa.Integer(), nullable=True))
+    op.create_index('ix_notifications_tipo_referencia', 'notifications', ['tipo', 'referencia_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_tipo_referencia', table_name='notifications')
+    op.drop_column('notifications', 'referencia_id')
+    op.drop_index(op.f('ix_dietas_fecha_vencimiento'), table_name='dietas')
+    op.drop_column('dietas', 'fecha_vencimiento')
@@ -0,0 +1,44 @@
+"""add export_jobs table
+
+Revision ID: c4e1a7d2b9f3
+Revises: 1bea8f9c9ff0
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e1a7d2b9f3'
+down_revision = '1bea8f9c9ff0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('export_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('coach_id', sa.Integer(), nullable=True),
+    sa.Column('tipo', sa.String(length=20), nullable=True),
+    sa.Column('objeto_id', sa.Integer(), nullable=True),
+    sa.Column('formato', sa.String(length=10), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('intentos', sa.Integer(), nullable=True),
+    sa.Column('archivo', sa.String(length=255), nullable=True),
+    sa.Column('nombre_archivo', sa.String(length=255), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=True),
+    sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['coach_id'], ['coaches.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_export_jobs_coach_id'), 'export_jobs', ['coach_id'], unique=False)
+    op.create_index(op.f('ix_export_jobs_estado'), 'export_jobs', ['estado'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_export_jobs_estado'), table_name='export_jobs')
+    op.drop_index(op.f('ix_export_jobs_coach_id'), table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,30 @@
+"""make rutinas.activa not null
+
+Revision ID: c6e8a0b2d4f7
+Revises: b3f5d7a9c1e4
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e8a0b2d4f7'
+down_revision = 'b3f5d7a9c1e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # El keyset de GET /rutinas/ ordena por (activa, id): un NULL no entra en
+    # ninguna de las dos ramas del cursor. Las consultas ya tratan NULL como
+    # inactiva (activa == True), así que se normaliza a false.
+    op.execute("UPDATE rutinas SET activa = false WHERE activa IS NULL")
+    with op.batch_alter_table('rutinas') as batch_op:
+        batch_op.alter_column('activa', existing_type=sa.Boolean(), nullable=False, server_default=sa.true())
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rutinas') as batch_op:
+        batch_op.alter_column('activa', existing_type=sa.Boolean(), nullable=True, server_default=None)
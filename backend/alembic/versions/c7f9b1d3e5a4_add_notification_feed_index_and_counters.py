@@ -0,0 +1,37 @@
+"""add notifications feed index and notification_counters
+
+Revision ID: c7f9b1d3e5a4
+Revises: b5e7a9c1d3f2
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f9b1d3e5a4'
+down_revision = 'b5e7a9c1d3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notifications_coach_creada', 'notifications', ['coach_id', 'creada_en'], unique=False)
+    op.create_table('notification_counters',
+    sa.Column('coach_id', sa.Integer(), nullable=False),
+    sa.Column('no_leidas', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['coach_id'], ['coaches.id'], ),
+    sa.PrimaryKeyConstraint('coach_id')
+    )
+    # Backfill con las no leídas actuales
+    op.execute(
+        "INSERT INTO notification_counters (coach_id, no_leidas) "
+        "SELECT coach_id, COUNT(*) FROM notifications "
+        "WHERE leida = false AND coach_id IS NOT NULL GROUP BY coach_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('notification_counters')
+    op.drop_index('ix_notifications_coach_creada', table_name='notifications')
@@ -0,0 +1,24 @@
+"""add notifications (leida, creada_en) index for retention purge
+
+Revision ID: d4a6c8e0f2b7
+Revises: c7f9b1d3e5a4
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a6c8e0f2b7'
+down_revision = 'c7f9b1d3e5a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notifications_leida_creada', 'notifications', ['leida', 'creada_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_leida_creada', table_name='notifications')
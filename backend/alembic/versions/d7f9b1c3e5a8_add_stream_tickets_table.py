@@ -0,0 +1,32 @@
+"""add stream_tickets table
+
+Revision ID: d7f9b1c3e5a8
+Revises: c6e8a0b2d4f7
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f9b1c3e5a8'
+down_revision = 'c6e8a0b2d4f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stream_tickets',
+    sa.Column('ticket', sa.String(length=64), nullable=False),
+    sa.Column('coach_id', sa.Integer(), nullable=True),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['coach_id'], ['coaches.id'], ),
+    sa.PrimaryKeyConstraint('ticket')
+    )
+    op.create_index(op.f('ix_stream_tickets_coach_id'), 'stream_tickets', ['coach_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stream_tickets_coach_id'), table_name='stream_tickets')
+    op.drop_table('stream_tickets')
@@ -0,0 +1,49 @@
+"""add email_outbox table
+
+Revision ID: d8b2f5e1a3c7
+Revises: c4e1a7d2b9f3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b2f5e1a3c7'
+down_revision = 'c4e1a7d2b9f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('coach_id', sa.Integer(), nullable=True),
+    sa.Column('tipo', sa.String(length=50), nullable=True),
+    sa.Column('destinatario', sa.String(length=255), nullable=True),
+    sa.Column('asunto', sa.String(length=255), nullable=True),
+    sa.Column('html', sa.Text(), nullable=True),
+    sa.Column('idempotency_key', sa.String(length=128), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('intentos', sa.Integer(), nullable=True),
+    sa.Column('proximo_intento', sa.DateTime(), nullable=True),
+    sa.Column('provider_id', sa.String(length=100), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=True),
+    sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+    sa.Column('enviado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['coach_id'], ['coaches.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_email_outbox_coach_id'), 'email_outbox', ['coach_id'], unique=False)
+    op.create_index(op.f('ix_email_outbox_estado'), 'email_outbox', ['estado'], unique=False)
+    op.create_index(op.f('ix_email_outbox_proximo_intento'), 'email_outbox', ['proximo_intento'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_proximo_intento'), table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_estado'), table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_coach_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,26 @@
+"""add lote to email_outbox
+
+Revision ID: e3a9c6d4b1f8
+Revises: d8b2f5e1a3c7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c6d4b1f8'
+down_revision = 'd8b2f5e1a3c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('lote', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_email_outbox_lote'), 'email_outbox', ['lote'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_lote'), table_name='email_outbox')
+    op.drop_column('email_outbox', 'lote')
@@ -0,0 +1,42 @@
+"""add dashboard_counters
+
+Revision ID: e8b0d2f4a6c9
+Revises: d4a6c8e0f2b7
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b0d2f4a6c9'
+down_revision = 'd4a6c8e0f2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_counters',
+    sa.Column('coach_id', sa.Integer(), nullable=False),
+    sa.Column('total_alumnos', sa.Integer(), nullable=False),
+    sa.Column('total_rutinas', sa.Integer(), nullable=False),
+    sa.Column('total_dietas', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['coach_id'], ['coaches.id'], ),
+    sa.PrimaryKeyConstraint('coach_id')
+    )
+    # Backfill con los totales actuales (planes activos de alumnos del coach)
+    op.execute(
+        "INSERT INTO dashboard_counters (coach_id, total_alumnos, total_rutinas, total_dietas) "
+        "SELECT c.id, "
+        "(SELECT COUNT(*) FROM alumnos a WHERE a.coach_id = c.id), "
+        "(SELECT COUNT(*) FROM rutinas r JOIN alumnos a ON a.id = r.alumno_id "
+        "WHERE a.coach_id = c.id AND r.activa = true AND r.eliminado = false), "
+        "(SELECT COUNT(*) FROM dietas d JOIN alumnos a ON a.id = d.alumno_id "
+        "WHERE a.coach_id = c.id AND d.activa = true AND d.eliminado = false) "
+        "FROM coaches c"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dashboard_counters')
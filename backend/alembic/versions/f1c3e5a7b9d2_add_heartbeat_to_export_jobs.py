@@ -0,0 +1,24 @@
+"""add heartbeat_en to export_jobs
+
+Revision ID: f1c3e5a7b9d2
+Revises: e8b0d2f4a6c9
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c3e5a7b9d2'
+down_revision = 'e8b0d2f4a6c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('export_jobs', sa.Column('heartbeat_en', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('export_jobs', 'heartbeat_en')
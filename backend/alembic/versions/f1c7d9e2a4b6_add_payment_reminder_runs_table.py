@@ -0,0 +1,38 @@
+"""add payment_reminder_runs table
+
+Revision ID: f1c7d9e2a4b6
+Revises: e3a9c6d4b1f8
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7d9e2a4b6'
+down_revision = 'e3a9c6d4b1f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('payment_reminder_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('fecha_corte', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_alumno_id', sa.Integer(), nullable=True),
+    sa.Column('procesados', sa.Integer(), nullable=True),
+    sa.Column('enviados', sa.Integer(), nullable=True),
+    sa.Column('fallidos', sa.Integer(), nullable=True),
+    sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_en', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payment_reminder_runs_estado'), 'payment_reminder_runs', ['estado'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_reminder_runs_estado'), table_name='payment_reminder_runs')
+    op.drop_table('payment_reminder_runs')
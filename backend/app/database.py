@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from threading import Lock
 import os
 from dotenv import load_dotenv
 
@@ -8,13 +10,153 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+# Configuración del pool de conexiones (ignorada por SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_USE_LIFO = _env_bool("DB_POOL_USE_LIFO", True)
+
+def get_engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_use_lifo=DB_POOL_USE_LIFO
+        )
+    return options
+
+# Drivers async equivalentes a los sync configurados en DATABASE_URL
+ASYNC_DRIVERS = {
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine async para los endpoints de lectura más pesados. expire_on_commit=False
+# permite serializar los objetos después de cerrar la sesión.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **get_engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+class PoolMetrics:
+    """Contadores de checkout/checkin del pool alimentados por eventos de SQLAlchemy"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.overflow_checkouts = 0
+        self.peak_checked_out = 0
+
+    def attach(self, target_engine):
+        pool = target_engine.pool
+
+        @event.listens_for(target_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(target_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            checked_out = _pool_call(pool, "checkedout")
+            overflow = _pool_call(pool, "overflow")
+            with self._lock:
+                self.checkouts += 1
+                if overflow is not None and overflow > 0:
+                    self.overflow_checkouts += 1
+                if checked_out is not None:
+                    self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+        @event.listens_for(target_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(target_engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_checked_out": self.peak_checked_out
+            }
+
+def _pool_call(pool, name):
+    method = getattr(pool, name, None)
+    return method() if callable(method) else None
+
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+async_pool_metrics = PoolMetrics()
+async_pool_metrics.attach(async_engine.sync_engine)
+
+def get_pool_status(target_engine=None, metrics=None) -> dict:
+    """Estado actual del pool y su saturación (checked out / capacidad total)"""
+    target_engine = target_engine or engine
+    metrics = metrics or pool_metrics
+    pool = target_engine.pool
+    size = _pool_call(pool, "size")
+    checked_out = _pool_call(pool, "checkedout")
+    overflow = _pool_call(pool, "overflow")
+    max_overflow = getattr(pool, "_max_overflow", 0) if size is not None else None
+
+    capacity = None
+    saturation = None
+    if size is not None and checked_out is not None:
+        capacity = size + max(max_overflow or 0, 0)
+        saturation = round(checked_out / capacity, 4) if capacity else None
+
+    return {
+        "pool_class": type(pool).__name__,
+        "size": size,
+        "checked_out": checked_out,
+        "checked_in": _pool_call(pool, "checkedin"),
+        "overflow": overflow,
+        "max_overflow": max_overflow,
+        "capacity": capacity,
+        "saturation": saturation,
+        "pre_ping": DB_POOL_PRE_PING,
+        "metrics": metrics.snapshot()
+    }
+
+def get_async_pool_status() -> dict:
+    return get_pool_status(async_engine.sync_engine, async_pool_metrics)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,10 +1,24 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
-from app.database import engine
-from app.models.models import Base
-from app.routes import auth, alumnos, rutinas, dashboard, ejercicios_base, dietas, notifications, lesiones, emails
+from sqlalchemy import text, func
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import engine, async_engine, SessionLocal, get_pool_status, get_async_pool_status
+from app.models.models import Base, ExportJob, EmailOutbox
+from app.utils.auth_cache import get_auth_cache_stats
+from app.utils.password_pool import password_pool
+from app.utils.alimento_catalog import load_alimento_index
+from app.utils.ejercicio_catalog import load_ejercicio_catalog
+from app.tasks.export_worker import export_worker
+from app.tasks.email_worker import email_worker
+from app.tasks.scheduler import scheduler, SCHEDULER_ENABLED
+from app.tasks.jobs import register_default_jobs
+from app.utils.document_cache import document_cache
+from app.utils.event_broker import event_broker
+from app.utils.bulk_export import shutdown_render_pool
+from app.routes import auth, alumnos, rutinas, dashboard, ejercicios_base, dietas, notifications, lesiones, emails, exports
 
 # Crear tablas
 Base.metadata.create_all(bind=engine)
@@ -12,16 +26,32 @@ Base.metadata.create_all(bind=engine)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    # Comentado temporalmente para evitar errores de email
-    # from app.tasks.payment_reminders import check_payment_reminders
-    # try:
-    #     check_payment_reminders()
-    # except Exception as e:
-    #     print(f"Error ejecutando recordatorios: {e}")
+    db = SessionLocal()
+    try:
+        load_alimento_index(db)
+        load_ejercicio_catalog(db)
+    except SQLAlchemyError as e:
+        print(f"Error cargando catálogos: {e}")
+    finally:
+        db.close()
+    export_worker.start()
+    email_worker.start()
+    event_broker.start()
+    if SCHEDULER_ENABLED:
+        # Recordatorios de pago y limpieza (antes via cron externo)
+        register_default_jobs(scheduler)
+        scheduler.start()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    scheduler.stop()
+    event_broker.stop()
+    email_worker.stop()
+    export_worker.stop()
+    password_pool.shutdown()
+    shutdown_render_pool()
+    await async_engine.dispose()
 
-app = FastAPI(title="FitTracker API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(title="FitTracker API", version="1.0.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configurar CORS
 app.add_middleware(
@@ -42,6 +72,7 @@ app.include_router(dietas.router)
 app.include_router(notifications.router)
 app.include_router(lesiones.router)
 app.include_router(emails.router)
+app.include_router(exports.router)
 
 @app.get("/")
 def read_root():
@@ -56,6 +87,69 @@ def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/health/db")
+def db_health_check():
+    """Database connectivity plus connection pool saturation"""
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        db_status = "healthy"
+    except SQLAlchemyError:
+        db_status = "unhealthy"
+    
+    content = {
+        "status": db_status,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "pool": get_pool_status(),
+        "async_pool": get_async_pool_status()
+    }
+    return ORJSONResponse(status_code=200 if db_status == "healthy" else 503, content=content)
+
+@app.get("/health/auth-cache")
+def auth_cache_health():
+    """Hit/miss counters for the JWT and coach identity caches"""
+    return get_auth_cache_stats()
+
+@app.get("/health/password-pool")
+def password_pool_health():
+    """Queue depth and timings of the bcrypt worker pool"""
+    return password_pool.stats()
+
+@app.get("/health/exports")
+def exports_health():
+    """Export worker threads and job counts per state"""
+    db = SessionLocal()
+    try:
+        rows = db.query(ExportJob.estado, func.count(ExportJob.id)).group_by(ExportJob.estado).all()
+    finally:
+        db.close()
+    return {**export_worker.stats(), "jobs": {estado: total for estado, total in rows}}
+
+@app.get("/health/emails")
+def emails_health():
+    """Email delivery workers and outbox counts per state"""
+    db = SessionLocal()
+    try:
+        rows = db.query(EmailOutbox.estado, func.count(EmailOutbox.id)).group_by(EmailOutbox.estado).all()
+    finally:
+        db.close()
+    return {**email_worker.stats(), "outbox": {estado: total for estado, total in rows}}
+
+@app.get("/health/events")
+def events_health():
+    """Conexiones SSE abiertas en este proceso y eventos descartados por backpressure"""
+    return event_broker.stats()
+
+@app.get("/health/scheduler")
+def scheduler_health():
+    """Scheduled jobs with their next run and in-process metrics"""
+    return scheduler.stats()
+
+@app.get("/health/document-cache")
+def document_cache_health():
+    """Size and hit rate of the rendered document cache"""
+    return document_cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal
 from app.models.models import Coach
+from app.utils.auth_cache import CoachIdentity, get_cached_claims, cache_claims, get_cached_coach, cache_coach
+from app.utils.stream_tickets import redeem_stream_ticket
 import os
 from dotenv import load_dotenv
 
@@ -14,23 +15,60 @@ ALGORITHM = os.getenv("ALGORITHM")
 
 security = HTTPBearer()
 
-def get_current_coach(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_coach(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CoachIdentity:
+    return _coach_from_token(credentials.credentials)
+
+def get_current_coach_from_ticket(ticket: str = Query(...)) -> CoachIdentity:
+    """Para EventSource, que no puede mandar el header Authorization: canjea
+    un ticket de POST /notifications/stream-ticket en vez de llevar el JWT en la URL"""
+    ticket_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired stream ticket"
+    )
+    db = SessionLocal()
+    try:
+        coach_id = redeem_stream_ticket(db, ticket)
+    finally:
+        db.close()
+    if coach_id is None:
+        raise ticket_exception
+    return _coach_identity(coach_id, ticket_exception)
+
+def _load_coach(coach_id: int):
+    # Sesión propia y corta: con la identidad cacheada no se toca la DB, y las
+    # conexiones de streaming no retienen una conexión del pool
+    db = SessionLocal()
+    try:
+        return db.query(Coach).filter(Coach.id == coach_id).first()
+    finally:
+        db.close()
+
+def _coach_from_token(token: str) -> CoachIdentity:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        coach_id: int = payload.get("coach_id")
-        if coach_id is None:
+    payload = get_cached_claims(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise credentials_exception
+        if payload.get("coach_id") is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        cache_claims(token, payload)
     
-    coach = db.query(Coach).filter(Coach.id == coach_id).first()
-    if coach is None:
-        raise credentials_exception
+    coach_id: int = payload.get("coach_id")
     
+    return _coach_identity(coach_id, credentials_exception)
+
+def _coach_identity(coach_id: int, not_found: HTTPException) -> CoachIdentity:
+    coach = get_cached_coach(coach_id)
+    if coach is None:
+        db_coach = _load_coach(coach_id)
+        if db_coach is None:
+            raise not_found
+        coach = cache_coach(db_coach)
     return coach
\ No newline at end of file
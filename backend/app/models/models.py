@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
@@ -55,7 +55,7 @@ class Rutina(Base):
     notas = Column(Text)
     entrenamientos_semana = Column(Integer, default=3)
     fecha_vencimiento = Column(DateTime, nullable=True)
-    activa = Column(Boolean, default=True)
+    activa = Column(Boolean, default=True, nullable=False)
     eliminado = Column(Boolean, default=False)
     
     alumno = relationship("Alumno", back_populates="rutinas")
@@ -142,6 +142,7 @@ class Dieta(Base):
     alumno_id = Column(Integer, ForeignKey("alumnos.id"))
     nombre = Column(String(100))
     fecha_inicio = Column(DateTime)
+    fecha_vencimiento = Column(DateTime, nullable=True, index=True)
     notas = Column(Text)
     activa = Column(Boolean, default=True)
     eliminado = Column(Boolean, default=False)
@@ -213,14 +214,45 @@ class Notification(Base):
     coach_id = Column(Integer, ForeignKey("coaches.id"))
     alumno_id = Column(Integer, ForeignKey("alumnos.id"), nullable=True)
     tipo = Column(String(50))  # rutina_vencida, dieta_vencida, meet_seguimiento
+    referencia_id = Column(Integer, nullable=True)  # rutina/dieta que originó la notificación
     titulo = Column(String(200))
     mensaje = Column(Text)
     leida = Column(Boolean, default=False)
     creada_en = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        Index("ix_notifications_tipo_referencia", "tipo", "referencia_id"),
+        Index("ix_notifications_coach_creada", "coach_id", "creada_en"),  # feed paginado
+        Index("ix_notifications_leida_creada", "leida", "creada_en"),  # purga por retención
+    )
+    
     coach = relationship("Coach")
     alumno = relationship("Alumno")
 
+class DashboardCounter(Base):
+    """Totales del dashboard por coach, ajustados en cada alta/baja (ver app/utils/dashboard_counters.py)"""
+    __tablename__ = "dashboard_counters"
+    
+    coach_id = Column(Integer, ForeignKey("coaches.id"), primary_key=True)
+    total_alumnos = Column(Integer, default=0, nullable=False)
+    total_rutinas = Column(Integer, default=0, nullable=False)
+    total_dietas = Column(Integer, default=0, nullable=False)
+
+class NotificationCounter(Base):
+    """Contador desnormalizado de no leídas por coach (ver app/utils/notification_counters.py)"""
+    __tablename__ = "notification_counters"
+    
+    coach_id = Column(Integer, ForeignKey("coaches.id"), primary_key=True)
+    no_leidas = Column(Integer, default=0, nullable=False)
+
+class StreamTicket(Base):
+    """Ticket de un solo uso para abrir GET /notifications/stream (ver app/utils/stream_tickets.py)"""
+    __tablename__ = "stream_tickets"
+    
+    ticket = Column(String(64), primary_key=True)
+    coach_id = Column(Integer, ForeignKey("coaches.id"), index=True)
+    expira_en = Column(DateTime, nullable=False)
+
 class Lesion(Base):
     __tablename__ = "lesiones"
     
@@ -234,4 +266,83 @@ class Lesion(Base):
     activa = Column(Boolean, default=True)
     creada_en = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
-    alumno = relationship("Alumno")
\ No newline at end of file
+    alumno = relationship("Alumno")
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    coach_id = Column(Integer, ForeignKey("coaches.id"), index=True)
+    tipo = Column(String(20))  # rutina, dieta
+    objeto_id = Column(Integer)
+    formato = Column(String(10))  # pdf, excel
+    estado = Column(String(20), default="pendiente", index=True)  # pendiente, procesando, completado, error
+    intentos = Column(Integer, default=0)
+    archivo = Column(String(255), nullable=True)
+    nombre_archivo = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+    creado_en = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    iniciado_en = Column(DateTime, nullable=True)
+    heartbeat_en = Column(DateTime, nullable=True)  # lo refresca el worker mientras renderiza
+    finalizado_en = Column(DateTime, nullable=True)
+    
+    coach = relationship("Coach")
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    coach_id = Column(Integer, ForeignKey("coaches.id"), nullable=True, index=True)
+    tipo = Column(String(50))  # quota_increase, absence_notice, ...
+    destinatario = Column(String(255))
+    asunto = Column(String(255))
+    html = Column(Text)
+    idempotency_key = Column(String(128), unique=True)
+    estado = Column(String(20), default="pendiente", index=True)  # pendiente, enviando, enviado, error
+    lote = Column(String(32), nullable=True, index=True)  # claim del worker que lo está enviando
+    intentos = Column(Integer, default=0)
+    proximo_intento = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    provider_id = Column(String(100), nullable=True)
+    error = Column(Text, nullable=True)
+    creado_en = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    iniciado_en = Column(DateTime, nullable=True)
+    enviado_en = Column(DateTime, nullable=True)
+    
+    coach = relationship("Coach")
+
+class PaymentReminderRun(Base):
+    __tablename__ = "payment_reminder_runs"
+    
+    id = Column(Integer, primary_key=True)
+    estado = Column(String(20), default="en_curso", index=True)  # en_curso, completado, abandonado
+    fecha_corte = Column(DateTime)  # "hoy" de la corrida; se conserva al reanudar
+    ultimo_alumno_id = Column(Integer, default=0)  # checkpoint del recorrido por id
+    owner = Column(String(100), nullable=True)  # proceso que la está corriendo
+    lease_expira_en = Column(DateTime, nullable=True)
+    procesados = Column(Integer, default=0)
+    enviados = Column(Integer, default=0)
+    fallidos = Column(Integer, default=0)
+    iniciado_en = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    actualizado_en = Column(DateTime, nullable=True)
+    finalizado_en = Column(DateTime, nullable=True)
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+    
+    nombre = Column(String(100), primary_key=True)  # job
+    owner = Column(String(100), nullable=True)  # host:pid:instancia que lo tiene tomado
+    expira_en = Column(DateTime, nullable=True)
+    ultimo_slot = Column(DateTime, nullable=True)  # última ejecución programada ya tomada
+
+class SchedulerRun(Base):
+    __tablename__ = "scheduler_runs"
+    
+    id = Column(Integer, primary_key=True)
+    job = Column(String(100), index=True)
+    owner = Column(String(100))
+    slot = Column(DateTime, nullable=True)
+    estado = Column(String(20))  # ok, error
+    iniciado_en = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    finalizado_en = Column(DateTime, nullable=True)
+    duracion_ms = Column(Integer, nullable=True)
+    resultado = Column(Text, nullable=True)  # JSON devuelto por el job
+    error = Column(Text, nullable=True)
@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
 from sqlalchemy.exc import SQLAlchemyError
-from app.database import get_db
-from app.models.models import Coach, Alumno, PesoAlumno, PersonalRecord, Dieta, Rutina, Ejercicio, Comida, ComidaAlimento
-from app.middleware.auth import get_current_coach
+from app.database import get_db, get_async_db
+from app.models.models import Alumno, PesoAlumno, PersonalRecord, Dieta, Rutina
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.schemas.responses import AlumnoDashboardOut, AlumnoOut, DietaWithComidasOut, PersonalRecordOut, PesoOut, RutinaWithEjerciciosOut
+from app.utils.loaders import rutina_loader_options, dieta_loader_options
+from app.utils.dashboard_counters import adjust_dashboard_counters, refresh_dashboard_counters
 
 router = APIRouter(prefix="/alumnos", tags=["alumnos"])
 
-def get_alumno_by_id_and_coach(alumno_id: int, coach: Coach, db: Session) -> Alumno:
+def get_alumno_by_id_and_coach(alumno_id: int, coach: CoachIdentity, db: Session) -> Alumno:
     """Helper function to get alumno by ID and verify coach ownership"""
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
@@ -44,13 +49,13 @@ class PersonalRecordCreate(BaseModel):
     repeticiones: int = 1
     fecha: Optional[datetime] = None
 
-@router.get("/")
-def get_alumnos(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/", response_model=List[AlumnoOut])
+def get_alumnos(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumnos = db.query(Alumno).filter(Alumno.coach_id == coach.id).all()
     return alumnos
 
-@router.post("/")
-def create_alumno(alumno_data: AlumnoCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/", response_model=AlumnoOut)
+def create_alumno(alumno_data: AlumnoCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     try:
         new_alumno = Alumno(
             coach_id=coach.id,
@@ -63,6 +68,7 @@ def create_alumno(alumno_data: AlumnoCreate, coach: Coach = Depends(get_current_
         )
         
         db.add(new_alumno)
+        adjust_dashboard_counters(db, coach.id, alumnos=1)
         db.commit()
         db.refresh(new_alumno)
         
@@ -71,12 +77,12 @@ def create_alumno(alumno_data: AlumnoCreate, coach: Coach = Depends(get_current_
         db.rollback()
         raise HTTPException(status_code=500, detail="Error creating alumno")
 
-@router.get("/{alumno_id}")
-def get_alumno(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/{alumno_id}", response_model=AlumnoOut)
+def get_alumno(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     return get_alumno_by_id_and_coach(alumno_id, coach, db)
 
-@router.patch("/{alumno_id}")
-def update_alumno(alumno_id: int, alumno_data: AlumnoUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/{alumno_id}", response_model=AlumnoOut)
+def update_alumno(alumno_id: int, alumno_data: AlumnoUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -89,17 +95,19 @@ def update_alumno(alumno_id: int, alumno_data: AlumnoUpdate, coach: Coach = Depe
     return alumno
 
 @router.delete("/{alumno_id}")
-def delete_alumno(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_alumno(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
     
     db.delete(alumno)
+    # Se van también sus planes activos: recalcular en lugar de ajustar
+    refresh_dashboard_counters(db, coach.id)
     db.commit()
     return {"message": "Alumno deleted successfully"}
 
-@router.get("/{alumno_id}/pesos")
-def get_alumno_pesos(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/{alumno_id}/pesos", response_model=List[PesoOut])
+def get_alumno_pesos(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -107,8 +115,8 @@ def get_alumno_pesos(alumno_id: int, coach: Coach = Depends(get_current_coach),
     pesos = db.query(PesoAlumno).filter(PesoAlumno.alumno_id == alumno_id).order_by(PesoAlumno.fecha).all()
     return pesos
 
-@router.post("/{alumno_id}/pesos")
-def add_peso(alumno_id: int, peso_data: PesoCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/{alumno_id}/pesos", response_model=PesoOut)
+def add_peso(alumno_id: int, peso_data: PesoCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -125,8 +133,8 @@ def add_peso(alumno_id: int, peso_data: PesoCreate, coach: Coach = Depends(get_c
     
     return new_peso
 
-@router.post("/{alumno_id}/personal-records")
-def add_personal_record(alumno_id: int, pr_data: PersonalRecordCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/{alumno_id}/personal-records", response_model=PersonalRecordOut)
+def add_personal_record(alumno_id: int, pr_data: PersonalRecordCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -149,7 +157,7 @@ def add_personal_record(alumno_id: int, pr_data: PersonalRecordCreate, coach: Co
     return new_pr
 
 @router.delete("/personal-records/{pr_id}")
-def delete_personal_record(pr_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_personal_record(pr_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     pr = db.query(PersonalRecord).join(Alumno).filter(
         PersonalRecord.id == pr_id,
         Alumno.coach_id == coach.id
@@ -163,7 +171,7 @@ def delete_personal_record(pr_id: int, coach: Coach = Depends(get_current_coach)
     return {"message": "Personal Record deleted successfully"}
 
 @router.get("/{alumno_id}/pr-chart")
-def get_pr_chart_data(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def get_pr_chart_data(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = get_alumno_by_id_and_coach(alumno_id, coach, db)
     
     prs = db.query(PersonalRecord).filter(
@@ -183,13 +191,17 @@ def get_pr_chart_data(alumno_id: int, coach: Coach = Depends(get_current_coach),
     
     return chart_data
 
-@router.get("/{alumno_id}/dashboard")
-def get_alumno_dashboard(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
+@router.get("/{alumno_id}/dashboard", response_model=AlumnoDashboardOut)
+async def get_alumno_dashboard(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: AsyncSession = Depends(get_async_db)):
+    alumno = (await db.execute(
+        select(Alumno).where(Alumno.id == alumno_id, Alumno.coach_id == coach.id)
+    )).scalars().first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
     
-    pesos = db.query(PesoAlumno).filter(PesoAlumno.alumno_id == alumno_id).order_by(PesoAlumno.fecha).all()
+    pesos = (await db.execute(
+        select(PesoAlumno).where(PesoAlumno.alumno_id == alumno_id).order_by(PesoAlumno.fecha)
+    )).scalars().all()
     peso_actual = pesos[-1].peso if pesos else None
     
     # Calcular edad
@@ -200,7 +212,17 @@ def get_alumno_dashboard(alumno_id: int, coach: Coach = Depends(get_current_coac
         edad = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
     
     # Obtener personal records
-    prs = db.query(PersonalRecord).filter(PersonalRecord.alumno_id == alumno_id).order_by(PersonalRecord.fecha.desc()).all()
+    prs = (await db.execute(
+        select(PersonalRecord).where(PersonalRecord.alumno_id == alumno_id).order_by(PersonalRecord.fecha.desc())
+    )).scalars().all()
+    
+    # Consultas explícitas: en una sesión async no se pueden usar relaciones lazy
+    rutinas = (await db.execute(
+        select(Rutina).where(Rutina.alumno_id == alumno_id, Rutina.eliminado == False).order_by(Rutina.id)
+    )).scalars().all()
+    dietas = (await db.execute(
+        select(Dieta).where(Dieta.alumno_id == alumno_id, Dieta.eliminado == False).order_by(Dieta.id)
+    )).scalars().all()
     
     return {
         "alumno": {
@@ -215,36 +237,32 @@ def get_alumno_dashboard(alumno_id: int, coach: Coach = Depends(get_current_coac
         },
         "historico_pesos": [{"fecha": p.fecha, "peso": p.peso} for p in pesos],
         "personal_records": [{"id": pr.id, "ejercicio": pr.ejercicio, "peso": pr.peso, "repeticiones": pr.repeticiones, "fecha": pr.fecha} for pr in prs],
-        "rutinas": [r for r in alumno.rutinas if not r.eliminado],
-        "dietas": [d for d in alumno.dietas if not d.eliminado]
+        "rutinas": rutinas,
+        "dietas": dietas
     }
 
-@router.get("/{alumno_id}/rutinas")
-def get_rutinas(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+@router.get("/{alumno_id}/rutinas", response_model=List[RutinaWithEjerciciosOut])
+def get_rutinas(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
     
     rutinas = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base)
+        *rutina_loader_options(include_alumno=False)
     ).filter(
         Rutina.alumno_id == alumno_id,
         Rutina.eliminado == False
     ).order_by(Rutina.activa.desc(), Rutina.id.desc()).all()
     return rutinas
 
-@router.get("/{alumno_id}/dietas")
-def get_dietas(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+@router.get("/{alumno_id}/dietas", response_model=List[DietaWithComidasOut])
+def get_dietas(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
     
     dietas = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento)
+        *dieta_loader_options(include_alumno=False)
     ).filter(
         Dieta.alumno_id == alumno_id,
         Dieta.eliminado == False
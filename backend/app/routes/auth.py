@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, validator
+from typing import Optional
 from app.database import get_db
 from app.models.models import Coach
-from app.utils.auth_utils import verify_password, get_password_hash, create_access_token
+from app.utils.auth_utils import verify_password_async, get_password_hash_async, create_access_token
+from app.utils.password_pool import PasswordPoolSaturated
+from app.utils.auth_cache import invalidate_coach, invalidate_token, cache_coach
 from app.utils.validation import validate_email, validate_password_strength, sanitize_string, ValidationError
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Token previo (opcional) que el login reemplaza en este dispositivo
+optional_bearer = HTTPBearer(auto_error=False)
+
 class CoachRegister(BaseModel):
     nombre: str
     email: str
@@ -45,45 +53,73 @@ class CoachLogin(BaseModel):
             raise ValueError('Formato de email inválido')
         return v
 
+def password_pool_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servicio ocupado, intentá nuevamente en unos segundos",
+        headers={"Retry-After": "1"}
+    )
+
+def _get_coach_by_email(db: Session, email: str):
+    return db.query(Coach).filter(Coach.email == email).first()
+
+def _save_coach(db: Session, coach: Coach):
+    db.add(coach)
+    db.commit()
+    db.refresh(coach)
+
+# Los handlers son async para que bcrypt corra en el pool dedicado sin ocupar
+# un thread del threadpool de FastAPI; el acceso a la DB sigue siendo sync.
 @router.post("/register")
-def register_coach(coach_data: CoachRegister, db: Session = Depends(get_db)):
+async def register_coach(coach_data: CoachRegister, db: Session = Depends(get_db)):
     try:
         # Verificar si el email ya existe
-        existing_coach = db.query(Coach).filter(Coach.email == coach_data.email).first()
+        existing_coach = await run_in_threadpool(_get_coach_by_email, db, coach_data.email)
         if existing_coach:
             raise HTTPException(status_code=400, detail="El email ya está registrado")
         
         # Crear nuevo coach
-        hashed_password = get_password_hash(coach_data.password)
+        hashed_password = await get_password_hash_async(coach_data.password)
         new_coach = Coach(
             nombre=coach_data.nombre,
             email=coach_data.email,
             password_hash=hashed_password
         )
         
-        db.add(new_coach)
-        db.commit()
-        db.refresh(new_coach)
+        await run_in_threadpool(_save_coach, db, new_coach)
+        invalidate_coach(new_coach.id)
         
         return {"message": "Coach registrado exitosamente", "coach_id": new_coach.id}
         
+    except PasswordPoolSaturated:
+        raise password_pool_busy_exception()
     except SQLAlchemyError as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail="Error al registrar el coach")
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=e.message)
 
 @router.post("/login")
-def login_coach(coach_data: CoachLogin, db: Session = Depends(get_db)):
+async def login_coach(
+    coach_data: CoachLogin,
+    db: Session = Depends(get_db),
+    previous: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
     try:
-        coach = db.query(Coach).filter(Coach.email == coach_data.email).first()
+        coach = await run_in_threadpool(_get_coach_by_email, db, coach_data.email)
         
-        if not coach or not verify_password(coach_data.password, coach.password_hash):
+        if not coach or not await verify_password_async(coach_data.password, coach.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email o contraseña incorrectos"
             )
         
+        # Refrescar la identidad cacheada con los datos actuales del coach; los
+        # tokens de sus otros dispositivos siguen valiendo, sólo se olvida el
+        # que este login reemplaza
+        cache_coach(coach)
+        if previous is not None:
+            invalidate_token(previous.credentials)
         access_token = create_access_token(data={"coach_id": coach.id})
         
         return {
@@ -96,6 +132,8 @@ def login_coach(coach_data: CoachLogin, db: Session = Depends(get_db)):
             }
         }
         
+    except PasswordPoolSaturated:
+        raise password_pool_busy_exception()
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail="Error al iniciar sesión")
     except ValidationError as e:
@@ -1,29 +1,15 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.database import get_db
-from app.models.models import Coach, Alumno, Rutina, Dieta
-from app.middleware.auth import get_current_coach
+from app.models.models import Alumno
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.utils.dashboard_counters import get_dashboard_counters
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 @router.get("/")
-def get_dashboard(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    # Total de alumnos
-    total_alumnos = db.query(Alumno).filter(Alumno.coach_id == coach.id).count()
-    
-    # Total de rutinas activas
-    total_rutinas = db.query(Rutina).join(Alumno).filter(
-        Alumno.coach_id == coach.id,
-        Rutina.activa == True,
-        Rutina.eliminado == False
-    ).count()
-    
-    total_dietas = db.query(Dieta).join(Alumno).filter(
-        Alumno.coach_id == coach.id,
-        Dieta.activa == True,
-        Dieta.eliminado == False
-    ).count()
+def get_dashboard(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    counters = get_dashboard_counters(db, coach.id)
     
     # Últimos alumnos añadidos (últimos 5)
     ultimos_alumnos = db.query(Alumno).filter(
@@ -31,9 +17,9 @@ def get_dashboard(coach: Coach = Depends(get_current_coach), db: Session = Depen
     ).order_by(Alumno.creado_en.desc()).limit(5).all()
     
     return {
-        "total_alumnos": total_alumnos,
-        "total_rutinas": total_rutinas,
-        "total_dietas": total_dietas,
+        "total_alumnos": counters["total_alumnos"],
+        "total_rutinas": counters["total_rutinas"],
+        "total_dietas": counters["total_dietas"],
         "ultimos_alumnos": [
             {
                 "id": alumno.id,
@@ -43,4 +29,4 @@ def get_dashboard(coach: Coach = Depends(get_current_coach), db: Session = Depen
             }
             for alumno in ultimos_alumnos
         ]
-    }
\ No newline at end of file
+    }
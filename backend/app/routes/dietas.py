@@ -1,31 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
-from app.database import get_db
-from app.models.models import Coach, Alumno, Dieta, Comida, ComidaAlimento, Alimento, DietaPlantilla, ComidaPlantilla, ComidaPlantillaAlimento
-from app.middleware.auth import get_current_coach
+from app.database import get_db, get_async_db
+from app.models.models import Alumno, Dieta, Comida, ComidaAlimento, Alimento, DietaPlantilla
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.schemas.requests import BulkAssignRequest
+from app.schemas.responses import AlimentoOut, BulkAssignOut, ComidaAlimentoOut, ComidaOut, DietaDetailOut, DietaOut, DietaPlantillaDetailOut, DietaPlantillaOut
+from app.utils.dashboard_counters import adjust_dashboard_counters
 from app.utils.dieta_pdf_generator import generate_dieta_pdf
-from app.utils.dieta_excel_generator import generate_dieta_excel
+from app.utils.dieta_excel_generator import write_dieta_excel, iter_dieta_excel
+from app.utils.document_cache import document_cache, invalidate_dieta_documents
+from app.utils.document_snapshots import snapshot_dieta
+from app.utils.alimento_catalog import search_alimentos as search_alimento_index, add_alimento_to_index
+from app.utils.loaders import dieta_loader_options, dieta_plantilla_loader_options
+from app.utils.cloning import copy_comidas, clear_day_comidas, copy_comidas_to_plantilla, copy_comidas_from_plantilla, bulk_assign_ids, assign_plantilla
 
 router = APIRouter(prefix="/dietas", tags=["dietas"])
 
-@router.get("/")
-def get_all_dietas(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    dietas = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento),
-        joinedload(Dieta.alumno)
-    ).outerjoin(Alumno).filter(
-        (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
-        Dieta.eliminado == False
-    ).order_by(Dieta.activa.desc(), Dieta.id.desc()).all()
+@router.get("/", response_model=List[DietaDetailOut])
+async def get_all_dietas(coach: CoachIdentity = Depends(get_current_coach), db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        select(Dieta).options(
+            *dieta_loader_options()
+        ).outerjoin(Alumno, Dieta.alumno_id == Alumno.id).where(
+            (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
+            Dieta.eliminado == False
+        ).order_by(Dieta.activa.desc(), Dieta.id.desc())
+    )
+    dietas = result.scalars().all()
     return dietas
 
 class DietaCreate(BaseModel):
     nombre: str
     fecha_inicio: Optional[datetime] = None
+    fecha_vencimiento: Optional[datetime] = None
     notas: Optional[str] = None
 
 class ComidaCreate(BaseModel):
@@ -42,8 +57,8 @@ class ComidaAlimentoCreate(BaseModel):
     alimento_id: int
     cantidad_gramos: float
 
-@router.post("/create/{alumno_id}")
-def create_dieta(alumno_id: str, dieta_data: DietaCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/create/{alumno_id}", response_model=DietaOut)
+def create_dieta(alumno_id: str, dieta_data: DietaCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Handle standalone diets (alumno_id can be 'none')
     if alumno_id != 'none':
         alumno_id = int(alumno_id)
@@ -54,6 +69,7 @@ def create_dieta(alumno_id: str, dieta_data: DietaCreate, coach: Coach = Depends
         alumno_id = None
     
     # Marcar dieta anterior como eliminada (only for assigned diets)
+    dieta_anterior = None
     if alumno_id:
         dieta_anterior = db.query(Dieta).filter(
             Dieta.alumno_id == alumno_id,
@@ -68,16 +84,19 @@ def create_dieta(alumno_id: str, dieta_data: DietaCreate, coach: Coach = Depends
         alumno_id=alumno_id,
         nombre=dieta_data.nombre,
         fecha_inicio=dieta_data.fecha_inicio,
+        fecha_vencimiento=dieta_data.fecha_vencimiento,
         notas=dieta_data.notas
     )
     
     db.add(new_dieta)
+    if alumno_id and not dieta_anterior:
+        adjust_dashboard_counters(db, coach.id, dietas=1)
     db.commit()
     db.refresh(new_dieta)
     return new_dieta
 
-@router.patch("/{dieta_id}")
-def update_dieta(dieta_id: int, dieta_data: DietaCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/{dieta_id}", response_model=DietaOut)
+def update_dieta(dieta_id: int, dieta_data: DietaCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -92,10 +111,11 @@ def update_dieta(dieta_id: int, dieta_data: DietaCreate, coach: Coach = Depends(
     
     db.commit()
     db.refresh(dieta)
+    invalidate_dieta_documents(dieta_id)
     return dieta
 
 @router.delete("/{dieta_id}")
-def delete_dieta(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_dieta(dieta_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -105,17 +125,19 @@ def delete_dieta(dieta_id: int, coach: Coach = Depends(get_current_coach), db: S
     if not dieta:
         raise HTTPException(status_code=404, detail="Dieta not found")
     
+    estaba_activa = dieta.activa and dieta.alumno_id is not None
     dieta.eliminado = True
     dieta.activa = False
+    if estaba_activa:
+        adjust_dashboard_counters(db, coach.id, dietas=-1)
     db.commit()
+    invalidate_dieta_documents(dieta_id)
     return {"message": "Dieta deleted successfully"}
 
-@router.post("/{dieta_id}/copy/{target_alumno_id}")
-def copy_dieta(dieta_id: int, target_alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    # Verificar dieta original
-    dieta_original = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento)
-    ).outerjoin(Alumno).filter(
+@router.post("/{dieta_id}/copy/{target_alumno_id}", response_model=DietaOut)
+def copy_dieta(dieta_id: int, target_alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    # Verificar dieta original (comidas y alimentos se copian en la base)
+    dieta_original = db.query(Dieta).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
         Dieta.eliminado == False
@@ -148,48 +170,32 @@ def copy_dieta(dieta_id: int, target_alumno_id: int, coach: Coach = Depends(get_
         alumno_id=target_alumno_id,
         nombre=f"{dieta_original.nombre}",
         fecha_inicio=dieta_original.fecha_inicio,
+        fecha_vencimiento=dieta_original.fecha_vencimiento,
         notas=dieta_original.notas
     )
     
     db.add(nueva_dieta)
     db.flush()
-    db.refresh(nueva_dieta)
-    
-    # Copiar comidas
-    for comida_original in dieta_original.comidas:
-        nueva_comida = Comida(
-            dieta_id=nueva_dieta.id,
-            nombre=comida_original.nombre,
-            dia=comida_original.dia,
-            orden=comida_original.orden
-        )
-        db.add(nueva_comida)
-        db.flush()
-        
-        # Copiar alimentos
-        for ca_original in comida_original.alimentos:
-            nuevo_ca = ComidaAlimento(
-                comida_id=nueva_comida.id,
-                alimento_id=ca_original.alimento_id,
-                cantidad_gramos=ca_original.cantidad_gramos
-            )
-            db.add(nuevo_ca)
     
+    # Copiar comidas y alimentos
+    copy_comidas(db, dieta_original.id, [nueva_dieta.id])
+    
+    if not dieta_anterior:
+        adjust_dashboard_counters(db, coach.id, dietas=1)
     db.commit()
     return nueva_dieta
 
-@router.get("/plantillas")
-def get_dietas_plantillas(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/plantillas", response_model=List[DietaPlantillaDetailOut])
+def get_dietas_plantillas(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     plantillas = db.query(DietaPlantilla).options(
-        joinedload(DietaPlantilla.comidas).joinedload(ComidaPlantilla.alimentos).joinedload(ComidaPlantillaAlimento.alimento)
+        *dieta_plantilla_loader_options()
     ).filter(DietaPlantilla.coach_id == coach.id).all()
     return plantillas
 
-@router.get("/{dieta_id}")
-def get_dieta(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/{dieta_id}", response_model=DietaDetailOut)
+def get_dieta(dieta_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento),
-        joinedload(Dieta.alumno)
+        *dieta_loader_options()
     ).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -201,8 +207,8 @@ def get_dieta(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Sess
     
     return dieta
 
-@router.post("/{dieta_id}/comidas")
-def add_comida(dieta_id: int, comida_data: ComidaCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/{dieta_id}/comidas", response_model=ComidaOut)
+def add_comida(dieta_id: int, comida_data: ComidaCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -222,10 +228,11 @@ def add_comida(dieta_id: int, comida_data: ComidaCreate, coach: Coach = Depends(
     db.add(new_comida)
     db.commit()
     db.refresh(new_comida)
+    invalidate_dieta_documents(dieta_id)
     return new_comida
 
-@router.post("/comidas/{comida_id}/alimentos")
-def add_alimento_to_comida(comida_id: int, alimento_data: ComidaAlimentoCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/comidas/{comida_id}/alimentos", response_model=ComidaAlimentoOut)
+def add_alimento_to_comida(comida_id: int, alimento_data: ComidaAlimentoCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     comida = db.query(Comida).join(Dieta).outerjoin(Alumno).filter(
         Comida.id == comida_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None))
@@ -249,13 +256,14 @@ def add_alimento_to_comida(comida_id: int, alimento_data: ComidaAlimentoCreate,
         db.add(new_comida_alimento)
         db.commit()
         db.refresh(new_comida_alimento)
+        invalidate_dieta_documents(comida.dieta_id)
         return new_comida_alimento
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error adding alimento to comida")
 
 @router.delete("/comida-alimentos/{comida_alimento_id}")
-def delete_comida_alimento(comida_alimento_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_comida_alimento(comida_alimento_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     comida_alimento = db.query(ComidaAlimento).join(Comida).join(Dieta).outerjoin(Alumno).filter(
         ComidaAlimento.id == comida_alimento_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None))
@@ -264,16 +272,18 @@ def delete_comida_alimento(comida_alimento_id: int, coach: Coach = Depends(get_c
     if not comida_alimento:
         raise HTTPException(status_code=404, detail="Comida alimento not found")
     
+    dieta_id = comida_alimento.comida.dieta_id
     try:
         db.delete(comida_alimento)
         db.commit()
+        invalidate_dieta_documents(dieta_id)
         return {"message": "Alimento removed from comida"}
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error removing alimento from comida")
 
-@router.patch("/comidas/{comida_id}")
-def update_comida(comida_id: int, comida_data: ComidaUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/comidas/{comida_id}", response_model=ComidaOut)
+def update_comida(comida_id: int, comida_data: ComidaUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     comida = db.query(Comida).join(Dieta).outerjoin(Alumno).filter(
         Comida.id == comida_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None))
@@ -288,13 +298,14 @@ def update_comida(comida_id: int, comida_data: ComidaUpdate, coach: Coach = Depe
         
         db.commit()
         db.refresh(comida)
+        invalidate_dieta_documents(comida.dieta_id)
         return comida
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error updating comida")
 
 @router.delete("/comidas/{comida_id}")
-def delete_comida(comida_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_comida(comida_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     comida = db.query(Comida).join(Dieta).outerjoin(Alumno).filter(
         Comida.id == comida_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None))
@@ -303,15 +314,15 @@ def delete_comida(comida_id: int, coach: Coach = Depends(get_current_coach), db:
     if not comida:
         raise HTTPException(status_code=404, detail="Comida not found")
     
+    dieta_id = comida.dieta_id
     db.delete(comida)
     db.commit()
+    invalidate_dieta_documents(dieta_id)
     return {"message": "Comida deleted successfully"}
 
-@router.post("/{dieta_id}/save-as-template")
-def save_dieta_as_template(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    dieta = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento)
-    ).outerjoin(Alumno).filter(
+@router.post("/{dieta_id}/save-as-template", response_model=DietaPlantillaOut)
+def save_dieta_as_template(dieta_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    dieta = db.query(Dieta).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
         Dieta.eliminado == False
@@ -328,38 +339,18 @@ def save_dieta_as_template(dieta_id: int, coach: Coach = Depends(get_current_coa
     )
     
     db.add(plantilla)
-    db.commit()
-    db.refresh(plantilla)
-    
-    # Copiar comidas
-    comidas_plantilla = []
-    for comida in dieta.comidas:
-        comida_plantilla = ComidaPlantilla(
-            dieta_plantilla_id=plantilla.id,
-            nombre=comida.nombre,
-            orden=comida.orden
-        )
-        db.add(comida_plantilla)
-        db.flush()  # Get ID without committing
-        
-        # Copiar alimentos
-        for comida_alimento in comida.alimentos:
-            alimento_plantilla = ComidaPlantillaAlimento(
-                comida_plantilla_id=comida_plantilla.id,
-                alimento_id=comida_alimento.alimento_id,
-                cantidad_gramos=comida_alimento.cantidad_gramos
-            )
-            db.add(alimento_plantilla)
+    db.flush()
+    
+    # Copiar comidas y alimentos
+    copy_comidas_to_plantilla(db, dieta.id, plantilla.id)
     
     db.commit()
     return plantilla
 
-@router.post("/plantillas/{plantilla_id}/create-dieta/{alumno_id}")
-def create_dieta_from_template(plantilla_id: int, alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/plantillas/{plantilla_id}/create-dieta/{alumno_id}", response_model=DietaOut)
+def create_dieta_from_template(plantilla_id: int, alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Verificar plantilla
-    plantilla = db.query(DietaPlantilla).options(
-        joinedload(DietaPlantilla.comidas).joinedload(ComidaPlantilla.alimentos).joinedload(ComidaPlantillaAlimento.alimento)
-    ).filter(
+    plantilla = db.query(DietaPlantilla).filter(
         DietaPlantilla.id == plantilla_id,
         DietaPlantilla.coach_id == coach.id
     ).first()
@@ -394,37 +385,45 @@ def create_dieta_from_template(plantilla_id: int, alumno_id: int, coach: Coach =
     )
     
     db.add(nueva_dieta)
-    db.commit()
-    db.refresh(nueva_dieta)
-    
-    # Copiar comidas
-    for comida_plantilla in plantilla.comidas:
-        nueva_comida = Comida(
-            dieta_id=nueva_dieta.id,
-            nombre=comida_plantilla.nombre,
-            orden=comida_plantilla.orden
-        )
-        db.add(nueva_comida)
-        db.flush()  # Get ID without committing
-        
-        # Copiar alimentos
-        for alimento_plantilla in comida_plantilla.alimentos:
-            nuevo_comida_alimento = ComidaAlimento(
-                comida_id=nueva_comida.id,
-                alimento_id=alimento_plantilla.alimento_id,
-                cantidad_gramos=alimento_plantilla.cantidad_gramos
-            )
-            db.add(nuevo_comida_alimento)
+    db.flush()
+    
+    # Copiar comidas y alimentos
+    copy_comidas_from_plantilla(db, plantilla.id, [nueva_dieta.id])
     
+    if not dieta_anterior:
+        adjust_dashboard_counters(db, coach.id, dietas=1)
     db.commit()
     return nueva_dieta
 
+@router.post("/plantillas/{plantilla_id}/assign", response_model=BulkAssignOut)
+def assign_dieta_template(plantilla_id: int, assign_data: BulkAssignRequest, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    """Crear una dieta desde la plantilla para cada alumno, en una sola transacción"""
+    try:
+        alumno_ids = bulk_assign_ids(assign_data.alumno_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    plantilla = db.query(DietaPlantilla).filter(
+        DietaPlantilla.id == plantilla_id,
+        DietaPlantilla.coach_id == coach.id
+    ).first()
+    
+    if not plantilla:
+        raise HTTPException(status_code=404, detail="Plantilla not found")
+    
+    resultado = assign_plantilla(db, Dieta, coach.id, alumno_ids, {
+        "nombre": plantilla.nombre.replace(" (Plantilla)", ""),
+        "notas": plantilla.notas
+    }, lambda plan_ids: copy_comidas_from_plantilla(db, plantilla.id, plan_ids))
+    db.commit()
+    return resultado
+
 class CopyDayRequest(BaseModel):
     source_day: int
     target_day: int
 
 @router.post("/{dieta_id}/copy-day")
-def copy_day_meals(dieta_id: int, copy_data: CopyDayRequest, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def copy_day_meals(dieta_id: int, copy_data: CopyDayRequest, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     """Copy all meals from one day to another within the same diet"""
     # Verify diet exists and belongs to coach
     dieta = db.query(Dieta).outerjoin(Alumno).filter(
@@ -444,79 +443,41 @@ def copy_day_meals(dieta_id: int, copy_data: CopyDayRequest, coach: Coach = Depe
         raise HTTPException(status_code=400, detail="Source and target day cannot be the same")
     
     try:
-        # Get meals from source day
-        source_meals = db.query(Comida).options(
-            joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento)
-        ).filter(
-            Comida.dieta_id == dieta_id,
-            Comida.dia == copy_data.source_day
-        ).all()
+        # Delete existing meals in target day (con sus alimentos)
+        clear_day_comidas(db, dieta_id, copy_data.target_day)
         
-        if not source_meals:
+        # Copy meals and their foods to target day
+        copied = copy_comidas(db, dieta_id, [dieta_id], copy_data.source_day, copy_data.target_day)
+        if not copied:
+            db.rollback()
             raise HTTPException(status_code=404, detail=f"No meals found for day {copy_data.source_day}")
         
-        # Delete existing meals in target day
-        target_meals = db.query(Comida).filter(
-            Comida.dieta_id == dieta_id,
-            Comida.dia == copy_data.target_day
-        ).all()
-        
-        for meal in target_meals:
-            db.delete(meal)
-        
-        # Copy meals to target day
-        copied_meals = []
-        for meal in source_meals:
-            new_meal = Comida(
-                dieta_id=dieta_id,
-                nombre=meal.nombre,
-                dia=copy_data.target_day,
-                orden=meal.orden
-            )
-            db.add(new_meal)
-            db.flush()  # Get ID
-            
-            # Copy meal foods
-            for meal_food in meal.alimentos:
-                new_meal_food = ComidaAlimento(
-                    comida_id=new_meal.id,
-                    alimento_id=meal_food.alimento_id,
-                    cantidad_gramos=meal_food.cantidad_gramos
-                )
-                db.add(new_meal_food)
-            
-            copied_meals.append(new_meal)
-        
         db.commit()
+        invalidate_dieta_documents(dieta_id)
         
         return {
-            "message": f"Copied {len(copied_meals)} meals from day {copy_data.source_day} to day {copy_data.target_day}",
-            "meals_copied": len(copied_meals)
+            "message": f"Copied {copied} meals from day {copy_data.source_day} to day {copy_data.target_day}",
+            "meals_copied": copied
         }
         
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error copying meals")
 
-@router.get("/alimentos")
+@router.get("/alimentos", response_model=List[AlimentoOut])
 def get_alimentos(db: Session = Depends(get_db)):
     alimentos = db.query(Alimento).all()
     return alimentos
 
-@router.get("/alimentos/search/{query}")
+@router.get("/alimentos/search/{query}", response_model=List[AlimentoOut])
 def search_alimentos(query: str, db: Session = Depends(get_db)):
-    alimentos = db.query(Alimento).filter(
-        Alimento.nombre.ilike(f"%{query}%")
-    ).limit(20).all()
-    return alimentos
+    # Búsqueda en el índice en memoria (prefijos + trigramas, sin tildes)
+    return search_alimento_index(db, query, limit=20)
 
 @router.get("/{dieta_id}/pdf")
-def download_dieta_pdf(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+def download_dieta_pdf(dieta_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento),
-        joinedload(Dieta.alumno)
+        *dieta_loader_options()
     ).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -527,23 +488,20 @@ def download_dieta_pdf(dieta_id: int, coach: Coach = Depends(get_current_coach),
         raise HTTPException(status_code=404, detail="Dieta not found")
     
     try:
-        pdf_content = generate_dieta_pdf(dieta)
-        
-        return Response(
-            content=pdf_content,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=dieta_{dieta.nombre}.pdf"}
+        # Documento cacheado por contenido: si la dieta no cambió no se vuelve a renderizar
+        path = document_cache.get_or_render("dieta", dieta.id, "pdf", snapshot_dieta(dieta), generate_dieta_pdf)
+        # path es un link propio (ver DocumentCache.checkout): se borra al terminar de enviarlo
+        return FileResponse(
+            path, media_type="application/pdf", filename=f"dieta_{dieta.nombre}.pdf",
+            background=BackgroundTask(document_cache.discard, path)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
 
 @router.get("/{dieta_id}/excel")
-def download_dieta_excel(dieta_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+def download_dieta_excel(dieta_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     dieta = db.query(Dieta).options(
-        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento),
-        joinedload(Dieta.alumno)
+        *dieta_loader_options()
     ).outerjoin(Alumno).filter(
         Dieta.id == dieta_id,
         (Alumno.coach_id == coach.id) | (Dieta.alumno_id.is_(None)),
@@ -554,12 +512,19 @@ def download_dieta_excel(dieta_id: int, coach: Coach = Depends(get_current_coach
         raise HTTPException(status_code=404, detail="Dieta not found")
     
     try:
-        excel_content = generate_dieta_excel(dieta)
-        
-        return Response(
-            content=excel_content,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=dieta_{dieta.nombre}.xlsx"}
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        snapshot = snapshot_dieta(dieta)
+        if not document_cache.enabled:
+            # Sin cache: el libro write_only se vuelca a un temporal y se envía por partes
+            return StreamingResponse(
+                iter_dieta_excel(snapshot),
+                media_type=media_type,
+                headers={"Content-Disposition": f"attachment; filename=dieta_{dieta.nombre}.xlsx"}
+            )
+        path = document_cache.get_or_render("dieta", dieta.id, "excel", snapshot, write=write_dieta_excel)
+        return FileResponse(
+            path, media_type=media_type, filename=f"dieta_{dieta.nombre}.xlsx",
+            background=BackgroundTask(document_cache.discard, path)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating Excel: {str(e)}")
@@ -571,7 +536,7 @@ class AlimentoCreate(BaseModel):
     carbohidratos_100g: float
     grasas_100g: float
 
-@router.post("/alimentos")
+@router.post("/alimentos", response_model=AlimentoOut)
 def create_alimento(alimento_data: AlimentoCreate, db: Session = Depends(get_db)):
     # Verificar si ya existe
     existing = db.query(Alimento).filter(Alimento.nombre.ilike(alimento_data.nombre)).first()
@@ -589,4 +554,5 @@ def create_alimento(alimento_data: AlimentoCreate, db: Session = Depends(get_db)
     db.add(new_alimento)
     db.commit()
     db.refresh(new_alimento)
+    add_alimento_to_index(new_alimento)
     return new_alimento
\ No newline at end of file
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from pydantic import BaseModel
 from typing import List
 from app.database import get_db
 from app.models.models import EjercicioBase
-from app.middleware.auth import get_current_coach
+from app.schemas.responses import EjercicioBaseOut
+from app.utils.ejercicio_catalog import get_ejercicio_catalog, search_ejercicios_catalog, add_ejercicio_to_catalog
+from app.utils.etag import make_etag, cached_json_response
+import orjson
 
 router = APIRouter(prefix="/ejercicios-base", tags=["ejercicios-base"])
 
@@ -13,19 +16,18 @@ class EjercicioBaseCreate(BaseModel):
     nombre: str
     categoria: str
 
-@router.get("/")
-def get_ejercicios_base(db: Session = Depends(get_db)):
-    ejercicios = db.query(EjercicioBase).order_by(EjercicioBase.categoria, EjercicioBase.nombre).all()
-    return ejercicios
+@router.get("/", response_model=List[EjercicioBaseOut])
+def get_ejercicios_base(request: Request, db: Session = Depends(get_db)):
+    # Catálogo cacheado en memoria; el JSON y el ETag se calculan una vez por versión
+    catalog = get_ejercicio_catalog(db)
+    return cached_json_response(request, catalog.body, catalog.etag)
 
-@router.get("/search/{query}")
-def search_ejercicios(query: str, db: Session = Depends(get_db)):
-    ejercicios = db.query(EjercicioBase).filter(
-        EjercicioBase.nombre.ilike(f"%{query}%")
-    ).limit(10).all()
-    return ejercicios
+@router.get("/search/{query}", response_model=List[EjercicioBaseOut])
+def search_ejercicios(query: str, request: Request, db: Session = Depends(get_db)):
+    body = orjson.dumps(search_ejercicios_catalog(db, query, limit=10))
+    return cached_json_response(request, body, make_etag(body))
 
-@router.post("/")
+@router.post("/", response_model=EjercicioBaseOut)
 def create_ejercicio_base(ejercicio_data: EjercicioBaseCreate, db: Session = Depends(get_db)):
     # Verificar si ya existe
     existing = db.query(EjercicioBase).filter(EjercicioBase.nombre.ilike(ejercicio_data.nombre)).first()
@@ -41,6 +43,7 @@ def create_ejercicio_base(ejercicio_data: EjercicioBaseCreate, db: Session = Dep
         db.add(new_ejercicio)
         db.commit()
         db.refresh(new_ejercicio)
+        add_ejercicio_to_catalog(new_ejercicio)
         return new_ejercicio
     except SQLAlchemyError as e:
         db.rollback()
@@ -1,19 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from typing import List, Optional
 from app.database import get_db
-from app.models.models import Coach, Alumno
-from app.middleware.auth import get_current_coach
-import resend
-import os
-
-# Configurar Resend solo si hay API key
-if os.getenv("RESEND_API_KEY"):
-    resend.api_key = os.getenv("RESEND_API_KEY")
-else:
-    print("Warning: RESEND_API_KEY not configured")
+from app.models.models import Alumno
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.utils.email_providers import email_provider
+from app.utils.email_templates import (
+    EmailTemplate, optional_paragraph,
+    QUOTA_INCREASE_SUBJECT, QUOTA_INCREASE_HTML, ABSENCE_NOTICE_SUBJECT, ABSENCE_NOTICE_HTML
+)
+from app.tasks.email_worker import enqueue_emails, email_worker
+import uuid
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
@@ -29,88 +28,71 @@ class AbsenceNoticeRequest(BaseModel):
     reason: str
     message: str = ""
 
-@router.post("/quota-increase")
-def send_quota_increase(request: QuotaIncreaseRequest, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    if not os.getenv("RESEND_API_KEY"):
+def _alumnos_destino(db: Session, coach: CoachIdentity, alumno_ids: List[int]) -> List[Alumno]:
+    if not email_provider.configured:
         raise HTTPException(status_code=400, detail="Email service not configured")
-    
-    try:
-        alumnos = db.query(Alumno).filter(
-            Alumno.id.in_(request.alumno_ids),
-            Alumno.coach_id == coach.id
-        ).all()
-        
-        if not alumnos:
-            raise HTTPException(status_code=404, detail="No alumnos found")
-        
-        sent_count = 0
-        for alumno in alumnos:
-            try:
-                html_content = f"""
-                <h2>Actualización de Cuota - {coach.nombre}</h2>
-                <p>Hola {alumno.nombre},</p>
-                <p>Te informamos que a partir del próximo mes, la cuota será de <strong>${request.new_amount}</strong>.</p>
-                {f'<p>{request.message}</p>' if request.message else ''}
-                <p>Gracias por tu comprensión.</p>
-                <p>Saludos,<br>{coach.nombre}</p>
-                """
-                
-                resend.Emails.send({
-                    "from": os.getenv("FROM_EMAIL", "noreply@fittracker.com"),
-                    "to": alumno.email,
-                    "subject": f"Actualización de Cuota - {coach.nombre}",
-                    "html": html_content
-                })
-                sent_count += 1
-            except Exception as e:
-                print(f"Error sending email to {alumno.email}: {e}")
-                continue
-        
-        return {"message": f"Emails enviados exitosamente a {sent_count} alumnos"}
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending emails: {str(e)}")
+    alumnos = db.query(Alumno).filter(
+        Alumno.id.in_(alumno_ids),
+        Alumno.coach_id == coach.id,
+        Alumno.email.is_not(None)
+    ).all()
+    if not alumnos:
+        raise HTTPException(status_code=404, detail="No alumnos found")
+    return alumnos
 
-@router.post("/absence-notice")
-def send_absence_notice(request: AbsenceNoticeRequest, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    if not os.getenv("RESEND_API_KEY"):
-        raise HTTPException(status_code=400, detail="Email service not configured")
-    
+def _encolar(db: Session, coach: CoachIdentity, tipo: str, alumnos: List[Alumno], asunto: str, template: EmailTemplate, request_key: Optional[str]) -> dict:
+    """Encolar un email por alumno y despertar al worker; no espera al envío.
+
+    template ya viene con los campos comunes resueltos: por alumno sólo se
+    sustituye el nombre.
+
+    Con el header Idempotency-Key, reintentar el mismo request no vuelve a
+    encolar; sin él cada request es un envío nuevo.
+    """
+    request_key = request_key or uuid.uuid4().hex
+    messages = [
+        {
+            "destinatario": alumno.email,
+            "asunto": asunto,
+            "html": template.render(alumno=alumno.nombre),
+            "idempotency_key": f"{tipo}:{coach.id}:{alumno.id}:{request_key}"[:128]
+        }
+        for alumno in alumnos
+    ]
     try:
-        alumnos = db.query(Alumno).filter(
-            Alumno.id.in_(request.alumno_ids),
-            Alumno.coach_id == coach.id
-        ).all()
-        
-        if not alumnos:
-            raise HTTPException(status_code=404, detail="No alumnos found")
-        
-        sent_count = 0
-        for alumno in alumnos:
-            try:
-                html_content = f"""
-                <h2>Aviso de Ausencia - {coach.nombre}</h2>
-                <p>Hola {alumno.nombre},</p>
-                <p>Te informamos que estaré ausente desde el <strong>{request.start_date}</strong> hasta el <strong>{request.end_date}</strong>.</p>
-                <p><strong>Motivo:</strong> {request.reason}</p>
-                {f'<p>{request.message}</p>' if request.message else ''}
-                <p>Durante este período no habrá entrenamientos. Nos pondremos en contacto para reprogramar.</p>
-                <p>Gracias por tu comprensión.</p>
-                <p>Saludos,<br>{coach.nombre}</p>
-                """
-                
-                resend.Emails.send({
-                    "from": os.getenv("FROM_EMAIL", "noreply@fittracker.com"),
-                    "to": alumno.email,
-                    "subject": f"Aviso de Ausencia - {coach.nombre}",
-                    "html": html_content
-                })
-                sent_count += 1
-            except Exception as e:
-                print(f"Error sending email to {alumno.email}: {e}")
-                continue
-        
-        return {"message": f"Emails enviados exitosamente a {sent_count} alumnos"}
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending emails: {str(e)}")
\ No newline at end of file
+        encolados = enqueue_emails(db, coach.id, tipo, messages)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queuing emails: {str(e)}")
+    email_worker.notify()
+    return {"message": f"Emails encolados para {len(alumnos)} alumnos", "encolados": encolados}
+
+@router.post("/quota-increase", status_code=202)
+def send_quota_increase(
+    request: QuotaIncreaseRequest,
+    coach: CoachIdentity = Depends(get_current_coach),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
+):
+    alumnos = _alumnos_destino(db, coach, request.alumno_ids)
+    template = QUOTA_INCREASE_HTML.bind(coach=coach.nombre, monto=request.new_amount, mensaje=optional_paragraph(request.message))
+    asunto = QUOTA_INCREASE_SUBJECT.render(coach=coach.nombre)
+    return _encolar(db, coach, "quota_increase", alumnos, asunto, template, idempotency_key)
+
+@router.post("/absence-notice", status_code=202)
+def send_absence_notice(
+    request: AbsenceNoticeRequest,
+    coach: CoachIdentity = Depends(get_current_coach),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
+):
+    alumnos = _alumnos_destino(db, coach, request.alumno_ids)
+    template = ABSENCE_NOTICE_HTML.bind(
+        coach=coach.nombre,
+        desde=request.start_date,
+        hasta=request.end_date,
+        motivo=request.reason,
+        mensaje=optional_paragraph(request.message)
+    )
+    asunto = ABSENCE_NOTICE_SUBJECT.render(coach=coach.nombre)
+    return _encolar(db, coach, "absence_notice", alumnos, asunto, template, idempotency_key)
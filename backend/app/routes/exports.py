@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from pydantic import BaseModel
+from typing import List, Literal
+from datetime import datetime
+from app.database import get_db
+from app.models.models import Alumno, Rutina, Dieta, ExportJob
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.schemas.responses import ExportJobOut
+from app.utils.loaders import rutina_loader_options, dieta_loader_options
+from app.utils.document_snapshots import snapshot_rutina, snapshot_dieta
+from app.utils.bulk_export import stream_zip
+from app.tasks.export_worker import (
+    export_worker, MEDIA_TYPES, ESTADO_PENDIENTE, ESTADO_PROCESANDO, ESTADO_COMPLETADO
+)
+import os
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+class ExportCreate(BaseModel):
+    tipo: Literal["rutina", "dieta"]
+    objeto_id: int
+    formato: Literal["pdf", "excel"]
+
+def _owns_target(db: Session, coach_id: int, tipo: str, objeto_id: int) -> bool:
+    model = Rutina if tipo == "rutina" else Dieta
+    return db.query(model.id).outerjoin(Alumno).filter(
+        model.id == objeto_id,
+        (Alumno.coach_id == coach_id) | (model.alumno_id.is_(None)),
+        model.eliminado == False
+    ).first() is not None
+
+def _get_job(db: Session, coach_id: int, job_id: int) -> ExportJob:
+    job = db.query(ExportJob).filter(
+        ExportJob.id == job_id,
+        ExportJob.coach_id == coach_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@router.post("/", response_model=ExportJobOut, status_code=202)
+def create_export(export_data: ExportCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    if not _owns_target(db, coach.id, export_data.tipo, export_data.objeto_id):
+        raise HTTPException(status_code=404, detail=f"{export_data.tipo.capitalize()} not found")
+
+    # Reutilizar un job equivalente que todavía no terminó (doble click, reintentos del cliente)
+    existing = db.query(ExportJob).filter(
+        ExportJob.coach_id == coach.id,
+        ExportJob.tipo == export_data.tipo,
+        ExportJob.objeto_id == export_data.objeto_id,
+        ExportJob.formato == export_data.formato,
+        ExportJob.estado.in_([ESTADO_PENDIENTE, ESTADO_PROCESANDO])
+    ).first()
+    if existing:
+        return existing
+
+    job = ExportJob(
+        coach_id=coach.id,
+        tipo=export_data.tipo,
+        objeto_id=export_data.objeto_id,
+        formato=export_data.formato,
+        estado=ESTADO_PENDIENTE,
+        intentos=0
+    )
+
+    try:
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error creating export job")
+
+    export_worker.notify()
+    return job
+
+@router.get("/", response_model=List[ExportJobOut])
+def get_exports(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    return db.query(ExportJob).filter(
+        ExportJob.coach_id == coach.id
+    ).order_by(ExportJob.id.desc()).limit(50).all()
+
+@router.get("/bulk")
+def bulk_export(
+    formato: Literal["pdf", "excel"] = "pdf",
+    incluir: Literal["todo", "rutinas", "dietas"] = "todo",
+    coach: CoachIdentity = Depends(get_current_coach),
+    db: Session = Depends(get_db)
+):
+    """ZIP con todas las rutinas y dietas activas del coach, transmitido a medida que se renderiza"""
+    documents = []
+
+    # Dos consultas principales + los selectin de hijos, sin importar cuántos alumnos haya
+    if incluir in ("todo", "rutinas"):
+        rutinas = db.query(Rutina).options(*rutina_loader_options()).join(Alumno).filter(
+            Alumno.coach_id == coach.id,
+            Rutina.activa == True,
+            Rutina.eliminado == False
+        ).order_by(Alumno.nombre, Rutina.id).all()
+        documents.extend(("rutina", snapshot_rutina(r)) for r in rutinas)
+
+    if incluir in ("todo", "dietas"):
+        dietas = db.query(Dieta).options(*dieta_loader_options()).join(Alumno).filter(
+            Alumno.coach_id == coach.id,
+            Dieta.activa == True,
+            Dieta.eliminado == False
+        ).order_by(Alumno.nombre, Dieta.id).all()
+        documents.extend(("dieta", snapshot_dieta(d)) for d in dietas)
+
+    if not documents:
+        raise HTTPException(status_code=404, detail="No active plans to export")
+
+    filename = f"planes_{formato}_{datetime.now().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        stream_zip(documents, formato),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/{job_id}", response_model=ExportJobOut)
+def get_export(job_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    return _get_job(db, coach.id, job_id)
+
+@router.get("/{job_id}/download")
+def download_export(job_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    job = _get_job(db, coach.id, job_id)
+
+    if job.estado != ESTADO_COMPLETADO:
+        raise HTTPException(status_code=409, detail=f"Export job is {job.estado}")
+    if not job.archivo or not os.path.exists(job.archivo):
+        raise HTTPException(status_code=404, detail="Export file not found")
+
+    return FileResponse(job.archivo, media_type=MEDIA_TYPES[job.formato], filename=job.nombre_archivo)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.database import get_db
-from app.models.models import Coach, Alumno, Lesion
-from app.middleware.auth import get_current_coach
+from app.models.models import Alumno, Lesion
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.schemas.responses import LesionOut
 
 router = APIRouter(prefix="/lesiones", tags=["lesiones"])
 
@@ -24,8 +25,8 @@ class LesionUpdate(BaseModel):
     fecha_fin: Optional[datetime] = None
     activa: Optional[bool] = None
 
-@router.get("/alumno/{alumno_id}")
-def get_lesiones_by_alumno(alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.get("/alumno/{alumno_id}", response_model=List[LesionOut])
+def get_lesiones_by_alumno(alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -33,8 +34,8 @@ def get_lesiones_by_alumno(alumno_id: int, coach: Coach = Depends(get_current_co
     lesiones = db.query(Lesion).filter(Lesion.alumno_id == alumno_id).all()
     return lesiones
 
-@router.post("/alumno/{alumno_id}")
-def create_lesion(alumno_id: int, lesion_data: LesionCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/alumno/{alumno_id}", response_model=LesionOut)
+def create_lesion(alumno_id: int, lesion_data: LesionCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     alumno = db.query(Alumno).filter(Alumno.id == alumno_id, Alumno.coach_id == coach.id).first()
     if not alumno:
         raise HTTPException(status_code=404, detail="Alumno not found")
@@ -53,8 +54,8 @@ def create_lesion(alumno_id: int, lesion_data: LesionCreate, coach: Coach = Depe
     db.refresh(lesion)
     return lesion
 
-@router.patch("/{lesion_id}")
-def update_lesion(lesion_id: int, lesion_data: LesionUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/{lesion_id}", response_model=LesionOut)
+def update_lesion(lesion_id: int, lesion_data: LesionUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     lesion = db.query(Lesion).join(Alumno).filter(
         Lesion.id == lesion_id,
         Alumno.coach_id == coach.id
@@ -71,7 +72,7 @@ def update_lesion(lesion_id: int, lesion_data: LesionUpdate, coach: Coach = Depe
     return lesion
 
 @router.delete("/{lesion_id}")
-def delete_lesion(lesion_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_lesion(lesion_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     lesion = db.query(Lesion).join(Alumno).filter(
         Lesion.id == lesion_id,
         Alumno.coach_id == coach.id
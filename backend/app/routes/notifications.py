@@ -1,61 +1,233 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, update, delete, or_, and_
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime, timedelta
-from app.database import get_db
-from app.models.models import Coach, Alumno, Notification, Rutina, Dieta
-from app.middleware.auth import get_current_coach
+from datetime import datetime
+from app.database import get_db, get_async_db, SessionLocal
+from app.models.models import Notification
+from app.middleware.auth import get_current_coach, get_current_coach_from_ticket, CoachIdentity
+from app.schemas.responses import NotificationPageOut
+from app.utils.notification_counters import adjust_unread_count, get_unread_count as read_unread_count
+from app.utils.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.event_broker import event_broker
+from app.utils.notification_events import publish_unread_count, publish_notifications, notification_events, UNREAD_COUNT_EVENT
+from app.utils.stream_tickets import issue_stream_ticket, STREAM_TICKET_TTL_SECONDS
+import asyncio
+import json
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Comentario keep-alive para proxies que cortan conexiones inactivas
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+# Se cierra la conexión periódicamente: el cliente reconecta con un ticket
+# nuevo (se revalida la sesión) y se reparten las conexiones entre workers
+SSE_MAX_CONNECTION_SECONDS = float(os.getenv("SSE_MAX_CONNECTION_SECONDS", 300))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", 3000))
+# Tope de ids explícitos en las operaciones masivas
+MAX_BULK_IDS = int(os.getenv("NOTIFICATIONS_MAX_BULK_IDS", 1000))
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.get("/")
-def get_notifications(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    notifications = db.query(Notification).options(
+@router.get("/", response_model=NotificationPageOut)
+async def get_notifications(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    coach: CoachIdentity = Depends(get_current_coach),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Feed paginado por keyset sobre (creada_en, id) descendentes; usa ix_notifications_coach_creada"""
+    query = select(Notification).options(
         joinedload(Notification.alumno)
-    ).filter(
+    ).where(
         Notification.coach_id == coach.id
-    ).order_by(Notification.creada_en.desc()).all()
-    return notifications
+    )
+    
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            cursor_creada = datetime.fromisoformat(position["creada_en"])
+            cursor_id = int(position["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            Notification.creada_en < cursor_creada,
+            and_(Notification.creada_en == cursor_creada, Notification.id < cursor_id)
+        ))
+    
+    # Pedimos una fila extra para saber si hay otra página
+    result = await db.execute(
+        query.order_by(Notification.creada_en.desc(), Notification.id.desc()).limit(limit + 1)
+    )
+    notifications = result.scalars().all()
+    
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        next_cursor = encode_cursor({"creada_en": last.creada_en.isoformat(), "id": last.id})
+    
+    return {"items": notifications, "next_cursor": next_cursor}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _initial_unread_count(coach_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return read_unread_count(db, coach_id)
+    finally:
+        db.close()
+
+@router.post("/stream-ticket")
+def create_stream_ticket(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    """Ticket de un solo uso para abrir el stream; se pide uno por conexión"""
+    return {"ticket": issue_stream_ticket(db, coach.id), "expires_in": STREAM_TICKET_TTL_SECONDS}
+
+@router.get("/stream")
+async def stream_notifications(request: Request, coach: CoachIdentity = Depends(get_current_coach_from_ticket)):
+    """Canal SSE: contador de no leídas y notificaciones nuevas, sin polling.
+
+    EventSource no permite headers: se abre con ?ticket= (POST /stream-ticket),
+    así el JWT no queda en la URL ni en los logs. Al reconectar hace falta un
+    ticket nuevo.
+    """
+    async def events():
+        # Suscribirse antes de leer el contador para no perder cambios en el medio
+        subscription = event_broker.subscribe(coach.id)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            count = await run_in_threadpool(_initial_unread_count, coach.id)
+            yield _sse(UNREAD_COUNT_EVENT, {"count": count})
+            
+            deadline = time.monotonic() + SSE_MAX_CONNECTION_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.get(), min(SSE_HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _sse(event["event"], event["data"])
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # nginx: no bufferear el stream
+    })
+
+class NotificationBulkFilter(BaseModel):
+    """Selección para las operaciones masivas; hay que indicar al menos un criterio"""
+    ids: Optional[List[int]] = None
+    older_than: Optional[datetime] = None
+    leida: Optional[bool] = None
+    all: bool = False
+
+def _bulk_conditions(coach_id: int, selection: NotificationBulkFilter) -> list:
+    if not selection.all and selection.ids is None and selection.older_than is None and selection.leida is None:
+        raise HTTPException(status_code=400, detail="Specify ids, older_than, leida or all")
+    if selection.ids is not None and len(selection.ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request")
+    
+    conditions = [Notification.coach_id == coach_id]
+    if selection.ids is not None:
+        conditions.append(Notification.id.in_(selection.ids))
+    if selection.older_than is not None:
+        conditions.append(Notification.creada_en < selection.older_than)
+    if selection.leida is not None:
+        conditions.append(Notification.leida == selection.leida)
+    return conditions
+
+@router.post("/mark-read")
+def mark_many_as_read(selection: NotificationBulkFilter, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    """Un solo UPDATE; el rowcount es exactamente lo que se descuenta del contador"""
+    conditions = _bulk_conditions(coach.id, selection)
+    updated = db.execute(
+        update(Notification).where(*conditions, Notification.leida == False).values(leida=True),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    adjust_unread_count(db, coach.id, -updated)
+    db.commit()
+    if updated:
+        publish_unread_count(db, coach.id)
+    return {"message": "Notifications marked as read", "actualizadas": updated}
+
+@router.post("/bulk-delete")
+def delete_many(selection: NotificationBulkFilter, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    """Dos DELETE en la misma transacción: primero las no leídas (para el
+    contador) y después el resto de la selección"""
+    conditions = _bulk_conditions(coach.id, selection)
+    unread = 0
+    if selection.leida is not True:
+        unread = db.execute(
+            delete(Notification).where(*conditions, Notification.leida == False),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+    deleted = unread
+    if selection.leida is not False:
+        deleted += db.execute(
+            delete(Notification).where(*conditions),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+    adjust_unread_count(db, coach.id, -unread)
+    db.commit()
+    if unread:
+        publish_unread_count(db, coach.id)
+    return {"message": "Notifications deleted", "eliminadas": deleted}
 
 @router.patch("/{notification_id}/read")
-def mark_as_read(notification_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    notification = db.query(Notification).filter(
+def mark_as_read(notification_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    # UPDATE condicional: sólo descuenta del contador quien realmente la pasó a leída
+    result = db.execute(
+        update(Notification).where(
+            Notification.id == notification_id,
+            Notification.coach_id == coach.id,
+            Notification.leida == False
+        ).values(leida=True)
+    )
+    if result.rowcount:
+        adjust_unread_count(db, coach.id, -1)
+    elif not db.query(Notification.id).filter(
         Notification.id == notification_id,
         Notification.coach_id == coach.id
-    ).first()
-    
-    if not notification:
+    ).first():
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    notification.leida = True
     db.commit()
+    if result.rowcount:
+        publish_unread_count(db, coach.id)
     return {"message": "Notification marked as read"}
 
 @router.delete("/{notification_id}")
-def delete_notification(notification_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.coach_id == coach.id
-    ).first()
-    
-    if not notification:
+def delete_notification(notification_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    condition = (Notification.id == notification_id, Notification.coach_id == coach.id)
+    # Primero como no leída: así el descuento no depende de un SELECT previo
+    unread = db.execute(delete(Notification).where(*condition, Notification.leida == False)).rowcount
+    if unread:
+        adjust_unread_count(db, coach.id, -1)
+    elif not db.execute(delete(Notification).where(*condition)).rowcount:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    db.delete(notification)
     db.commit()
+    if unread:
+        publish_unread_count(db, coach.id)
     return {"message": "Notification deleted"}
 
 @router.get("/unread-count")
-def get_unread_count(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    count = db.query(Notification).filter(
-        Notification.coach_id == coach.id,
-        Notification.leida == False
-    ).count()
-    return {"count": count}
+def get_unread_count(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    return {"count": read_unread_count(db, coach.id)}
 
 @router.post("/generate-test")
-def generate_test_notifications(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def generate_test_notifications(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Crear notificaciones de prueba
     test_notifications = [
         Notification(
@@ -81,5 +253,10 @@ def generate_test_notifications(coach: Coach = Depends(get_current_coach), db: S
     for notification in test_notifications:
         db.add(notification)
     
+    adjust_unread_count(db, coach.id, len(test_notifications))
+    db.flush()
+    events = notification_events(test_notifications)
     db.commit()
+    publish_notifications(coach.id, events)
+    publish_unread_count(db, coach.id)
     return {"message": "Test notifications created"}
\ No newline at end of file
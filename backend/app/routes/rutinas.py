@@ -1,28 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select, or_, and_
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
-from app.models.models import Coach, Alumno, Rutina, Ejercicio, PesoAlumno, RutinaPlantilla, EjercicioPlantilla
-from app.middleware.auth import get_current_coach
+from app.database import get_db, get_async_db
+from app.models.models import Alumno, Rutina, Ejercicio, PesoAlumno, RutinaPlantilla
+from app.middleware.auth import get_current_coach, CoachIdentity
+from app.schemas.requests import BulkAssignRequest
+from app.schemas.responses import BulkAssignOut, EjercicioOut, PesoOut, RutinaDetailOut, RutinaOut, RutinaPageOut, RutinaPlantillaDetailOut, RutinaPlantillaOut
+from app.utils.dashboard_counters import adjust_dashboard_counters, refresh_dashboard_counters
 from app.utils.pdf_generator import generate_rutina_pdf
-from app.utils.excel_generator import generate_rutina_excel
+from app.utils.excel_generator import write_rutina_excel, iter_rutina_excel
+from app.utils.loaders import rutina_loader_options, rutina_plantilla_loader_options
+from app.utils.document_cache import document_cache, invalidate_rutina_documents
+from app.utils.document_snapshots import snapshot_rutina
+from app.utils.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.cloning import copy_ejercicios, copy_ejercicios_to_plantilla, copy_ejercicios_from_plantilla, bulk_assign_ids, assign_plantilla
 
 router = APIRouter(prefix="/rutinas", tags=["rutinas"])
 
-@router.get("/")
-def get_all_rutinas(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
-    rutinas = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base),
-        joinedload(Rutina.alumno)
-    ).outerjoin(Alumno).filter(
+@router.get("/", response_model=RutinaPageOut)
+async def get_all_rutinas(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    alumno_id: Optional[int] = None,
+    activa: Optional[bool] = None,
+    standalone: Optional[bool] = None,
+    coach: CoachIdentity = Depends(get_current_coach),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Listado paginado por keyset sobre (activa, id), ambos descendentes"""
+    query = select(Rutina).options(
+        *rutina_loader_options()
+    ).outerjoin(Alumno, Rutina.alumno_id == Alumno.id).where(
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
         Rutina.eliminado == False
-    ).order_by(Rutina.activa.desc(), Rutina.id.desc()).all()
-    return rutinas
+    )
+    
+    if alumno_id is not None:
+        query = query.where(Rutina.alumno_id == alumno_id)
+    if activa is not None:
+        query = query.where(Rutina.activa == activa)
+    if standalone is not None:
+        query = query.where(Rutina.alumno_id.is_(None) if standalone else Rutina.alumno_id.is_not(None))
+    
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            cursor_activa = bool(position["activa"])
+            cursor_id = int(position["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # (activa, id) < cursor en orden descendente; activa es booleano NOT NULL,
+        # así que "activa menor" sólo existe cuando el cursor está en las activas
+        if cursor_activa:
+            query = query.where(or_(
+                Rutina.activa == False,
+                and_(Rutina.activa == True, Rutina.id < cursor_id)
+            ))
+        else:
+            query = query.where(Rutina.activa == False, Rutina.id < cursor_id)
+    
+    # Pedimos una fila extra para saber si hay otra página
+    result = await db.execute(
+        query.order_by(Rutina.activa.desc(), Rutina.id.desc()).limit(limit + 1)
+    )
+    rutinas = result.scalars().all()
+    
+    next_cursor = None
+    if len(rutinas) > limit:
+        rutinas = rutinas[:limit]
+        last = rutinas[-1]
+        next_cursor = encode_cursor({"activa": int(bool(last.activa)), "id": last.id})
+    
+    return {"items": rutinas, "next_cursor": next_cursor}
 
 class RutinaCreate(BaseModel):
     nombre: str
@@ -60,8 +115,8 @@ class PesoUpdate(BaseModel):
     peso: float
     fecha: Optional[datetime] = None
 
-@router.post("/create/{alumno_id}")
-def create_rutina(alumno_id: str, rutina_data: RutinaCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/create/{alumno_id}", response_model=RutinaOut)
+def create_rutina(alumno_id: str, rutina_data: RutinaCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Handle standalone routines (alumno_id can be 'none')
     if alumno_id != 'none':
         alumno_id = int(alumno_id)
@@ -72,6 +127,7 @@ def create_rutina(alumno_id: str, rutina_data: RutinaCreate, coach: Coach = Depe
         alumno_id = None
     
     # Marcar rutina anterior como eliminada si existe (only for assigned routines)
+    rutina_anterior = None
     if alumno_id:
         rutina_anterior = db.query(Rutina).filter(
             Rutina.alumno_id == alumno_id,
@@ -92,27 +148,24 @@ def create_rutina(alumno_id: str, rutina_data: RutinaCreate, coach: Coach = Depe
     )
     
     db.add(new_rutina)
+    if alumno_id and not rutina_anterior:
+        adjust_dashboard_counters(db, coach.id, rutinas=1)
     db.commit()
     db.refresh(new_rutina)
     
     return new_rutina
 
-@router.get("/plantillas")
-def get_plantillas(coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+@router.get("/plantillas", response_model=List[RutinaPlantillaDetailOut])
+def get_plantillas(coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     plantillas = db.query(RutinaPlantilla).options(
-        joinedload(RutinaPlantilla.ejercicios).joinedload(EjercicioPlantilla.ejercicio_base)
+        *rutina_plantilla_loader_options()
     ).filter(RutinaPlantilla.coach_id == coach.id).all()
     return plantillas
 
-@router.get("/{rutina_id}")
-def get_rutina(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+@router.get("/{rutina_id}", response_model=RutinaDetailOut)
+def get_rutina(rutina_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     rutina = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base),
-        joinedload(Rutina.alumno)
+        *rutina_loader_options()
     ).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
@@ -124,8 +177,8 @@ def get_rutina(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Se
     
     return rutina
 
-@router.patch("/{rutina_id}")
-def update_rutina(rutina_id: int, rutina_data: RutinaUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/{rutina_id}", response_model=RutinaOut)
+def update_rutina(rutina_id: int, rutina_data: RutinaUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     rutina = db.query(Rutina).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
@@ -146,12 +199,15 @@ def update_rutina(rutina_id: int, rutina_data: RutinaUpdate, coach: Coach = Depe
     for field, value in rutina_data.dict(exclude_unset=True).items():
         setattr(rutina, field, value)
     
+    if rutina_data.activa is not None:
+        refresh_dashboard_counters(db, coach.id)
     db.commit()
     db.refresh(rutina)
+    invalidate_rutina_documents(rutina_id)
     return rutina
 
 @router.delete("/{rutina_id}")
-def delete_rutina(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_rutina(rutina_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     rutina = db.query(Rutina).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
@@ -161,13 +217,17 @@ def delete_rutina(rutina_id: int, coach: Coach = Depends(get_current_coach), db:
     if not rutina:
         raise HTTPException(status_code=404, detail="Rutina not found")
     
+    estaba_activa = rutina.activa and rutina.alumno_id is not None
     rutina.eliminado = True
     rutina.activa = False
+    if estaba_activa:
+        adjust_dashboard_counters(db, coach.id, rutinas=-1)
     db.commit()
+    invalidate_rutina_documents(rutina_id)
     return {"message": "Rutina deleted successfully"}
 
-@router.post("/{rutina_id}/ejercicios")
-def add_ejercicio(rutina_id: int, ejercicio_data: EjercicioCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/{rutina_id}/ejercicios", response_model=EjercicioOut)
+def add_ejercicio(rutina_id: int, ejercicio_data: EjercicioCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Handle both assigned and standalone routines
     rutina = db.query(Rutina).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
@@ -193,14 +253,15 @@ def add_ejercicio(rutina_id: int, ejercicio_data: EjercicioCreate, coach: Coach
         db.add(new_ejercicio)
         db.commit()
         db.refresh(new_ejercicio)
+        invalidate_rutina_documents(rutina_id)
         
         return new_ejercicio
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error adding ejercicio")
 
-@router.patch("/ejercicios/{ejercicio_id}")
-def update_ejercicio(ejercicio_id: int, ejercicio_data: EjercicioUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/ejercicios/{ejercicio_id}", response_model=EjercicioOut)
+def update_ejercicio(ejercicio_id: int, ejercicio_data: EjercicioUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     ejercicio = db.query(Ejercicio).join(Rutina).join(Alumno).filter(
         Ejercicio.id == ejercicio_id,
         Alumno.coach_id == coach.id
@@ -214,10 +275,11 @@ def update_ejercicio(ejercicio_id: int, ejercicio_data: EjercicioUpdate, coach:
     
     db.commit()
     db.refresh(ejercicio)
+    invalidate_rutina_documents(ejercicio.rutina_id)
     return ejercicio
 
 @router.delete("/ejercicios/{ejercicio_id}")
-def delete_ejercicio(ejercicio_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_ejercicio(ejercicio_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     ejercicio = db.query(Ejercicio).join(Rutina).join(Alumno).filter(
         Ejercicio.id == ejercicio_id,
         Alumno.coach_id == coach.id
@@ -226,12 +288,14 @@ def delete_ejercicio(ejercicio_id: int, coach: Coach = Depends(get_current_coach
     if not ejercicio:
         raise HTTPException(status_code=404, detail="Ejercicio not found")
     
+    rutina_id = ejercicio.rutina_id
     db.delete(ejercicio)
     db.commit()
+    invalidate_rutina_documents(rutina_id)
     return {"message": "Ejercicio deleted successfully"}
 
-@router.patch("/pesos/{peso_id}")
-def update_peso(peso_id: int, peso_data: PesoUpdate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.patch("/pesos/{peso_id}", response_model=PesoOut)
+def update_peso(peso_id: int, peso_data: PesoUpdate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     peso = db.query(PesoAlumno).join(Alumno).filter(
         PesoAlumno.id == peso_id,
         Alumno.coach_id == coach.id
@@ -249,7 +313,7 @@ def update_peso(peso_id: int, peso_data: PesoUpdate, coach: Coach = Depends(get_
     return peso
 
 @router.delete("/pesos/{peso_id}")
-def delete_peso(peso_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def delete_peso(peso_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     peso = db.query(PesoAlumno).join(Alumno).filter(
         PesoAlumno.id == peso_id,
         Alumno.coach_id == coach.id
@@ -263,12 +327,9 @@ def delete_peso(peso_id: int, coach: Coach = Depends(get_current_coach), db: Ses
     return {"message": "Peso deleted successfully"}
 
 @router.get("/{rutina_id}/pdf")
-def download_rutina_pdf(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+def download_rutina_pdf(rutina_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     rutina = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base),
-        joinedload(Rutina.alumno)
+        *rutina_loader_options()
     ).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
@@ -279,23 +340,20 @@ def download_rutina_pdf(rutina_id: int, coach: Coach = Depends(get_current_coach
         raise HTTPException(status_code=404, detail="Rutina not found")
     
     try:
-        pdf_content = generate_rutina_pdf(rutina)
-        
-        return Response(
-            content=pdf_content,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=rutina_{rutina.nombre}.pdf"}
+        # Documento cacheado por contenido: si la rutina no cambió no se vuelve a renderizar
+        path = document_cache.get_or_render("rutina", rutina.id, "pdf", snapshot_rutina(rutina), generate_rutina_pdf)
+        # path es un link propio (ver DocumentCache.checkout): se borra al terminar de enviarlo
+        return FileResponse(
+            path, media_type="application/pdf", filename=f"rutina_{rutina.nombre}.pdf",
+            background=BackgroundTask(document_cache.discard, path)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
 
 @router.get("/{rutina_id}/excel")
-def download_rutina_excel(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+def download_rutina_excel(rutina_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     rutina = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base),
-        joinedload(Rutina.alumno)
+        *rutina_loader_options()
     ).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
@@ -306,24 +364,27 @@ def download_rutina_excel(rutina_id: int, coach: Coach = Depends(get_current_coa
         raise HTTPException(status_code=404, detail="Rutina not found")
     
     try:
-        excel_content = generate_rutina_excel(rutina)
-        
-        return Response(
-            content=excel_content,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=rutina_{rutina.nombre}.xlsx"}
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        snapshot = snapshot_rutina(rutina)
+        if not document_cache.enabled:
+            # Sin cache: el libro write_only se vuelca a un temporal y se envía por partes
+            return StreamingResponse(
+                iter_rutina_excel(snapshot),
+                media_type=media_type,
+                headers={"Content-Disposition": f"attachment; filename=rutina_{rutina.nombre}.xlsx"}
+            )
+        path = document_cache.get_or_render("rutina", rutina.id, "excel", snapshot, write=write_rutina_excel)
+        return FileResponse(
+            path, media_type=media_type, filename=f"rutina_{rutina.nombre}.xlsx",
+            background=BackgroundTask(document_cache.discard, path)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating Excel: {str(e)}")
 
-@router.post("/{rutina_id}/copy/{target_alumno_id}")
-def copy_rutina(rutina_id: int, target_alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
-    # Verificar rutina original
-    rutina_original = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base)
-    ).outerjoin(Alumno).filter(
+@router.post("/{rutina_id}/copy/{target_alumno_id}", response_model=RutinaOut)
+def copy_rutina(rutina_id: int, target_alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    # Verificar rutina original (los ejercicios se copian en la base, no se cargan)
+    rutina_original = db.query(Rutina).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
         Rutina.eliminado == False
@@ -356,27 +417,19 @@ def copy_rutina(rutina_id: int, target_alumno_id: int, coach: Coach = Depends(ge
         alumno_id=target_alumno_id,
         nombre=f"{rutina_original.nombre}",
         fecha_inicio=rutina_original.fecha_inicio,
+        fecha_vencimiento=rutina_original.fecha_vencimiento,
         notas=rutina_original.notas,
         entrenamientos_semana=rutina_original.entrenamientos_semana
     )
     
     db.add(nueva_rutina)
     db.flush()  # Get ID without committing
-    db.refresh(nueva_rutina)
     
-    # Copiar ejercicios
-    for ejercicio_original in rutina_original.ejercicios:
-        nuevo_ejercicio = Ejercicio(
-            rutina_id=nueva_rutina.id,
-            ejercicio_base_id=ejercicio_original.ejercicio_base_id,
-            series=ejercicio_original.series,
-            repeticiones=ejercicio_original.repeticiones,
-            peso=ejercicio_original.peso,
-            descanso=ejercicio_original.descanso,
-            notas=ejercicio_original.notas
-        )
-        db.add(nuevo_ejercicio)
+    # Copiar ejercicios (un INSERT ... SELECT, con su día)
+    copy_ejercicios(db, rutina_original.id, [nueva_rutina.id])
     
+    if not rutina_anterior:
+        adjust_dashboard_counters(db, coach.id, rutinas=1)
     db.commit()  # Single commit for all operations
     return nueva_rutina
 
@@ -385,9 +438,8 @@ class CopyDayRequest(BaseModel):
     target_day: int
 
 @router.post("/{rutina_id}/copy-day")
-def copy_day_exercises(rutina_id: int, copy_data: CopyDayRequest, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+def copy_day_exercises(rutina_id: int, copy_data: CopyDayRequest, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     """Copy all exercises from one day to another within the same routine"""
-    from sqlalchemy.orm import joinedload
     from sqlalchemy.exc import SQLAlchemyError
     
     # Verify routine exists and belongs to coach
@@ -408,52 +460,32 @@ def copy_day_exercises(rutina_id: int, copy_data: CopyDayRequest, coach: Coach =
         raise HTTPException(status_code=400, detail="Source and target day cannot be the same")
     
     try:
-        # Get exercises from source day
-        source_exercises = db.query(Ejercicio).options(
-            joinedload(Ejercicio.ejercicio_base)
-        ).filter(
-            Ejercicio.rutina_id == rutina_id,
-            Ejercicio.dia == copy_data.source_day
-        ).all()
-        
-        if not source_exercises:
-            raise HTTPException(status_code=404, detail=f"No exercises found for day {copy_data.source_day}")
-        
         # Delete existing exercises in target day
         db.query(Ejercicio).filter(
             Ejercicio.rutina_id == rutina_id,
             Ejercicio.dia == copy_data.target_day
-        ).delete()
+        ).delete(synchronize_session=False)
         
-        # Copy exercises to target day
-        copied_exercises = []
-        for exercise in source_exercises:
-            new_exercise = Ejercicio(
-                rutina_id=rutina_id,
-                ejercicio_base_id=exercise.ejercicio_base_id,
-                dia=copy_data.target_day,
-                series=exercise.series,
-                repeticiones=exercise.repeticiones,
-                peso=exercise.peso,
-                descanso=exercise.descanso,
-                notas=exercise.notas
-            )
-            db.add(new_exercise)
-            copied_exercises.append(new_exercise)
+        # Copy exercises to target day (INSERT ... SELECT)
+        copied = copy_ejercicios(db, rutina_id, [rutina_id], copy_data.source_day, copy_data.target_day)
+        if not copied:
+            db.rollback()
+            raise HTTPException(status_code=404, detail=f"No exercises found for day {copy_data.source_day}")
         
         db.commit()
+        invalidate_rutina_documents(rutina_id)
         
         return {
-            "message": f"Copied {len(copied_exercises)} exercises from day {copy_data.source_day} to day {copy_data.target_day}",
-            "exercises_copied": len(copied_exercises)
+            "message": f"Copied {copied} exercises from day {copy_data.source_day} to day {copy_data.target_day}",
+            "exercises_copied": copied
         }
         
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error copying exercises")
 
-@router.post("/plantillas")
-def create_plantilla(plantilla_data: RutinaCreate, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
+@router.post("/plantillas", response_model=RutinaPlantillaOut)
+def create_plantilla(plantilla_data: RutinaCreate, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     nueva_plantilla = RutinaPlantilla(
         coach_id=coach.id,
         nombre=plantilla_data.nombre,
@@ -466,13 +498,9 @@ def create_plantilla(plantilla_data: RutinaCreate, coach: Coach = Depends(get_cu
     db.refresh(nueva_plantilla)
     return nueva_plantilla
 
-@router.post("/{rutina_id}/save-as-template")
-def save_as_template(rutina_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
-    rutina = db.query(Rutina).options(
-        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base)
-    ).outerjoin(Alumno).filter(
+@router.post("/{rutina_id}/save-as-template", response_model=RutinaPlantillaOut)
+def save_as_template(rutina_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    rutina = db.query(Rutina).outerjoin(Alumno).filter(
         Rutina.id == rutina_id,
         (Alumno.coach_id == coach.id) | (Rutina.alumno_id.is_(None)),
         Rutina.eliminado == False
@@ -490,33 +518,18 @@ def save_as_template(rutina_id: int, coach: Coach = Depends(get_current_coach),
     )
     
     db.add(plantilla)
-    db.commit()
-    db.refresh(plantilla)
+    db.flush()
     
     # Copiar ejercicios
-    for ejercicio in rutina.ejercicios:
-        ejercicio_plantilla = EjercicioPlantilla(
-            rutina_plantilla_id=plantilla.id,
-            ejercicio_base_id=ejercicio.ejercicio_base_id,
-            series=ejercicio.series,
-            repeticiones=ejercicio.repeticiones,
-            peso=ejercicio.peso,
-            descanso=ejercicio.descanso,
-            notas=ejercicio.notas
-        )
-        db.add(ejercicio_plantilla)
+    copy_ejercicios_to_plantilla(db, rutina.id, plantilla.id)
     
     db.commit()
     return plantilla
 
-@router.post("/plantillas/{plantilla_id}/create-rutina/{alumno_id}")
-def create_from_template(plantilla_id: int, alumno_id: int, coach: Coach = Depends(get_current_coach), db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    
+@router.post("/plantillas/{plantilla_id}/create-rutina/{alumno_id}", response_model=RutinaOut)
+def create_from_template(plantilla_id: int, alumno_id: int, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
     # Verificar plantilla
-    plantilla = db.query(RutinaPlantilla).options(
-        joinedload(RutinaPlantilla.ejercicios).joinedload(EjercicioPlantilla.ejercicio_base)
-    ).filter(
+    plantilla = db.query(RutinaPlantilla).filter(
         RutinaPlantilla.id == plantilla_id,
         RutinaPlantilla.coach_id == coach.id
     ).first()
@@ -552,21 +565,36 @@ def create_from_template(plantilla_id: int, alumno_id: int, coach: Coach = Depen
     )
     
     db.add(nueva_rutina)
-    db.commit()
-    db.refresh(nueva_rutina)
+    db.flush()
     
     # Copiar ejercicios
-    for ejercicio_plantilla in plantilla.ejercicios:
-        nuevo_ejercicio = Ejercicio(
-            rutina_id=nueva_rutina.id,
-            ejercicio_base_id=ejercicio_plantilla.ejercicio_base_id,
-            series=ejercicio_plantilla.series,
-            repeticiones=ejercicio_plantilla.repeticiones,
-            peso=ejercicio_plantilla.peso,
-            descanso=ejercicio_plantilla.descanso,
-            notas=ejercicio_plantilla.notas
-        )
-        db.add(nuevo_ejercicio)
+    copy_ejercicios_from_plantilla(db, plantilla.id, [nueva_rutina.id])
+    
+    if not rutina_anterior:
+        adjust_dashboard_counters(db, coach.id, rutinas=1)
+    db.commit()
+    return nueva_rutina
+
+@router.post("/plantillas/{plantilla_id}/assign", response_model=BulkAssignOut)
+def assign_template(plantilla_id: int, assign_data: BulkAssignRequest, coach: CoachIdentity = Depends(get_current_coach), db: Session = Depends(get_db)):
+    """Crear una rutina desde la plantilla para cada alumno, en una sola transacción"""
+    try:
+        alumno_ids = bulk_assign_ids(assign_data.alumno_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    plantilla = db.query(RutinaPlantilla).filter(
+        RutinaPlantilla.id == plantilla_id,
+        RutinaPlantilla.coach_id == coach.id
+    ).first()
+    
+    if not plantilla:
+        raise HTTPException(status_code=404, detail="Plantilla not found")
     
+    resultado = assign_plantilla(db, Rutina, coach.id, alumno_ids, {
+        "nombre": plantilla.nombre.replace(" (Plantilla)", ""),
+        "notas": plantilla.notas,
+        "entrenamientos_semana": plantilla.entrenamientos_semana
+    }, lambda plan_ids: copy_ejercicios_from_plantilla(db, plantilla.id, plan_ids))
     db.commit()
-    return nueva_rutina
\ No newline at end of file
+    return resultado
\ No newline at end of file
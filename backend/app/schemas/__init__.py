@@ -0,0 +1 @@
+# Schemas package
\ No newline at end of file
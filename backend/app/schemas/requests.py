@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import List
+
+# Bodies compartidos por más de un router
+
+class BulkAssignRequest(BaseModel):
+    """Asignación masiva de una plantilla (rutina o dieta) a varios alumnos"""
+    alumno_ids: List[int]
@@ -0,0 +1,264 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+# Modelos de respuesta construidos desde atributos del ORM. Las variantes
+# "plana" no declaran relaciones, así serializarlas nunca dispara lazy loads;
+# las variantes con hijos sólo se usan donde esas relaciones se cargan con
+# las opciones de app/utils/loaders.py.
+
+class ORMModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+# Alumnos
+
+class AlumnoOut(ORMModel):
+    id: int
+    coach_id: Optional[int] = None
+    nombre: Optional[str] = None
+    email: Optional[str] = None
+    fecha_nacimiento: Optional[datetime] = None
+    altura: Optional[float] = None
+    objetivo: Optional[str] = None
+    fecha_cobro: Optional[datetime] = None
+    notificaciones_activas: Optional[bool] = None
+    ultima_notificacion: Optional[datetime] = None
+    creado_en: Optional[datetime] = None
+
+class PesoOut(ORMModel):
+    id: int
+    alumno_id: Optional[int] = None
+    peso: Optional[float] = None
+    fecha: Optional[datetime] = None
+
+class PersonalRecordOut(ORMModel):
+    id: int
+    alumno_id: Optional[int] = None
+    ejercicio: Optional[str] = None
+    peso: Optional[float] = None
+    repeticiones: Optional[int] = None
+    fecha: Optional[datetime] = None
+
+class LesionOut(ORMModel):
+    id: int
+    alumno_id: Optional[int] = None
+    nombre: Optional[str] = None
+    descripcion: Optional[str] = None
+    es_cronica: Optional[bool] = None
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+    activa: Optional[bool] = None
+    creada_en: Optional[datetime] = None
+
+# Rutinas
+
+class EjercicioBaseOut(ORMModel):
+    id: int
+    nombre: Optional[str] = None
+    categoria: Optional[str] = None
+    creado_en: Optional[datetime] = None
+
+class EjercicioOut(ORMModel):
+    id: int
+    rutina_id: Optional[int] = None
+    ejercicio_base_id: Optional[int] = None
+    dia: Optional[int] = None
+    series: Optional[int] = None
+    repeticiones: Optional[int] = None
+    peso: Optional[float] = None
+    descanso: Optional[int] = None
+    notas: Optional[str] = None
+
+class EjercicioDetailOut(EjercicioOut):
+    ejercicio_base: Optional[EjercicioBaseOut] = None
+
+class RutinaOut(ORMModel):
+    id: int
+    alumno_id: Optional[int] = None
+    nombre: Optional[str] = None
+    fecha_inicio: Optional[datetime] = None
+    notas: Optional[str] = None
+    entrenamientos_semana: Optional[int] = None
+    fecha_vencimiento: Optional[datetime] = None
+    activa: Optional[bool] = None
+    eliminado: Optional[bool] = None
+
+class RutinaWithEjerciciosOut(RutinaOut):
+    ejercicios: List[EjercicioDetailOut] = []
+
+class RutinaDetailOut(RutinaWithEjerciciosOut):
+    alumno: Optional[AlumnoOut] = None
+
+class RutinaPageOut(BaseModel):
+    items: List[RutinaDetailOut]
+    next_cursor: Optional[str] = None
+
+class EjercicioPlantillaOut(ORMModel):
+    id: int
+    rutina_plantilla_id: Optional[int] = None
+    ejercicio_base_id: Optional[int] = None
+    series: Optional[int] = None
+    repeticiones: Optional[int] = None
+    peso: Optional[float] = None
+    descanso: Optional[int] = None
+    notas: Optional[str] = None
+    ejercicio_base: Optional[EjercicioBaseOut] = None
+
+class RutinaPlantillaOut(ORMModel):
+    id: int
+    coach_id: Optional[int] = None
+    nombre: Optional[str] = None
+    notas: Optional[str] = None
+    entrenamientos_semana: Optional[int] = None
+    creado_en: Optional[datetime] = None
+
+class RutinaPlantillaDetailOut(RutinaPlantillaOut):
+    ejercicios: List[EjercicioPlantillaOut] = []
+
+# Asignación masiva de plantillas (rutinas y dietas)
+
+class BulkAssignResultOut(BaseModel):
+    alumno_id: int
+    estado: str  # asignada, error
+    plan_id: Optional[int] = None
+    reemplazo: bool = False  # el alumno tenía un plan activo que se dio de baja
+    detail: Optional[str] = None
+
+class BulkAssignOut(BaseModel):
+    asignadas: int
+    resultados: List[BulkAssignResultOut]
+
+# Dietas
+
+class AlimentoOut(ORMModel):
+    id: int
+    nombre: Optional[str] = None
+    calorias_100g: Optional[float] = None
+    proteinas_100g: Optional[float] = None
+    carbohidratos_100g: Optional[float] = None
+    grasas_100g: Optional[float] = None
+
+class ComidaAlimentoOut(ORMModel):
+    id: int
+    comida_id: Optional[int] = None
+    alimento_id: Optional[int] = None
+    cantidad_gramos: Optional[float] = None
+
+class ComidaAlimentoDetailOut(ComidaAlimentoOut):
+    alimento: Optional[AlimentoOut] = None
+
+class ComidaOut(ORMModel):
+    id: int
+    dieta_id: Optional[int] = None
+    nombre: Optional[str] = None
+    dia: Optional[int] = None
+    orden: Optional[int] = None
+
+class ComidaDetailOut(ComidaOut):
+    alimentos: List[ComidaAlimentoDetailOut] = []
+
+class DietaOut(ORMModel):
+    id: int
+    alumno_id: Optional[int] = None
+    nombre: Optional[str] = None
+    fecha_inicio: Optional[datetime] = None
+    fecha_vencimiento: Optional[datetime] = None
+    notas: Optional[str] = None
+    activa: Optional[bool] = None
+    eliminado: Optional[bool] = None
+
+class DietaWithComidasOut(DietaOut):
+    comidas: List[ComidaDetailOut] = []
+
+class DietaDetailOut(DietaWithComidasOut):
+    alumno: Optional[AlumnoOut] = None
+
+class ComidaPlantillaAlimentoOut(ORMModel):
+    id: int
+    comida_plantilla_id: Optional[int] = None
+    alimento_id: Optional[int] = None
+    cantidad_gramos: Optional[float] = None
+    alimento: Optional[AlimentoOut] = None
+
+class ComidaPlantillaOut(ORMModel):
+    id: int
+    dieta_plantilla_id: Optional[int] = None
+    nombre: Optional[str] = None
+    orden: Optional[int] = None
+    alimentos: List[ComidaPlantillaAlimentoOut] = []
+
+class DietaPlantillaOut(ORMModel):
+    id: int
+    coach_id: Optional[int] = None
+    nombre: Optional[str] = None
+    notas: Optional[str] = None
+    creado_en: Optional[datetime] = None
+
+class DietaPlantillaDetailOut(DietaPlantillaOut):
+    comidas: List[ComidaPlantillaOut] = []
+
+# Dashboard del alumno
+
+class AlumnoResumenOut(BaseModel):
+    id: int
+    nombre: Optional[str] = None
+    email: Optional[str] = None
+    edad: Optional[int] = None
+    altura: Optional[float] = None
+    objetivo: Optional[str] = None
+    peso_actual: Optional[float] = None
+    fecha_cobro: Optional[datetime] = None
+
+class PesoHistoricoOut(BaseModel):
+    fecha: Optional[datetime] = None
+    peso: Optional[float] = None
+
+class PersonalRecordResumenOut(BaseModel):
+    id: int
+    ejercicio: Optional[str] = None
+    peso: Optional[float] = None
+    repeticiones: Optional[int] = None
+    fecha: Optional[datetime] = None
+
+class AlumnoDashboardOut(BaseModel):
+    alumno: AlumnoResumenOut
+    historico_pesos: List[PesoHistoricoOut]
+    personal_records: List[PersonalRecordResumenOut]
+    rutinas: List[RutinaOut]
+    dietas: List[DietaOut]
+
+# Notificaciones
+
+class NotificationEventOut(ORMModel):
+    """Variante plana que viaja por el canal SSE"""
+    id: int
+    coach_id: Optional[int] = None
+    alumno_id: Optional[int] = None
+    tipo: Optional[str] = None
+    referencia_id: Optional[int] = None
+    titulo: Optional[str] = None
+    mensaje: Optional[str] = None
+    leida: Optional[bool] = None
+    creada_en: Optional[datetime] = None
+
+class NotificationOut(NotificationEventOut):
+    alumno: Optional[AlumnoOut] = None
+
+class NotificationPageOut(BaseModel):
+    items: List[NotificationOut]
+    next_cursor: Optional[str] = None
+
+# Exportaciones
+
+class ExportJobOut(ORMModel):
+    id: int
+    tipo: Optional[str] = None
+    objeto_id: Optional[int] = None
+    formato: Optional[str] = None
+    estado: Optional[str] = None
+    intentos: Optional[int] = None
+    nombre_archivo: Optional[str] = None
+    error: Optional[str] = None
+    creado_en: Optional[datetime] = None
+    iniciado_en: Optional[datetime] = None
+    finalizado_en: Optional[datetime] = None
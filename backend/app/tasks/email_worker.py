@@ -0,0 +1,343 @@
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+from typing import Optional, List
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.database import SessionLocal
+from app.models.models import EmailOutbox
+from app.utils.email_providers import email_provider, RESEND_BATCH_LIMIT
+from app.utils.rate_limit import TokenBucket
+import hashlib
+import logging
+import random
+import uuid
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Envíos concurrentes (threads) y límite del proveedor (Resend: 2 req/s por defecto)
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 4))
+# EMAIL_RATE_PER_SECOND es el límite total de la cuenta: el token bucket vive en
+# cada proceso, así que se reparte entre los workers de uvicorn (WEB_CONCURRENCY)
+EMAIL_RATE_PER_SECOND = float(os.getenv("EMAIL_RATE_PER_SECOND", 2))
+EMAIL_RATE_BURST = float(os.getenv("EMAIL_RATE_BURST", 2))
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", 1)), 1)
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", 2))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", 3600))
+# Emails por llamada al proveedor (endpoint batch, máximo 100)
+EMAIL_BATCH_SIZE = min(int(os.getenv("EMAIL_BATCH_SIZE", RESEND_BATCH_LIMIT)), RESEND_BATCH_LIMIT)
+# Un email "enviando" más viejo que esto quedó huérfano (worker caído)
+EMAIL_SEND_TIMEOUT_SECONDS = int(os.getenv("EMAIL_SEND_TIMEOUT_SECONDS", 300))
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_ENVIANDO = "enviando"
+ESTADO_ENVIADO = "enviado"
+ESTADO_ERROR = "error"
+
+rate_limiter = TokenBucket(EMAIL_RATE_PER_SECOND / WEB_CONCURRENCY, max(EMAIL_RATE_BURST / WEB_CONCURRENCY, 1))
+
+def enqueue_emails(db: Session, coach_id: Optional[int], tipo: str, messages: List[dict]) -> int:
+    """Guardar emails en el outbox y devolver cuántos se encolaron.
+
+    Cada mensaje trae destinatario, asunto, html e idempotency_key; los que
+    ya existen en el outbox (mismo key) se ignoran, así reintentar el
+    request que los encoló no duplica envíos.
+    """
+    keys = [m["idempotency_key"] for m in messages]
+    existing = {
+        key for (key,) in db.query(EmailOutbox.idempotency_key).filter(EmailOutbox.idempotency_key.in_(keys))
+    } if keys else set()
+
+    pending = []
+    for message in messages:
+        if message["idempotency_key"] in existing:
+            continue
+        existing.add(message["idempotency_key"])
+        pending.append(EmailOutbox(
+            coach_id=coach_id,
+            tipo=tipo,
+            destinatario=message["destinatario"],
+            asunto=message["asunto"],
+            html=message["html"],
+            idempotency_key=message["idempotency_key"],
+            estado=ESTADO_PENDIENTE,
+            intentos=0,
+            proximo_intento=datetime.now(timezone.utc)
+        ))
+    if not pending:
+        return 0
+
+    try:
+        db.add_all(pending)
+        db.commit()
+        return len(pending)
+    except IntegrityError:
+        # Otro request encoló alguno de los mismos keys en paralelo
+        db.rollback()
+        enqueued = 0
+        for email in pending:
+            db.add(email)
+            try:
+                db.commit()
+                enqueued += 1
+            except IntegrityError:
+                db.rollback()
+        return enqueued
+
+def retry_delay(intentos: int) -> float:
+    """Backoff exponencial con jitter: base, 2*base, 4*base... hasta el máximo"""
+    delay = min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * (2 ** max(intentos - 1, 0)))
+    return delay * random.uniform(0.5, 1.0)
+
+def _claim(db: Session, where, now: datetime) -> List[int]:
+    # Lote nuevo por claim: si dos workers leen los mismos candidatos, el
+    # WHERE estado = 'pendiente' reparte las filas y cada uno ve sólo las suyas
+    lote = uuid.uuid4().hex
+    db.execute(
+        update(EmailOutbox)
+        .where(*where, EmailOutbox.estado == ESTADO_PENDIENTE)
+        .values(estado=ESTADO_ENVIANDO, lote=lote, iniciado_en=now, intentos=EmailOutbox.intentos + 1)
+    )
+    db.commit()
+    return [
+        email_id for (email_id,) in db.query(EmailOutbox.id).filter(EmailOutbox.lote == lote).order_by(EmailOutbox.id)
+    ]
+
+def claim_email_batch(db: Session, limit: int = EMAIL_BATCH_SIZE) -> List[int]:
+    """Tomar hasta limit emails listos con un único UPDATE condicional.
+
+    Un lote que ya se intentó enviar (tiene lote y volvió a pendiente) se
+    reclama entero y sin mezclarlo con otros emails: el proveedor deduplica
+    por el key del lote, y ese key sólo se repite si el conjunto de emails es
+    el mismo. Los reintentos tienen prioridad sobre los emails nuevos.
+    """
+    now = datetime.now(timezone.utc)
+    ready = (EmailOutbox.estado == ESTADO_PENDIENTE, EmailOutbox.proximo_intento <= now)
+    retry = db.query(EmailOutbox.lote).filter(
+        *ready, EmailOutbox.lote.isnot(None)
+    ).order_by(EmailOutbox.proximo_intento, EmailOutbox.id).first()
+    if retry is not None:
+        return _claim(db, (EmailOutbox.lote == retry.lote,), now)
+
+    candidates = [
+        email_id for (email_id,) in db.query(EmailOutbox.id).filter(
+            *ready, EmailOutbox.lote.is_(None)
+        ).order_by(EmailOutbox.proximo_intento, EmailOutbox.id).limit(limit)
+    ]
+    if not candidates:
+        return []
+    return _claim(db, (EmailOutbox.id.in_(candidates),), now)
+
+def _batch_key(emails: List[EmailOutbox]) -> str:
+    # Mismo conjunto de emails => mismo key, así un lote reintentado entero no se duplica
+    digest = hashlib.sha256("|".join(e.idempotency_key for e in emails).encode("utf-8"))
+    return f"batch:{digest.hexdigest()}"
+
+def _mark_sent(email: EmailOutbox, provider_id: str):
+    email.estado = ESTADO_ENVIADO
+    email.provider_id = provider_id
+    email.error = None
+    email.enviado_en = datetime.now(timezone.utc)
+
+def _mark_failed(email: EmailOutbox, error: Exception, proximo_intento: Optional[datetime] = None):
+    retryable = getattr(error, "retryable", True) and (email.intentos or 0) < EMAIL_MAX_ATTEMPTS
+    email.error = str(error)[:1000]
+    if retryable:
+        email.estado = ESTADO_PENDIENTE
+        email.proximo_intento = proximo_intento or (
+            datetime.now(timezone.utc) + timedelta(seconds=retry_delay(email.intentos or 1))
+        )
+    else:
+        email.estado = ESTADO_ERROR
+    logger.warning(f"Email {email.id} to {email.destinatario} failed (attempt {email.intentos}): {error}")
+
+def _acquire_token(stop: Optional[Event]) -> bool:
+    # Un token por llamada HTTP (el límite del proveedor es por request, no por email)
+    while not rate_limiter.acquire(timeout=1.0):
+        if stop is not None and stop.is_set():
+            return False
+    return True
+
+def _send_one(email: EmailOutbox, stop: Optional[Event]) -> bool:
+    if not _acquire_token(stop):
+        return False
+    try:
+        _mark_sent(email, email_provider.send(email.destinatario, email.asunto, email.html, email.idempotency_key))
+    except Exception as e:
+        _mark_failed(email, e)
+    return True
+
+def _release(emails: List[EmailOutbox]):
+    # Shutdown antes de enviar: devolverlos sin consumir un intento
+    for email in emails:
+        email.estado = ESTADO_PENDIENTE
+        email.intentos = max((email.intentos or 1) - 1, 0)
+
+def deliver_batch(email_ids: List[int], stop: Optional[Event] = None):
+    """Enviar un lote reclamado: una llamada batch si hay más de un email.
+
+    Si el proveedor rechaza el lote por un error no transitorio (p. ej. una
+    dirección inválida), se reintenta email por email para aislar al culpable.
+    Ante un error transitorio el lote conserva su lote y un único
+    proximo_intento, así se reintenta entero con el mismo key.
+    """
+    db = SessionLocal()
+    try:
+        emails = db.query(EmailOutbox).filter(EmailOutbox.id.in_(email_ids)).order_by(EmailOutbox.id).all()
+        if not emails:
+            return
+        if len(emails) == 1:
+            if not _send_one(emails[0], stop):
+                _release(emails)
+            db.commit()
+            return
+
+        if not _acquire_token(stop):
+            _release(emails)
+            db.commit()
+            return
+        try:
+            provider_ids = email_provider.send_batch(
+                [
+                    {"to": e.destinatario, "subject": e.asunto, "html": e.html, "idempotency_key": e.idempotency_key}
+                    for e in emails
+                ],
+                _batch_key(emails)
+            )
+            for email, provider_id in zip(emails, provider_ids):
+                _mark_sent(email, provider_id)
+        except Exception as e:
+            if getattr(e, "retryable", True):
+                proximo_intento = datetime.now(timezone.utc) + timedelta(seconds=retry_delay(emails[0].intentos or 1))
+                for email in emails:
+                    _mark_failed(email, e, proximo_intento)
+            else:
+                logger.warning(f"Batch of {len(emails)} emails rejected, sending one by one: {e}")
+                for email in emails:
+                    # Desde acá cada email se reintenta solo, con su propio key
+                    email.lote = uuid.uuid4().hex
+                for i, email in enumerate(emails):
+                    if not _send_one(email, stop):
+                        _release(emails[i:])
+                        break
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error delivering emails {email_ids}: {e}")
+    finally:
+        db.close()
+
+def requeue_stale_emails(db: Session) -> int:
+    """Devolver al outbox los emails que quedaron en 'enviando' tras una caída.
+
+    Conservan su lote, así claim_email_batch los vuelve a tomar juntos y el
+    reenvío lleva el mismo key (de lote o de email) que el proveedor deduplica.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=EMAIL_SEND_TIMEOUT_SECONDS)
+    result = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.estado == ESTADO_ENVIANDO, EmailOutbox.iniciado_en < cutoff)
+        .values(estado=ESTADO_PENDIENTE)
+    )
+    db.commit()
+    return result.rowcount
+
+def run_pending_emails(max_emails: Optional[int] = None) -> int:
+    """Enviar los emails listos en el thread actual (scripts y tests)"""
+    processed = 0
+    while max_emails is None or processed < max_emails:
+        limit = EMAIL_BATCH_SIZE if max_emails is None else min(EMAIL_BATCH_SIZE, max_emails - processed)
+        db = SessionLocal()
+        try:
+            email_ids = claim_email_batch(db, limit)
+        finally:
+            db.close()
+        if not email_ids:
+            break
+        deliver_batch(email_ids)
+        processed += len(email_ids)
+    return processed
+
+class EmailWorker:
+    """Threads que vacían el outbox con concurrencia acotada, un lote por vez.
+
+    Igual que ExportWorker: la tabla es la cola persistente y notify()
+    despierta a los threads apenas se encola algo.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._threads = []
+        self._wake = Event()
+        self._stop = Event()
+        self._lock = Lock()
+        self.processed = 0
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        db = SessionLocal()
+        try:
+            requeued = requeue_stale_emails(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} stale emails")
+        except SQLAlchemyError as e:
+            logger.error(f"Error requeuing emails: {e}")
+        finally:
+            db.close()
+
+        for i in range(self.workers):
+            thread = Thread(target=self._run, name=f"email-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                email_ids = claim_email_batch(db)
+            except SQLAlchemyError as e:
+                logger.error(f"Error claiming emails: {e}")
+                email_ids = []
+            finally:
+                db.close()
+
+            if not email_ids:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            deliver_batch(email_ids, self._stop)
+            with self._lock:
+                self.processed += len(email_ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": sum(1 for t in self._threads if t.is_alive()),
+                "processed": self.processed,
+                "provider": email_provider.name,
+                "rate_per_second": rate_limiter.rate,
+                "batch_size": EMAIL_BATCH_SIZE
+            }
+
+email_worker = EmailWorker(EMAIL_WORKERS, EMAIL_POLL_SECONDS)
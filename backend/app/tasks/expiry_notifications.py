@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, insert, exists, literal, func, false, String, DateTime
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import Alumno, Rutina, Dieta, Notification
+from app.utils.notification_counters import adjust_unread_counts
+from app.utils.notification_events import publish_unread_count
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Sólo se notifican vencimientos recientes: un plan vencido hace meses no
+# vuelve a notificarse aunque la notificación original ya se haya purgado
+NOTIFICATION_EXPIRY_LOOKBACK_DAYS = int(os.getenv("NOTIFICATION_EXPIRY_LOOKBACK_DAYS", 7))
+
+# modelo -> (tipo, título, sustantivo para el mensaje, cierre del mensaje)
+EXPIRY_TARGETS = {
+    Rutina: ("rutina_vencida", "Rutina Vencida", "La rutina", "ha vencido y necesita ser actualizada."),
+    Dieta: ("dieta_vencida", "Dieta Vencida", "La dieta", "ha vencido y necesita ser renovada."),
+}
+
+NOTIFICATION_COLUMNS = ["coach_id", "alumno_id", "tipo", "referencia_id", "titulo", "mensaje", "leida", "creada_en"]
+
+def expired_plans_select(model, now: datetime, desde: datetime):
+    """SELECT con las filas de notificación para los planes vencidos sin notificar"""
+    tipo, titulo, sustantivo, cierre = EXPIRY_TARGETS[model]
+    ya_notificado = exists().where(
+        Notification.tipo == tipo,
+        Notification.referencia_id == model.id
+    )
+    mensaje = (
+        literal(f"{sustantivo} ", String) + func.coalesce(model.nombre, "")
+        + literal(" de ", String) + func.coalesce(Alumno.nombre, "")
+        + literal(f" {cierre}", String)
+    )
+    return select(
+        Alumno.coach_id,
+        model.alumno_id,
+        literal(tipo, String),
+        model.id,
+        literal(titulo, String),
+        mensaje,
+        false(),
+        literal(now, DateTime)
+    ).join(Alumno, Alumno.id == model.alumno_id).where(
+        model.activa == True,
+        model.eliminado == False,
+        model.fecha_vencimiento <= now,
+        model.fecha_vencimiento > desde,
+        ~ya_notificado
+    )
+
+def _normalize_now(now: Optional[datetime]) -> datetime:
+    """UTC naive y sin microsegundos: así se guarda en Column(DateTime) (DATETIME(0) en MySQL)"""
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=0)
+
+def _insert_expiry_notifications(db: Session, now: Optional[datetime] = None) -> Tuple[dict, Dict[int, int]]:
+    """Devuelve las creadas por tipo y por coach.
+
+    El conteo por coach sale de las filas que insertó cada INSERT, releídas
+    en la misma transacción (id posterior al último existente, mismo tipo y
+    creada_en = now): no cuenta planes que otra corrida notificó entre un
+    SELECT previo y el INSERT.
+    """
+    now = _normalize_now(now)
+    desde = now - timedelta(days=NOTIFICATION_EXPIRY_LOOKBACK_DAYS)
+    creadas, por_coach = {}, Counter()
+    ultimo_id = db.scalar(select(func.max(Notification.id))) or 0
+    for model, (tipo, *_) in EXPIRY_TARGETS.items():
+        db.execute(
+            insert(Notification).from_select(NOTIFICATION_COLUMNS, expired_plans_select(model, now, desde))
+        )
+        insertadas = db.execute(
+            select(Notification.coach_id, func.count()).where(
+                Notification.id > ultimo_id,
+                Notification.tipo == tipo,
+                Notification.creada_en == now
+            ).group_by(Notification.coach_id)
+        ).all()
+        for coach_id, total in insertadas:
+            por_coach[coach_id] += total
+        creadas[tipo] = sum(total for _, total in insertadas)
+    
+    adjust_unread_counts(db, dict(por_coach))
+    return creadas, dict(por_coach)
+
+def insert_expiry_notifications(db: Session, now: Optional[datetime] = None) -> dict:
+    """Un INSERT ... SELECT por tipo de plan para todos los coaches a la vez.
+
+    La deduplicación (NOT EXISTS sobre tipo + referencia_id, con índice)
+    corre dentro de la base: no se cargan planes ni notificaciones al ORM.
+    También ajusta los contadores de no leídas de cada coach afectado.
+    """
+    return _insert_expiry_notifications(db, now)[0]
+
+def generate_expiry_notifications() -> dict:
+    """Job del scheduler: notificar rutinas y dietas vencidas"""
+    db = SessionLocal()
+    try:
+        creadas, por_coach = _insert_expiry_notifications(db)
+        db.commit()
+        logger.info(f"Notificaciones de vencimiento creadas: {creadas}")
+        for coach_id in por_coach:
+            if coach_id is not None:
+                publish_unread_count(db, coach_id)
+        return creadas
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,309 @@
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+from typing import Optional
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import SessionLocal
+from app.models.models import ExportJob, Rutina, Dieta
+from app.utils.loaders import rutina_loader_options, dieta_loader_options
+from app.utils.bulk_export import get_render_pool, render_document
+from app.utils.document_cache import document_cache
+from app.utils.document_snapshots import snapshot_rutina, snapshot_dieta, snapshot_digest
+import logging
+import shutil
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORTS_DIR = os.getenv("EXPORTS_DIR", "exports")
+EXPORT_POLL_SECONDS = float(os.getenv("EXPORT_POLL_SECONDS", 2))
+EXPORT_MAX_ATTEMPTS = int(os.getenv("EXPORT_MAX_ATTEMPTS", 3))
+# Mientras renderiza, el worker refresca heartbeat_en cada EXPORT_HEARTBEAT_SECONDS;
+# un job "procesando" sin heartbeat por EXPORT_JOB_TIMEOUT_SECONDS quedó huérfano
+EXPORT_HEARTBEAT_SECONDS = float(os.getenv("EXPORT_HEARTBEAT_SECONDS", 15))
+EXPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("EXPORT_JOB_TIMEOUT_SECONDS", 60))
+# Cada cuánto un proceso busca jobs huérfanos (de cualquier proceso)
+EXPORT_REQUEUE_SECONDS = float(os.getenv("EXPORT_REQUEUE_SECONDS", 30))
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_PROCESANDO = "procesando"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+EXTENSIONS = {"pdf": "pdf", "excel": "xlsx"}
+
+class ExportTargetNotFound(Exception):
+    """La rutina/dieta fue eliminada entre el encolado y el procesamiento"""
+    pass
+
+def _load_rutina(db: Session, rutina_id: int):
+    return db.query(Rutina).options(*rutina_loader_options()).filter(
+        Rutina.id == rutina_id,
+        Rutina.eliminado == False
+    ).first()
+
+def _load_dieta(db: Session, dieta_id: int):
+    return db.query(Dieta).options(*dieta_loader_options()).filter(
+        Dieta.id == dieta_id,
+        Dieta.eliminado == False
+    ).first()
+
+# tipo -> (loader, snapshot); el render corre en el pool de procesos de bulk_export
+EXPORT_TARGETS = {
+    "rutina": (_load_rutina, snapshot_rutina),
+    "dieta": (_load_dieta, snapshot_dieta),
+}
+
+def claim_next_job(db: Session) -> Optional[int]:
+    """Tomar el job pendiente más antiguo con un UPDATE condicional.
+
+    El WHERE estado = 'pendiente' hace que sólo un worker (de este proceso
+    o de otro) gane cada job aunque varios lean el mismo candidato.
+    """
+    candidates = db.query(ExportJob.id).filter(
+        ExportJob.estado == ESTADO_PENDIENTE
+    ).order_by(ExportJob.id).limit(5).all()
+
+    for (job_id,) in candidates:
+        now = datetime.now(timezone.utc)
+        result = db.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id, ExportJob.estado == ESTADO_PENDIENTE)
+            .values(
+                estado=ESTADO_PROCESANDO,
+                iniciado_en=now,
+                heartbeat_en=now,
+                intentos=ExportJob.intentos + 1
+            )
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return job_id
+    return None
+
+def _write_export_file(job: ExportJob, source_path: str) -> str:
+    # Copia propia del job: el link del cache se libera apenas se copia
+    os.makedirs(EXPORTS_DIR, exist_ok=True)
+    path = os.path.join(EXPORTS_DIR, f"export_{job.id}.{EXTENSIONS[job.formato]}")
+    tmp_path = f"{path}.tmp"
+    shutil.copyfile(source_path, tmp_path)
+    # Reemplazo atómico: una descarga nunca ve un archivo a medio escribir
+    os.replace(tmp_path, path)
+    return path
+
+def _render_to_cache(tipo: str, formato: str, snapshot) -> str:
+    """Ruta privada al documento (ver DocumentCache.checkout).
+
+    reportlab/openpyxl son CPU puro: renderizar en un thread de la API
+    compite por el GIL con los requests, así que se usa el pool de procesos.
+    """
+    key = snapshot_digest(snapshot, formato)
+    path = document_cache.checkout(key)
+    if path:
+        return path
+    owner = (tipo, snapshot.id)
+    tmp_path = document_cache.reserve(key, owner, formato)
+    try:
+        get_render_pool().submit(render_document, tipo, formato, snapshot, tmp_path).result()
+    except BaseException:
+        document_cache.discard(tmp_path)
+        raise
+    return document_cache.adopt(key, owner, formato, tmp_path, checkout=True)
+
+def _heartbeat(job_id: int, done: Event):
+    # Mientras el job corre, otro proceso no lo considera huérfano
+    while not done.wait(EXPORT_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ExportJob)
+                .where(ExportJob.id == job_id, ExportJob.estado == ESTADO_PROCESANDO)
+                .values(heartbeat_en=datetime.now(timezone.utc))
+            )
+            db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not refresh heartbeat of export job {job_id}: {e}")
+        finally:
+            db.close()
+
+def process_job(job_id: int):
+    done = Event()
+    Thread(target=_heartbeat, args=(job_id, done), name=f"export-heartbeat-{job_id}", daemon=True).start()
+    try:
+        _process_job(job_id)
+    finally:
+        done.set()
+
+def _process_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.get(ExportJob, job_id)
+        if not job:
+            return
+        try:
+            loader, snapshot = EXPORT_TARGETS[job.tipo]
+            if job.formato not in EXTENSIONS:
+                raise KeyError(job.formato)
+            target = loader(db, job.objeto_id)
+            if not target:
+                raise ExportTargetNotFound(f"{job.tipo} {job.objeto_id} not found")
+
+            source_path = _render_to_cache(job.tipo, job.formato, snapshot(target))
+            try:
+                job.archivo = _write_export_file(job, source_path)
+            finally:
+                document_cache.discard(source_path)
+            job.nombre_archivo = f"{job.tipo}_{target.nombre}.{EXTENSIONS[job.formato]}"
+            job.estado = ESTADO_COMPLETADO
+            job.error = None
+            job.finalizado_en = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            retry = not isinstance(e, (ExportTargetNotFound, KeyError)) and (job.intentos or 0) < EXPORT_MAX_ATTEMPTS
+            job.estado = ESTADO_PENDIENTE if retry else ESTADO_ERROR
+            job.error = str(e)[:1000]
+            if not retry:
+                job.finalizado_en = datetime.now(timezone.utc)
+            db.commit()
+            logger.warning(f"Export job {job_id} failed (attempt {job.intentos}): {e}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error processing export job {job_id}: {e}")
+    finally:
+        db.close()
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Devolver a la cola los jobs 'procesando' cuyo worker dejó de dar heartbeat.
+
+    Un job que otro proceso vivo está renderizando tiene el heartbeat al día
+    y no se toca, así arrancar un worker nuevo no duplica renders.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=EXPORT_JOB_TIMEOUT_SECONDS)
+    result = db.execute(
+        update(ExportJob)
+        .where(
+            ExportJob.estado == ESTADO_PROCESANDO,
+            func.coalesce(ExportJob.heartbeat_en, ExportJob.iniciado_en) < cutoff
+        )
+        .values(estado=ESTADO_PENDIENTE)
+    )
+    db.commit()
+    return result.rowcount
+
+def run_pending_jobs(max_jobs: Optional[int] = None) -> int:
+    """Procesar la cola en el thread actual hasta vaciarla (scripts y tests)"""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        db = SessionLocal()
+        try:
+            job_id = claim_next_job(db)
+        finally:
+            db.close()
+        if job_id is None:
+            break
+        process_job(job_id)
+        processed += 1
+    return processed
+
+class ExportWorker:
+    """Pool de threads que consume la tabla export_jobs.
+
+    La tabla es la cola persistente: los jobs sobreviven reinicios y
+    cualquier proceso de la API puede encolar. Dentro del proceso, notify()
+    despierta a los workers sin esperar al próximo poll. Cada
+    EXPORT_REQUEUE_SECONDS uno de los threads devuelve a la cola los jobs
+    huérfanos de procesos caídos.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._threads = []
+        self._wake = Event()
+        self._stop = Event()
+        self._lock = Lock()
+        self._next_requeue = 0.0
+        self.processed = 0
+        self.requeued = 0
+
+    def _requeue_if_due(self):
+        with self._lock:
+            if time.monotonic() < self._next_requeue:
+                return
+            self._next_requeue = time.monotonic() + EXPORT_REQUEUE_SECONDS
+        db = SessionLocal()
+        try:
+            requeued = requeue_stale_jobs(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} stale export jobs")
+                with self._lock:
+                    self.requeued += requeued
+        except SQLAlchemyError as e:
+            logger.error(f"Error requeuing export jobs: {e}")
+        finally:
+            db.close()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._next_requeue = 0.0
+        self._requeue_if_due()
+
+        for i in range(self.workers):
+            thread = Thread(target=self._run, name=f"export-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._requeue_if_due()
+            db = SessionLocal()
+            try:
+                job_id = claim_next_job(db)
+            except SQLAlchemyError as e:
+                logger.error(f"Error claiming export job: {e}")
+                job_id = None
+            finally:
+                db.close()
+
+            if job_id is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            process_job(job_id)
+            with self._lock:
+                self.processed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": sum(1 for t in self._threads if t.is_alive()),
+                "processed": self.processed,
+                "requeued": self.requeued
+            }
+
+export_worker = ExportWorker(EXPORT_WORKERS, EXPORT_POLL_SECONDS)
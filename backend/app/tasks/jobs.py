@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.models import ExportJob, EmailOutbox, SchedulerRun, Notification
+from app.tasks.scheduler import Scheduler
+from app.tasks.payment_reminders import check_payment_reminders
+from app.tasks.expiry_notifications import generate_expiry_notifications
+from app.tasks.export_worker import ESTADO_COMPLETADO, ESTADO_ERROR
+from app.tasks.email_worker import ESTADO_ENVIADO, ESTADO_ERROR as EMAIL_ESTADO_ERROR
+from app.utils.stream_tickets import purge_expired_stream_tickets
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Expresiones cron de cada job (ver app/utils/cron.py)
+SCHEDULE_PAYMENT_REMINDERS = os.getenv("SCHEDULE_PAYMENT_REMINDERS", "0 9 * * *")
+SCHEDULE_EXPIRY_NOTIFICATIONS = os.getenv("SCHEDULE_EXPIRY_NOTIFICATIONS", "5 * * * *")
+SCHEDULE_CLEANUP = os.getenv("SCHEDULE_CLEANUP", "30 3 * * *")
+
+# Retención de registros terminados
+EXPORT_RETENTION_DAYS = int(os.getenv("EXPORT_RETENTION_DAYS", 7))
+EMAIL_RETENTION_DAYS = int(os.getenv("EMAIL_RETENTION_DAYS", 30))
+SCHEDULER_HISTORY_DAYS = int(os.getenv("SCHEDULER_HISTORY_DAYS", 30))
+# Sólo se purgan las leídas: las no leídas no afectan al contador por coach
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", 1000))
+
+def _delete_in_batches(db: Session, model, *conditions) -> int:
+    """Borrar por tandas de ids para no tomar locks largos sobre tablas grandes"""
+    total = 0
+    while True:
+        ids = [row_id for (row_id,) in db.query(model.id).filter(*conditions).limit(CLEANUP_BATCH_SIZE)]
+        if not ids:
+            return total
+        db.execute(delete(model).where(model.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+
+def _purge_exports(db: Session, cutoff: datetime) -> int:
+    conditions = (ExportJob.estado.in_([ESTADO_COMPLETADO, ESTADO_ERROR]), ExportJob.finalizado_en < cutoff)
+    for (archivo,) in db.query(ExportJob.archivo).filter(*conditions, ExportJob.archivo.is_not(None)).yield_per(CLEANUP_BATCH_SIZE):
+        try:
+            os.remove(archivo)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove export file {archivo}: {e}")
+    return _delete_in_batches(db, ExportJob, *conditions)
+
+def cleanup_old_records() -> dict:
+    """Borrar exportaciones, emails, notificaciones leídas, historial del scheduler
+    y tickets de stream ya vencidos"""
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        return {
+            "exports": _purge_exports(db, now - timedelta(days=EXPORT_RETENTION_DAYS)),
+            "emails": _delete_in_batches(
+                db, EmailOutbox,
+                EmailOutbox.estado.in_([ESTADO_ENVIADO, EMAIL_ESTADO_ERROR]),
+                EmailOutbox.creado_en < now - timedelta(days=EMAIL_RETENTION_DAYS)
+            ),
+            "notifications": _delete_in_batches(
+                db, Notification,
+                Notification.leida == True,
+                Notification.creada_en < now - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+            ),
+            "scheduler_runs": _delete_in_batches(
+                db, SchedulerRun,
+                SchedulerRun.iniciado_en < now - timedelta(days=SCHEDULER_HISTORY_DAYS)
+            ),
+            "stream_tickets": purge_expired_stream_tickets(db)
+        }
+    finally:
+        db.close()
+
+def register_default_jobs(scheduler: Scheduler):
+    scheduler.register("payment_reminders", SCHEDULE_PAYMENT_REMINDERS, check_payment_reminders, lease_seconds=3600)
+    scheduler.register("expiry_notifications", SCHEDULE_EXPIRY_NOTIFICATIONS, generate_expiry_notifications, lease_seconds=600)
+    scheduler.register("cleanup", SCHEDULE_CLEANUP, cleanup_old_records, lease_seconds=900)
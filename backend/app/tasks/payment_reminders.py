@@ -1,73 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import or_
+from typing import List, Optional
+from sqlalchemy import select, update, or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.database import SessionLocal
-from app.models.models import Alumno, Coach
-from app.utils.email_service import send_payment_reminder
+from app.models.models import Alumno, Coach, PaymentReminderRun
+from app.utils.email_service import send_payment_reminders
+from app.utils.email_providers import email_provider
+from app.tasks.email_worker import rate_limiter
 import logging
+import socket
+import uuid
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_payment_reminders():
-    """Verificar y enviar recordatorios de pago"""
+# Alumnos por chunk (un commit + checkpoint por chunk) y lotes enviados en paralelo
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", 500))
+REMINDER_SEND_CONCURRENCY = int(os.getenv("REMINDER_SEND_CONCURRENCY", 4))
+
+# Una corrida cortada se reanuda con su fecha de corte sólo dentro de este plazo;
+# más vieja se abandona y la próxima empieza con la fecha de hoy (los ya
+# notificados quedan afuera por ultima_notificacion)
+REMINDER_RESUME_MAX_HOURS = int(os.getenv("REMINDER_RESUME_MAX_HOURS", 24))
+# Lease de la corrida, renovado en cada chunk: el cron y el scheduler no la
+# corren a la vez
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", 600))
+
+RUN_EN_CURSO = "en_curso"
+RUN_COMPLETADO = "completado"
+RUN_ABANDONADO = "abandonado"
+
+def _lease_values(owner: str) -> dict:
+    return {"owner": owner, "lease_expira_en": datetime.now(timezone.utc) + timedelta(seconds=REMINDER_LEASE_SECONDS)}
+
+def _claim_run(db: Session, run_id: int, owner: str) -> bool:
+    """Tomar o renovar el lease con un UPDATE condicional (como acquire_lease del scheduler)"""
+    now = datetime.now(timezone.utc)
+    result = db.execute(
+        update(PaymentReminderRun)
+        .where(
+            PaymentReminderRun.id == run_id,
+            PaymentReminderRun.estado == RUN_EN_CURSO,
+            or_(
+                PaymentReminderRun.lease_expira_en.is_(None),
+                PaymentReminderRun.lease_expira_en < now,
+                PaymentReminderRun.owner == owner
+            )
+        )
+        .values(**_lease_values(owner))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def _release_run(db: Session, run_id: int, owner: str):
+    # Tras un error: la próxima ejecución la reanuda sin esperar a que venza el lease
+    db.execute(
+        update(PaymentReminderRun)
+        .where(PaymentReminderRun.id == run_id, PaymentReminderRun.owner == owner)
+        .values(lease_expira_en=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def _start_or_resume_run(db: Session, owner: str) -> Optional[PaymentReminderRun]:
+    """Reanudar la corrida que no terminó o empezar una nueva.
+
+    Devuelve None si otro proceso tiene el lease de la corrida en curso.
+    """
+    now = datetime.now(timezone.utc)
+    db.execute(
+        update(PaymentReminderRun)
+        .where(
+            PaymentReminderRun.estado == RUN_EN_CURSO,
+            PaymentReminderRun.fecha_corte < now - timedelta(hours=REMINDER_RESUME_MAX_HOURS),
+            or_(PaymentReminderRun.lease_expira_en.is_(None), PaymentReminderRun.lease_expira_en < now)
+        )
+        .values(estado=RUN_ABANDONADO, finalizado_en=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    run = db.query(PaymentReminderRun).filter(
+        PaymentReminderRun.estado == RUN_EN_CURSO
+    ).order_by(PaymentReminderRun.id).first()
+    if run:
+        if not _claim_run(db, run.id, owner):
+            return None
+        db.refresh(run)
+        logger.info(f"Reanudando recordatorios (corrida {run.id}) desde alumno {run.ultimo_alumno_id}")
+        return run
+
+    run = PaymentReminderRun(
+        estado=RUN_EN_CURSO,
+        fecha_corte=now,
+        ultimo_alumno_id=0,
+        procesados=0,
+        enviados=0,
+        fallidos=0,
+        **_lease_values(owner)
+    )
+    db.add(run)
+    db.commit()
+    # Si otro proceso creó la suya al mismo tiempo, gana la de id menor
+    primera = db.query(PaymentReminderRun.id).filter(
+        PaymentReminderRun.estado == RUN_EN_CURSO
+    ).order_by(PaymentReminderRun.id).first()
+    if primera.id != run.id:
+        db.delete(run)
+        db.commit()
+        return None
+    return run
+
+def _candidates_chunk(db: Session, fecha_corte: datetime, after_id: int) -> list:
+    """Siguiente chunk de candidatos por keyset (id > after_id), sólo las columnas necesarias"""
+    hace_30_dias = fecha_corte - timedelta(days=30)
+    stmt = select(Alumno.id, Alumno.email, Alumno.nombre, Coach.nombre).join(Coach).where(
+        Alumno.id > after_id,
+        Alumno.fecha_cobro.is_not(None),
+        Alumno.notificaciones_activas.is_(True),
+        Alumno.fecha_cobro <= fecha_corte,
+        # No notificado en los últimos 30 días
+        (Alumno.ultima_notificacion.is_(None)) |
+        (Alumno.ultima_notificacion <= hace_30_dias)
+    ).order_by(Alumno.id).limit(REMINDER_CHUNK_SIZE)
+    return db.execute(stmt).all()
+
+def _send_batch(reminders: List[dict], batch_key: str) -> List[bool]:
+    # Un token por llamada batch, compartido con el worker del outbox
+    rate_limiter.acquire()
+    return send_payment_reminders(reminders, batch_key)
+
+def _send_chunk(pool: ThreadPoolExecutor, rows: list, run_id: int, after_id: int) -> List[int]:
+    """Enviar el chunk en lotes concurrentes y devolver los ids notificados.
+
+    El key de cada lote sale de la corrida y del checkpoint del chunk: si la
+    corrida se reanuda (otro día, otro proceso) y reenvía el mismo chunk, el
+    proveedor descarta los lotes que ya había aceptado.
+    """
+    validos = []
+    for alumno_id, email, nombre, coach_nombre in rows:
+        # Validate required fields
+        if not email or not nombre or not coach_nombre:
+            logger.warning(f"Skipping alumno {alumno_id}: missing required fields")
+            continue
+        validos.append({
+            "id": alumno_id,
+            "email": email,
+            "alumno": nombre,
+            "coach": coach_nombre
+        })
+
+    size = email_provider.batch_limit
+    batches = [validos[i:i + size] for i in range(0, len(validos), size)]
+    keys = [f"payment-reminders:{run_id}:{after_id}:{i}" for i in range(len(batches))]
+    enviados = []
+    for batch, resultados in zip(batches, pool.map(_send_batch, batches, keys)):
+        enviados.extend(r["id"] for r, success in zip(batch, resultados) if success)
+    return enviados
+
+def check_payment_reminders() -> dict:
+    """Verificar y enviar recordatorios de pago.
+
+    Recorre los candidatos en chunks ordenados por id; cada chunk se envía,
+    marca a sus alumnos y avanza el checkpoint en una misma transacción.
+    Si la corrida se corta, la próxima retoma desde el último chunk
+    confirmado con la misma fecha de corte (dentro de
+    REMINDER_RESUME_MAX_HOURS). Un lease evita que dos procesos la corran a
+    la vez.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
     db = SessionLocal()
-    
+    pool = ThreadPoolExecutor(max_workers=REMINDER_SEND_CONCURRENCY, thread_name_prefix="payment-reminders")
+    run = None
     try:
-        today = datetime.now(timezone.utc)
-        hace_30_dias = today - timedelta(days=30)
-        
-        # Buscar alumnos que necesitan notificación
-        alumnos_a_cobrar = db.query(Alumno).join(Coach).filter(
-            Alumno.fecha_cobro.is_not(None),
-            Alumno.notificaciones_activas.is_(True),
-            Alumno.fecha_cobro <= today,
-            # No notificado en los últimos 30 días
-            (Alumno.ultima_notificacion.is_(None)) | 
-            (Alumno.ultima_notificacion <= hace_30_dias)
-        ).all()
-        
-        emails_enviados = 0
-        alumnos_actualizados = []
-        
-        for alumno in alumnos_a_cobrar:
-            try:
-                # Validate required fields
-                if not alumno.email or not alumno.nombre or not alumno.coach.nombre:
-                    logger.warning(f"Skipping alumno {alumno.id}: missing required fields")
-                    continue
-                    
-                success = send_payment_reminder(
-                    alumno_email=alumno.email,
-                    alumno_nombre=alumno.nombre,
-                    coach_nombre=alumno.coach.nombre
+        run = _start_or_resume_run(db, owner)
+        if run is None:
+            logger.info("Recordatorios en curso en otro proceso; se omite esta ejecución")
+            return {"omitida": True}
+        fecha_corte = run.fecha_corte
+
+        while True:
+            rows = _candidates_chunk(db, fecha_corte, run.ultimo_alumno_id)
+            if not rows:
+                break
+            # Renovar el lease antes de enviar; si se perdió, otro proceso siguió la corrida
+            if not _claim_run(db, run.id, owner):
+                logger.warning(f"Lease de la corrida {run.id} perdido; se detiene")
+                return {"run_id": run.id, "omitida": True}
+
+            enviados = _send_chunk(pool, rows, run.id, run.ultimo_alumno_id)
+            if enviados:
+                # Marcar como notificado
+                db.execute(
+                    update(Alumno)
+                    .where(Alumno.id.in_(enviados))
+                    .values(ultima_notificacion=fecha_corte)
+                    .execution_options(synchronize_session=False)
                 )
-                
-                if success:
-                    emails_enviados += 1
-                    # Marcar como notificado
-                    alumno.ultima_notificacion = today
-                    alumnos_actualizados.append(alumno)
-                    
-            except Exception as email_error:
-                logger.error(f"Error sending email to {alumno.email}: {str(email_error)}")
-                continue
-        
-        # Batch commit all updates
-        if alumnos_actualizados:
+            run.ultimo_alumno_id = rows[-1][0]
+            run.procesados += len(rows)
+            run.enviados += len(enviados)
+            run.fallidos += len(rows) - len(enviados)
+            run.actualizado_en = datetime.now(timezone.utc)
             db.commit()
-            
-        logger.info(f"Recordatorios enviados: {emails_enviados}")
-        
+
+        run.estado = RUN_COMPLETADO
+        run.finalizado_en = datetime.now(timezone.utc)
+        run.lease_expira_en = None
+        db.commit()
+        logger.info(f"Recordatorios enviados: {run.enviados} (corrida {run.id}, {run.fallidos} sin enviar)")
+        return {"run_id": run.id, "procesados": run.procesados, "enviados": run.enviados, "fallidos": run.fallidos}
+
     except SQLAlchemyError as db_error:
         logger.error(f"Database error in check_payment_reminders: {str(db_error)}")
         db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in check_payment_reminders: {str(e)}")
         db.rollback()
+        if run is not None:
+            _release_run(db, run.id, owner)
+        raise
     finally:
+        pool.shutdown(wait=True)
         db.close()
 
 if __name__ == "__main__":
-    check_payment_reminders()
\ No newline at end of file
+    check_payment_reminders()
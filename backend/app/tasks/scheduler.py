@@ -0,0 +1,243 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy import update, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.database import SessionLocal
+from app.models.models import SchedulerLease, SchedulerRun
+from app.utils.cron import CronSchedule
+import json
+import logging
+import socket
+import time
+import uuid
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 2))
+# Zona horaria en la que se interpretan las expresiones cron
+SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "UTC")
+
+RUN_OK = "ok"
+RUN_ERROR = "error"
+
+def acquire_lease(db: Session, nombre: str, owner: str, slot: datetime, lease_seconds: int) -> bool:
+    """Tomar el lease del job para la ejecución programada slot.
+
+    El UPDATE condicional sólo gana si el lease está libre (o vencido) y el
+    slot todavía no fue tomado: con N workers de uvicorn cada ejecución
+    corre una sola vez, aunque el job de un worker termine antes de que
+    otro llegue a intentarlo.
+    """
+    now = datetime.now(timezone.utc)
+    values = {"owner": owner, "expira_en": now + timedelta(seconds=lease_seconds), "ultimo_slot": slot}
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.nombre == nombre,
+            or_(SchedulerLease.expira_en.is_(None), SchedulerLease.expira_en < now, SchedulerLease.owner == owner),
+            or_(SchedulerLease.ultimo_slot.is_(None), SchedulerLease.ultimo_slot < slot)
+        )
+        .values(**values)
+    )
+    db.commit()
+    if result.rowcount == 1:
+        return True
+    if db.get(SchedulerLease, nombre) is not None:
+        return False
+    # Primera vez que corre el job: crear la fila (si otro worker la creó antes, perdimos)
+    try:
+        db.add(SchedulerLease(nombre=nombre, **values))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+def release_lease(db: Session, nombre: str, owner: str):
+    db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.nombre == nombre, SchedulerLease.owner == owner)
+        .values(expira_en=None)
+    )
+    db.commit()
+
+class ScheduledJob:
+    def __init__(self, name: str, cron: str, func: Callable, lease_seconds: int):
+        self.name = name
+        self.schedule = CronSchedule(cron)
+        self.func = func
+        self.lease_seconds = lease_seconds
+        self.next_run: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.last_started: Optional[datetime] = None
+        self.last_duration_ms: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> dict:
+        return {
+            "cron": self.schedule.expression,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "running": self.running,
+            "runs": self.runs,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error
+        }
+
+class Scheduler:
+    """Scheduler en proceso para los jobs periódicos (recordatorios, limpieza...).
+
+    Un thread calcula la próxima ejecución de cada job y los despacha a un
+    pool de threads, así ningún job bloquea el event loop. Cada worker de
+    uvicorn corre su propio scheduler; el lease en scheduler_leases decide
+    cuál ejecuta cada slot y scheduler_runs guarda el historial.
+    """
+
+    def __init__(self, workers: int, tz: str):
+        self.workers = workers
+        self.tz = ZoneInfo(tz)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = {}
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, cron: str, func: Callable, lease_seconds: int = 3600):
+        """Registrar un job; func corre en un thread y puede devolver un dict de métricas"""
+        job = ScheduledJob(name, cron, func, lease_seconds)
+        job.next_run = job.schedule.next_after(datetime.now(self.tz))
+        with self._lock:
+            self.jobs[name] = job
+        self._wake.set()
+        return job
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler-job")
+        self._thread = Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool:
+            # Los jobs en curso terminan solos; no esperar a que completen
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = datetime.now(self.tz)
+            with self._lock:
+                due = [job for job in self.jobs.values() if job.next_run <= now]
+                for job in due:
+                    slot = job.next_run
+                    job.next_run = job.schedule.next_after(now)
+                    if job.running:
+                        # La ejecución anterior sigue en curso en este proceso
+                        job.skipped += 1
+                        continue
+                    job.running = True
+                    self._pool.submit(self._execute, job, slot)
+                upcoming = min((job.next_run for job in self.jobs.values()), default=None)
+
+            wait = 60.0 if upcoming is None else max(0.0, (upcoming - datetime.now(self.tz)).total_seconds())
+            self._wake.wait(min(wait, 60.0))
+            self._wake.clear()
+
+    def _execute(self, job: ScheduledJob, slot: datetime):
+        slot = slot.astimezone(timezone.utc)
+        try:
+            db = SessionLocal()
+            try:
+                if not acquire_lease(db, job.name, self.owner, slot, job.lease_seconds):
+                    job.skipped += 1
+                    return
+            finally:
+                db.close()
+            self._run_job(job, slot)
+        except SQLAlchemyError as e:
+            logger.error(f"Scheduler error on job {job.name}: {e}")
+        finally:
+            job.running = False
+
+    def _run_job(self, job: ScheduledJob, slot: datetime):
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        job.last_started = started
+        resultado, error = None, None
+        try:
+            resultado = job.func()
+            estado = RUN_OK
+        except Exception as e:
+            estado = RUN_ERROR
+            error = str(e)[:2000]
+            logger.exception(f"Scheduled job {job.name} failed")
+        duracion_ms = int((time.perf_counter() - start) * 1000)
+
+        job.runs += 1
+        job.last_duration_ms = duracion_ms
+        if error:
+            job.errors += 1
+        job.last_error = error
+
+        db = SessionLocal()
+        try:
+            db.add(SchedulerRun(
+                job=job.name,
+                owner=self.owner,
+                slot=slot,
+                estado=estado,
+                iniciado_en=started,
+                finalizado_en=datetime.now(timezone.utc),
+                duracion_ms=duracion_ms,
+                resultado=json.dumps(resultado, default=str) if resultado is not None else None,
+                error=error
+            ))
+            db.commit()
+            release_lease(db, job.name, self.owner)
+        finally:
+            db.close()
+
+    def run_now(self, name: str) -> bool:
+        """Ejecutar un job ya mismo en el thread actual (si el lease lo permite)"""
+        job = self.jobs[name]
+        if job.running:
+            return False
+        job.running = True
+        skipped = job.skipped
+        self._execute(job, datetime.now(timezone.utc))
+        return job.skipped == skipped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": SCHEDULER_ENABLED,
+                "running": bool(self._thread and self._thread.is_alive()),
+                "owner": self.owner,
+                "timezone": str(self.tz),
+                "jobs": {name: job.stats() for name, job in self.jobs.items()}
+            }
+
+scheduler = Scheduler(SCHEDULER_WORKERS, SCHEDULER_TIMEZONE)
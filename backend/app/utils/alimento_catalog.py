@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from threading import Lock, Thread
+from app.database import SessionLocal
+from app.models.models import Alimento
+from app.utils.search_index import TextSearchIndex
+import logging
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Recarga periódica para ver altas hechas por otros workers o por seeds
+ALIMENTO_INDEX_REFRESH_SECONDS = int(os.getenv("ALIMENTO_INDEX_REFRESH_SECONDS", 300))
+
+alimento_index = TextSearchIndex()
+_loaded_at = 0.0
+_refresh_lock = Lock()
+
+def _alimento_payload(alimento: Alimento) -> dict:
+    return {
+        "id": alimento.id,
+        "nombre": alimento.nombre,
+        "calorias_100g": alimento.calorias_100g,
+        "proteinas_100g": alimento.proteinas_100g,
+        "carbohidratos_100g": alimento.carbohidratos_100g,
+        "grasas_100g": alimento.grasas_100g
+    }
+
+def load_alimento_index(db: Session):
+    """Construir el índice completo desde la tabla alimentos"""
+    global _loaded_at
+    alimentos = db.query(Alimento).all()
+    alimento_index.rebuild((a.id, a.nombre, _alimento_payload(a)) for a in alimentos)
+    _loaded_at = time.monotonic()
+
+def _refresh_alimento_index():
+    db = SessionLocal()
+    try:
+        load_alimento_index(db)
+    except SQLAlchemyError as e:
+        logger.error(f"Error refreshing alimento index: {e}")
+    finally:
+        db.close()
+        _refresh_lock.release()
+
+def ensure_alimento_index(db: Session):
+    """Carga inicial en el request; las recargas periódicas van en un thread
+    aparte y mientras tanto se sigue buscando sobre el índice vigente"""
+    if not alimento_index.loaded:
+        load_alimento_index(db)
+    elif time.monotonic() - _loaded_at > ALIMENTO_INDEX_REFRESH_SECONDS and _refresh_lock.acquire(blocking=False):
+        Thread(target=_refresh_alimento_index, name="alimento-index-refresh", daemon=True).start()
+
+def add_alimento_to_index(alimento: Alimento):
+    if alimento_index.loaded:
+        alimento_index.add(alimento.id, alimento.nombre, _alimento_payload(alimento))
+
+def search_alimentos(db: Session, query: str, limit: int = 20) -> list:
+    ensure_alimento_index(db)
+    return alimento_index.search(query, limit)
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from app.utils.cache import TTLCache
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 300))
+
+@dataclass(frozen=True)
+class CoachIdentity:
+    """Identidad liviana del coach, desacoplada de la sesión de SQLAlchemy"""
+    id: int
+    nombre: str
+    email: str
+
+# token -> claims verificados; coach_id -> CoachIdentity
+token_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+coach_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+
+def get_cached_claims(token: str):
+    return token_cache.get(token)
+
+def cache_claims(token: str, claims: dict):
+    """Guardar claims sin superar la expiración propia del token"""
+    ttl = None
+    exp = claims.get("exp")
+    if exp is not None:
+        ttl = exp - time.time()
+    token_cache.set(token, claims, ttl)
+
+def get_cached_coach(coach_id: int):
+    return coach_cache.get(coach_id)
+
+def cache_coach(coach) -> CoachIdentity:
+    identity = CoachIdentity(id=coach.id, nombre=coach.nombre, email=coach.email)
+    coach_cache.set(coach.id, identity)
+    return identity
+
+def invalidate_coach(coach_id: int):
+    """Invalidar la identidad del coach y todos los tokens emitidos a su nombre"""
+    coach_cache.delete(coach_id)
+    token_cache.delete_where(lambda claims: claims.get("coach_id") == coach_id)
+
+def invalidate_token(token: str):
+    """Olvidar los claims de un token puntual (p. ej. el que reemplaza un login)"""
+    token_cache.delete(token)
+
+def get_auth_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "coaches": coach_cache.stats()
+    }
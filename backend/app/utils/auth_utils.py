@@ -1,6 +1,8 @@
 from passlib.context import CryptContext
 from jose import jwt
+from app.utils.password_pool import password_pool
 from datetime import datetime, timedelta
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -18,6 +20,13 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password en el pool dedicado; lanza PasswordPoolSaturated si está lleno"""
+    return await asyncio.wrap_future(password_pool.submit(verify_password, plain_password, hashed_password))
+
+async def get_password_hash_async(password):
+    return await asyncio.wrap_future(password_pool.submit(get_password_hash, password))
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
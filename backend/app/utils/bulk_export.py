@@ -0,0 +1,176 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from threading import Lock
+from app.utils.document_cache import document_cache, EXTENSIONS
+from app.utils.document_snapshots import snapshot_digest
+from app.utils.excel_writer import STREAM_CHUNK_SIZE
+import multiprocessing
+import logging
+import zipfile
+import re
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# reportlab/openpyxl son CPU puro y no liberan el GIL: se renderiza en procesos
+BULK_EXPORT_PROCESSES = int(os.getenv("BULK_EXPORT_PROCESSES", max(1, (os.cpu_count() or 2) - 1)))
+# Documentos en vuelo por pedido; acota la memoria aunque el cliente lea lento
+BULK_EXPORT_MAX_IN_FLIGHT = int(os.getenv("BULK_EXPORT_MAX_IN_FLIGHT", BULK_EXPORT_PROCESSES * 2))
+
+_pool = None
+_pool_lock = Lock()
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Pool compartido creado al primer uso. spawn evita heredar los threads
+    y conexiones abiertas del proceso de la API."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BULK_EXPORT_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def shutdown_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def render_document(tipo: str, formato: str, snapshot, target_path: str):
+    """Punto de entrada en el proceso hijo: recibe un snapshot picklable y
+    escribe el documento en target_path, así los bytes no vuelven por el pipe"""
+    if formato == "excel":
+        if tipo == "rutina":
+            from app.utils.excel_generator import write_rutina_excel as write
+        else:
+            from app.utils.dieta_excel_generator import write_dieta_excel as write
+        write(snapshot, target_path)
+        return
+
+    if tipo == "rutina":
+        from app.utils.pdf_generator import generate_rutina_pdf as render
+    else:
+        from app.utils.dieta_pdf_generator import generate_dieta_pdf as render
+    with open(target_path, "wb") as f:
+        f.write(render(snapshot))
+
+_UNSAFE_CHARS = re.compile(r"[^\w\- ]+")
+
+def _safe_name(value) -> str:
+    return _UNSAFE_CHARS.sub("", str(value or "")).strip().replace(" ", "_") or "sin_nombre"
+
+def archive_name(tipo: str, formato: str, snapshot) -> str:
+    carpeta = _safe_name(snapshot.alumno.nombre) if snapshot.alumno else "sin_asignar"
+    return f"{carpeta}/{tipo}_{_safe_name(snapshot.nombre)}_{snapshot.id}.{EXTENSIONS[formato]}"
+
+class _ZipStream:
+    """Destino no seekable para ZipFile: acumula lo escrito hasta el próximo drain()"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+def stream_zip(documents, formato: str):
+    """Generar el ZIP por partes a medida que se termina cada documento.
+
+    documents: lista de (tipo, snapshot). Los documentos ya cacheados se
+    leen de disco a través de un link propio (checkout); el resto se
+    renderiza en el pool de procesos directo a un temporal del cache, con a
+    lo sumo BULK_EXPORT_MAX_IN_FLIGHT en vuelo.
+    Cada archivo se copia al ZIP en bloques, así ningún documento completo
+    pasa por memoria.
+    """
+    stream = _ZipStream()
+    # PDF y XLSX ya vienen comprimidos: almacenarlos sin recomprimir
+    archive = zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED)
+    pending = {}
+    ready = []
+    errores = []
+    queue = iter(documents)
+
+    def submit_next() -> bool:
+        for tipo, snapshot in queue:
+            key = snapshot_digest(snapshot, formato)
+            path = document_cache.checkout(key)
+            if path:
+                ready.append((tipo, snapshot, path))
+                return True
+            tmp_path = document_cache.reserve(key, (tipo, snapshot.id), formato)
+            future = get_render_pool().submit(render_document, tipo, formato, snapshot, tmp_path)
+            pending[future] = (tipo, snapshot, key, tmp_path)
+            return True
+        return False
+
+    def fill():
+        while len(pending) + len(ready) < BULK_EXPORT_MAX_IN_FLIGHT and submit_next():
+            pass
+
+    try:
+        fill()
+        while pending or ready:
+            if not ready:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    tipo, snapshot, key, tmp_path = pending.pop(future)
+                    try:
+                        future.result()
+                        ready.append((tipo, snapshot, document_cache.adopt(key, (tipo, snapshot.id), formato, tmp_path, checkout=True)))
+                    except Exception as e:
+                        document_cache.discard(tmp_path)
+                        name = archive_name(tipo, formato, snapshot)
+                        logger.warning(f"Bulk export failed for {name}: {e}")
+                        errores.append(f"{name}: {e}")
+
+            while ready:
+                tipo, snapshot, path = ready.pop(0)
+                name = archive_name(tipo, formato, snapshot)
+                try:
+                    with open(path, "rb") as source, archive.open(name, "w") as entry:
+                        while True:
+                            chunk = source.read(STREAM_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+                            if stream.size >= STREAM_CHUNK_SIZE:
+                                yield stream.drain()
+                except OSError as e:
+                    logger.warning(f"Bulk export failed for {name}: {e}")
+                    errores.append(f"{name}: {e}")
+                finally:
+                    document_cache.discard(path)
+                if stream.size:
+                    yield stream.drain()
+                fill()
+
+        if errores:
+            archive.writestr("errores.txt", "\n".join(errores).encode("utf-8"))
+        archive.close()
+        yield stream.drain()
+    finally:
+        # Cliente desconectado o error: no dejar renders encolados ni temporales
+        for _, _, path in ready:
+            document_cache.discard(path)
+        for future, (_, _, _, tmp_path) in pending.items():
+            future.cancel()
+            # cancel() no frena un render que ya corre: su temporal se borra
+            # cuando termina (o en el acto si ya terminó o se canceló)
+            future.add_done_callback(lambda _, tmp_path=tmp_path: document_cache.discard(tmp_path))
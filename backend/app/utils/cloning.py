@@ -0,0 +1,234 @@
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import select, insert, update, delete, case, literal, Integer
+from sqlalchemy.orm import Session
+from app.models.models import (
+    Alumno, Rutina, Ejercicio, RutinaPlantilla, EjercicioPlantilla,
+    Dieta, Comida, ComidaAlimento, DietaPlantilla, ComidaPlantilla, ComidaPlantillaAlimento
+)
+from app.utils.dashboard_counters import adjust_dashboard_counters
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Copias de rutinas, dietas y plantillas con INSERT ... SELECT: la cantidad de
+# sentencias no depende de cuántos ejercicios o alimentos tenga el plan.
+#
+# Los nietos (alimentos de cada comida) necesitan saber qué comida nueva
+# corresponde a cada comida de origen. Las comidas se insertan con ORDER BY
+# (padre nuevo, id de origen) y los autoincrementales de un mismo INSERT son
+# crecientes en ese orden (SQLite, MySQL/InnoDB, PostgreSQL), así que leer
+# los ids nuevos ordenados alcanza para armar el mapa sin RETURNING.
+
+# Comidas mapeadas por sentencia al copiar alimentos (acota el tamaño del CASE)
+CLONE_MAPPING_CHUNK = int(os.getenv("CLONE_MAPPING_CHUNK", 500))
+# Alumnos por request en la asignación masiva de plantillas
+MAX_BULK_ASSIGN = int(os.getenv("MAX_BULK_ASSIGN", 500))
+
+# Contador de dashboard_counters que suma cada tipo de plan
+PLAN_COUNTERS = {Rutina: "rutinas", Dieta: "dietas"}
+
+EJERCICIO_COLUMNS = ["ejercicio_base_id", "series", "repeticiones", "peso", "descanso", "notas"]
+COMIDA_COLUMNS = ["nombre", "orden"]
+ALIMENTO_COLUMNS = ["alimento_id", "cantidad_gramos"]
+
+def _clone_into_parents(db: Session, source, source_fk: str, source_id: int, where: Sequence,
+                        target, target_fk: str, parent_model, parent_ids: List[int],
+                        columns: List[str], overrides: Optional[dict] = None) -> int:
+    """Copiar las filas hijas de source_id debajo de cada padre nuevo.
+
+    Un solo INSERT ... SELECT: el JOIN contra la tabla de padres filtrada por
+    parent_ids genera una fila por (padre nuevo, fila de origen).
+    """
+    values = {name: getattr(source, name) for name in columns}
+    for name, value in (overrides or {}).items():
+        values[name] = literal(value, Integer)
+    stmt = select(parent_model.id, *values.values()).select_from(source).join(
+        parent_model, parent_model.id.in_(parent_ids)
+    ).where(
+        getattr(source, source_fk) == source_id, *where
+    ).order_by(parent_model.id, source.id)
+    return db.execute(insert(target).from_select([target_fk, *values], stmt)).rowcount
+
+def _map_new_ids(db: Session, source, source_fk: str, source_id: int, where: Sequence,
+                 target, target_fk: str, parent_ids: List[int], target_where: Sequence = ()) -> Dict[int, int]:
+    """id nuevo -> id de origen, según el orden de inserción de _clone_into_parents"""
+    source_ids = db.execute(
+        select(source.id).where(getattr(source, source_fk) == source_id, *where).order_by(source.id)
+    ).scalars().all()
+    new_ids = db.execute(
+        select(target.id).where(getattr(target, target_fk).in_(parent_ids), *target_where).order_by(target.id)
+    ).scalars().all()
+    expected = [source_row for _ in sorted(parent_ids) for source_row in source_ids]
+    if len(new_ids) != len(expected):
+        raise RuntimeError(f"Clone mapping mismatch for {target.__tablename__}: {len(new_ids)} != {len(expected)}")
+    return dict(zip(new_ids, expected))
+
+def _clone_grandchildren(db: Session, source, source_fk: str, target, target_fk: str,
+                         child_model, mapping: Dict[int, int], columns: List[str]) -> int:
+    """Copiar los nietos usando el mapa hijo nuevo -> hijo de origen.
+
+    El CASE traduce cada hijo nuevo a su origen dentro del JOIN; se parte en
+    tramos de CLONE_MAPPING_CHUNK para no armar sentencias gigantes.
+    """
+    total = 0
+    items = list(mapping.items())
+    for start in range(0, len(items), CLONE_MAPPING_CHUNK):
+        chunk = dict(items[start:start + CLONE_MAPPING_CHUNK])
+        origen = case(chunk, value=child_model.id)
+        stmt = select(child_model.id, *[getattr(source, name) for name in columns]).select_from(child_model).join(
+            source, getattr(source, source_fk) == origen
+        ).where(
+            child_model.id.in_(list(chunk)),
+            getattr(source, source_fk).in_(set(chunk.values()))
+        ).order_by(child_model.id, source.id)
+        total += db.execute(insert(target).from_select([target_fk, *columns], stmt)).rowcount
+    return total
+
+def replace_active_plans(db: Session, model, alumno_ids: List[int], values: dict) -> Tuple[Dict[int, int], Set[int]]:
+    """Dar a cada alumno un plan nuevo (Rutina o Dieta) dando de baja el activo.
+
+    Un UPDATE para los planes anteriores y un INSERT multi-fila para los
+    nuevos. Devuelve alumno_id -> id del plan nuevo y los alumnos que ya
+    tenían un plan activo.
+    """
+    activos = (model.activa == True, model.eliminado == False)
+    reemplazados = set(db.execute(
+        select(model.alumno_id).where(model.alumno_id.in_(alumno_ids), *activos)
+    ).scalars())
+    if reemplazados:
+        db.execute(
+            update(model).where(model.alumno_id.in_(reemplazados), *activos).values(activa=False, eliminado=True),
+            execution_options={"synchronize_session": False}
+        )
+    db.execute(insert(model), [{**values, "alumno_id": alumno_id, "activa": True, "eliminado": False} for alumno_id in alumno_ids])
+    nuevos = dict(db.execute(
+        select(model.alumno_id, model.id).where(model.alumno_id.in_(alumno_ids), *activos)
+    ).all())
+    return nuevos, reemplazados
+
+def bulk_assign_ids(alumno_ids: List[int]) -> List[int]:
+    """alumno_ids sin duplicados (en orden); ValueError si está vacío o excede MAX_BULK_ASSIGN"""
+    alumno_ids = list(dict.fromkeys(alumno_ids))
+    if not alumno_ids:
+        raise ValueError("alumno_ids is required")
+    if len(alumno_ids) > MAX_BULK_ASSIGN:
+        raise ValueError(f"At most {MAX_BULK_ASSIGN} alumnos per request")
+    return alumno_ids
+
+def assign_plantilla(db: Session, model, coach_id: int, alumno_ids: List[int], values: dict,
+                     copy_children: Callable[[List[int]], int]) -> dict:
+    """Plan nuevo (Rutina o Dieta) desde una plantilla para cada alumno del coach.
+
+    Los alumnos ajenos o inexistentes quedan como error en el resultado;
+    copy_children recibe los ids de los planes nuevos. No hace commit.
+    Devuelve el cuerpo de BulkAssignOut.
+    """
+    validos = set(db.execute(
+        select(Alumno.id).where(Alumno.id.in_(alumno_ids), Alumno.coach_id == coach_id)
+    ).scalars())
+    destino = [alumno_id for alumno_id in alumno_ids if alumno_id in validos]
+    
+    nuevos, reemplazados = {}, set()
+    if destino:
+        nuevos, reemplazados = replace_active_plans(db, model, destino, values)
+        copy_children(list(nuevos.values()))
+        if len(destino) > len(reemplazados):
+            adjust_dashboard_counters(db, coach_id, **{PLAN_COUNTERS[model]: len(destino) - len(reemplazados)})
+    
+    resultados = [
+        {"alumno_id": alumno_id, "estado": "asignada", "plan_id": nuevos[alumno_id], "reemplazo": alumno_id in reemplazados}
+        if alumno_id in nuevos else
+        {"alumno_id": alumno_id, "estado": "error", "detail": "Alumno not found"}
+        for alumno_id in alumno_ids
+    ]
+    return {"asignadas": len(nuevos), "resultados": resultados}
+
+# Rutinas
+
+def copy_ejercicios(db: Session, rutina_id: int, rutina_ids: List[int],
+                    source_day: Optional[int] = None, target_day: Optional[int] = None) -> int:
+    """Ejercicios de una rutina (o de un día) hacia otras rutinas (o a otro día), conservando el día"""
+    where = (Ejercicio.dia == source_day,) if source_day is not None else ()
+    overrides = {"dia": target_day} if target_day is not None else None
+    return _clone_into_parents(
+        db, Ejercicio, "rutina_id", rutina_id, where,
+        Ejercicio, "rutina_id", Rutina, rutina_ids,
+        ["dia", *EJERCICIO_COLUMNS], overrides
+    )
+
+def copy_ejercicios_to_plantilla(db: Session, rutina_id: int, plantilla_id: int) -> int:
+    return _clone_into_parents(
+        db, Ejercicio, "rutina_id", rutina_id, (),
+        EjercicioPlantilla, "rutina_plantilla_id", RutinaPlantilla, [plantilla_id],
+        EJERCICIO_COLUMNS
+    )
+
+def copy_ejercicios_from_plantilla(db: Session, plantilla_id: int, rutina_ids: List[int]) -> int:
+    return _clone_into_parents(
+        db, EjercicioPlantilla, "rutina_plantilla_id", plantilla_id, (),
+        Ejercicio, "rutina_id", Rutina, rutina_ids,
+        EJERCICIO_COLUMNS
+    )
+
+# Dietas
+
+def copy_comidas(db: Session, dieta_id: int, dieta_ids: List[int],
+                 source_day: Optional[int] = None, target_day: Optional[int] = None) -> int:
+    """Comidas con sus alimentos de una dieta (o de un día) hacia otras dietas (o a otro día).
+
+    Para copiar a otro día de la misma dieta, el día destino tiene que estar
+    vacío (ver clear_day_comidas): los ids nuevos se leen de ese día.
+    """
+    where = (Comida.dia == source_day,) if source_day is not None else ()
+    overrides = {"dia": target_day} if target_day is not None else None
+    copiadas = _clone_into_parents(
+        db, Comida, "dieta_id", dieta_id, where,
+        Comida, "dieta_id", Dieta, dieta_ids,
+        ["dia", *COMIDA_COLUMNS], overrides
+    )
+    if copiadas:
+        target_where = (Comida.dia == target_day,) if target_day is not None else ()
+        mapping = _map_new_ids(db, Comida, "dieta_id", dieta_id, where, Comida, "dieta_id", dieta_ids, target_where)
+        _clone_grandchildren(db, ComidaAlimento, "comida_id", ComidaAlimento, "comida_id", Comida, mapping, ALIMENTO_COLUMNS)
+    return copiadas
+
+def clear_day_comidas(db: Session, dieta_id: int, dia: int) -> int:
+    """Borrar las comidas de un día con sus alimentos (dos DELETE)"""
+    comidas_del_dia = select(Comida.id).where(Comida.dieta_id == dieta_id, Comida.dia == dia)
+    db.execute(
+        delete(ComidaAlimento).where(ComidaAlimento.comida_id.in_(comidas_del_dia)),
+        execution_options={"synchronize_session": False}
+    )
+    return db.execute(
+        delete(Comida).where(Comida.dieta_id == dieta_id, Comida.dia == dia),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+def copy_comidas_to_plantilla(db: Session, dieta_id: int, plantilla_id: int) -> int:
+    copiadas = _clone_into_parents(
+        db, Comida, "dieta_id", dieta_id, (),
+        ComidaPlantilla, "dieta_plantilla_id", DietaPlantilla, [plantilla_id],
+        COMIDA_COLUMNS
+    )
+    if copiadas:
+        mapping = _map_new_ids(db, Comida, "dieta_id", dieta_id, (), ComidaPlantilla, "dieta_plantilla_id", [plantilla_id])
+        _clone_grandchildren(
+            db, ComidaAlimento, "comida_id", ComidaPlantillaAlimento, "comida_plantilla_id",
+            ComidaPlantilla, mapping, ALIMENTO_COLUMNS
+        )
+    return copiadas
+
+def copy_comidas_from_plantilla(db: Session, plantilla_id: int, dieta_ids: List[int]) -> int:
+    copiadas = _clone_into_parents(
+        db, ComidaPlantilla, "dieta_plantilla_id", plantilla_id, (),
+        Comida, "dieta_id", Dieta, dieta_ids,
+        COMIDA_COLUMNS
+    )
+    if copiadas:
+        mapping = _map_new_ids(db, ComidaPlantilla, "dieta_plantilla_id", plantilla_id, (), Comida, "dieta_id", dieta_ids)
+        _clone_grandchildren(
+            db, ComidaPlantillaAlimento, "comida_plantilla_id", ComidaAlimento, "comida_id",
+            Comida, mapping, ALIMENTO_COLUMNS
+        )
+    return copiadas
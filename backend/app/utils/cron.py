@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+# Expresiones cron de 5 campos: minuto hora día-del-mes mes día-de-la-semana.
+# Soporta *, listas (1,15), rangos (1-5), pasos (*/10, 8-18/2) y los
+# alias @hourly/@daily/@weekly/@monthly. Domingo es 0 (o 7).
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (mínimo, máximo) de cada campo
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+class CronError(ValueError):
+    pass
+
+def _parse_field(field: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"Invalid step: {step_text}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            if not (start_text.isdigit() and end_text.isdigit()):
+                raise CronError(f"Invalid range: {part}")
+            start, end = int(start_text), int(end_text)
+        elif part.isdigit():
+            start = int(part)
+            # "5/15" equivale a "5-max/15"
+            end = high if step > 1 else start
+        else:
+            raise CronError(f"Invalid value: {part}")
+        if start < low or end > high or start > end:
+            raise CronError(f"Value out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+class CronSchedule:
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays", "_any_day", "_any_weekday")
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Expected 5 fields: {expression}")
+        parsed = [_parse_field(f, low, high) for f, (low, high) in zip(fields, FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        # Semántica de cron: si ambos campos están restringidos alcanza con uno
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """Primer instante estrictamente posterior a after que cumple la expresión.
+
+        Salta por mes/día/hora en lugar de minuto a minuto, así incluso
+        expresiones muy espaciadas se resuelven en pocas iteraciones.
+        """
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt <= limit:
+            if dt.month not in self.months:
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise CronError(f"Expression never matches: {self.expression}")
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
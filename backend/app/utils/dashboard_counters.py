@@ -0,0 +1,89 @@
+from sqlalchemy import select, update, func, case, literal, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import Alumno, Rutina, Dieta, DashboardCounter
+
+# Totales del dashboard por coach en la tabla dashboard_counters, mantenidos en
+# la misma transacción que el alta/baja/activación. Como notification_counters:
+# los ajustes son UPDATE relativos y la tabla es compartida por todos los
+# workers, así el dashboard es una lectura por clave primaria.
+
+COUNTER_FIELDS = ("total_alumnos", "total_rutinas", "total_dietas")
+
+def count_dashboard_totals(db: Session, coach_id: int) -> dict:
+    """Totales del coach en una sola consulta con agregados condicionales.
+    
+    Una fila por alumno y por plan activo (UNION ALL) y un SUM(CASE) por tipo:
+    sin joins entre rutinas y dietas que multipliquen filas.
+    """
+    filas = union_all(
+        select(literal("alumno").label("tipo")).where(Alumno.coach_id == coach_id),
+        select(literal("rutina")).select_from(Rutina).join(Alumno, Alumno.id == Rutina.alumno_id).where(
+            Alumno.coach_id == coach_id, Rutina.activa == True, Rutina.eliminado == False
+        ),
+        select(literal("dieta")).select_from(Dieta).join(Alumno, Alumno.id == Dieta.alumno_id).where(
+            Alumno.coach_id == coach_id, Dieta.activa == True, Dieta.eliminado == False
+        )
+    ).subquery()
+    totals = db.execute(select(
+        *[func.coalesce(func.sum(case((filas.c.tipo == tipo, 1), else_=0)), 0) for tipo in ("alumno", "rutina", "dieta")]
+    )).one()
+    return dict(zip(COUNTER_FIELDS, totals))
+
+def _counters_out(counter: DashboardCounter) -> dict:
+    return {field: max(getattr(counter, field), 0) for field in COUNTER_FIELDS}
+
+def _apply(db: Session, coach_id: int, values: dict) -> int:
+    return db.execute(
+        update(DashboardCounter).where(DashboardCounter.coach_id == coach_id).values(**values),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+def _deltas(alumnos: int, rutinas: int, dietas: int) -> dict:
+    return {
+        field: getattr(DashboardCounter, field) + delta
+        for field, delta in zip(COUNTER_FIELDS, (alumnos, rutinas, dietas)) if delta
+    }
+
+def _create_counters(db: Session, coach_id: int, alumnos: int = 0, rutinas: int = 0, dietas: int = 0) -> dict:
+    """Crear la fila desde el conteo (coaches sin fila todavía).
+
+    El conteo ya ve los cambios pendientes de esta transacción; si otro
+    request creó la fila en paralelo, su conteo no los veía y hay que aplicar
+    los deltas (igual que en notification_counters).
+    """
+    db.flush()
+    totals = count_dashboard_totals(db, coach_id)
+    try:
+        with db.begin_nested():
+            db.add(DashboardCounter(coach_id=coach_id, **totals))
+    except IntegrityError:
+        deltas = _deltas(alumnos, rutinas, dietas)
+        if deltas:
+            _apply(db, coach_id, deltas)
+        return _counters_out(db.get(DashboardCounter, coach_id, populate_existing=True))
+    return totals
+
+def adjust_dashboard_counters(db: Session, coach_id: int, alumnos: int = 0, rutinas: int = 0, dietas: int = 0):
+    """Sumar deltas a los totales del coach; no hace commit"""
+    deltas = _deltas(alumnos, rutinas, dietas)
+    if not deltas:
+        return
+    if not _apply(db, coach_id, deltas):
+        _create_counters(db, coach_id, alumnos, rutinas, dietas)
+
+def refresh_dashboard_counters(db: Session, coach_id: int):
+    """Recalcular los totales del coach para cambios sin delta simple
+    (borrar un alumno con sus planes, activar/desactivar). No hace commit."""
+    db.flush()
+    if not _apply(db, coach_id, count_dashboard_totals(db, coach_id)):
+        _create_counters(db, coach_id)
+
+def get_dashboard_counters(db: Session, coach_id: int) -> dict:
+    """Lectura por clave primaria; crea la fila la primera vez"""
+    counter = db.get(DashboardCounter, coach_id)
+    if counter is None:
+        totals = _create_counters(db, coach_id)
+        db.commit()
+        return totals
+    return _counters_out(counter)
@@ -1,49 +1,45 @@
-from io import BytesIO
+from reportlab.lib import colors
 from app.models.models import Dieta
+from app.utils.pdf_layout import PdfDocument
+
+ALIMENTO_HEADERS = ["Comida", "Alimento", "Cantidad (g)", "Calorías"]
+ALIMENTO_COL_WIDTHS = (0.28, 0.40, 0.16, 0.16)
+HEADER_COLOR = colors.HexColor("#7B68EE")
+
+def _calorias(ca) -> str:
+    if not ca.alimento or ca.alimento.calorias_100g is None or ca.cantidad_gramos is None:
+        return "-"
+    return f"{ca.alimento.calorias_100g * ca.cantidad_gramos / 100:.1f}"
 
 def generate_dieta_pdf(dieta: Dieta):
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from io import BytesIO
-    
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
+    doc = PdfDocument(title=f"Dieta {dieta.nombre or ''}")
+    doc.title(f"Dieta: {dieta.nombre or 'Sin nombre'}")
+    doc.meta("Alumno", dieta.alumno.nombre if dieta.alumno else 'Sin asignar')
+    doc.meta("Fecha inicio", dieta.fecha_inicio.strftime('%d/%m/%Y') if dieta.fecha_inicio else 'No especificada')
+    doc.meta("Notas", dieta.notas or 'Sin notas')
+    doc.spacer(12)
     
-    y = 750
-    p.drawString(100, y, f"Dieta: {dieta.nombre or 'Sin nombre'}")
-    y -= 30
-    p.drawString(100, y, f"Alumno: {dieta.alumno.nombre if dieta.alumno else 'Sin asignar'}")
-    y -= 20
-    p.drawString(100, y, f"Fecha inicio: {dieta.fecha_inicio.strftime('%d/%m/%Y') if dieta.fecha_inicio else 'No especificada'}")
-    y -= 20
-    p.drawString(100, y, f"Notas: {dieta.notas or 'Sin notas'}")
-    y -= 40
+    # Organizar comidas por día
+    dias_comidas = {}
+    for comida in dieta.comidas:
+        dias_comidas.setdefault(comida.dia or 1, []).append(comida)
     
-    p.drawString(100, y, "Comidas:")
-    y -= 20
+    for dia in sorted(dias_comidas.keys()):
+        rows = []
+        for comida in sorted(dias_comidas[dia], key=lambda c: c.orden or 0):
+            nombre = comida.nombre or 'Sin nombre'
+            if not comida.alimentos:
+                rows.append([nombre, "Sin alimentos", "", ""])
+            for i, ca in enumerate(comida.alimentos):
+                rows.append([
+                    nombre if i == 0 else "",
+                    ca.alimento.nombre if ca.alimento else 'Alimento desconocido',
+                    ca.cantidad_gramos or 0,
+                    _calorias(ca)
+                ])
+        doc.table(f"Día {dia}", ALIMENTO_HEADERS, rows, ALIMENTO_COL_WIDTHS, HEADER_COLOR)
     
-    # Mostrar comidas de forma simple
-    if hasattr(dieta, 'comidas') and dieta.comidas:
-        for comida in dieta.comidas:
-            if y < 100:
-                p.showPage()
-                y = 750
-            
-            p.drawString(120, y, f"- {comida.nombre or 'Sin nombre'} (Día {comida.dia or 1})")
-            y -= 15
-            
-            if hasattr(comida, 'alimentos') and comida.alimentos:
-                for ca in comida.alimentos:
-                    if y < 80:
-                        p.showPage()
-                        y = 750
-                    alimento_nombre = ca.alimento.nombre if ca.alimento else 'Alimento desconocido'
-                    p.drawString(140, y, f"  • {alimento_nombre}: {ca.cantidad_gramos or 0}g")
-                    y -= 12
-            y -= 5
-    else:
-        p.drawString(120, y, "No hay comidas registradas")
+    if not dias_comidas:
+        doc.empty("No hay comidas registradas")
     
-    p.save()
-    buffer.seek(0)
-    return buffer.getvalue()
\ No newline at end of file
+    return doc.render()
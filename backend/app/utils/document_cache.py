@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from threading import Lock, get_ident
+from app.utils.document_snapshots import snapshot_digest
+import shutil
+import uuid
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", "document_cache")
+DOCUMENT_CACHE_MAX_MB = int(os.getenv("DOCUMENT_CACHE_MAX_MB", 256))
+
+EXTENSIONS = {"pdf": "pdf", "excel": "xlsx"}
+
+class DocumentCache:
+    """Cache en disco de documentos generados, direccionado por contenido.
+
+    La clave es el hash del snapshot + formato, así un documento cacheado
+    nunca queda desactualizado: si la rutina cambia, cambia la clave. La
+    invalidación por objeto sólo libera espacio de versiones que ya no se
+    van a pedir. El índice LRU vive en memoria y se reconstruye desde el
+    directorio al primer uso.
+
+    Quien lee un documento después de soltar el lock (una descarga, un ZIP)
+    usa checkout(): recibe un hard link propio que el desalojo no toca y lo
+    borra con discard() al terminar.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # clave -> (path, tamaño, (tipo, id))
+        self._owners = {}               # (tipo, id) -> set(claves)
+        self._lock = Lock()
+        self._scanned = False
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _filename(self, owner, key: str, formato: str) -> str:
+        tipo, objeto_id = owner
+        return f"{tipo}_{objeto_id}_{key}.{EXTENSIONS[formato]}"
+
+    def _scan(self):
+        """Recuperar archivos de ejecuciones anteriores, los más viejos primero"""
+        if self._scanned:
+            return
+        self._scanned = True
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for entry in os.scandir(self.directory):
+            parts = entry.name.rsplit(".", 1)[0].split("_")
+            if len(parts) != 3 or not parts[1].isdigit() or entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, parts[2], entry.path, stat.st_size, (parts[0], int(parts[1]))))
+        for _, key, path, size, owner in sorted(files):
+            self._record(key, path, size, owner)
+        self._evict()
+
+    def _record(self, key, path, size, owner):
+        self._entries[key] = (path, size, owner)
+        self._owners.setdefault(owner, set()).add(key)
+        self.total_bytes += size
+
+    def _drop(self, key):
+        path, size, owner = self._entries.pop(key)
+        self.total_bytes -= size
+        keys = self._owners.get(owner)
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self._owners[owner]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._entries) > (1 if keep else 0):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                self._entries.move_to_end(oldest)
+                continue
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _lookup(self, key: str):
+        # Con el lock tomado: entrada vigente o None (contando hit/miss)
+        self._scan()
+        entry = self._entries.get(key)
+        if entry and os.path.exists(entry[0]):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if entry:
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def _link(self, path: str) -> str:
+        # Con el lock tomado: nadie puede borrar path mientras se enlaza
+        served = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(path, served)
+        except OSError:
+            # Filesystems sin hard links: una copia cumple la misma función
+            shutil.copyfile(path, served)
+        return served
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._lookup(key)
+            return entry[0] if entry else None
+
+    def checkout(self, key: str):
+        """Como get(), pero devuelve una ruta privada que hay que liberar con discard()"""
+        with self._lock:
+            entry = self._lookup(key)
+            return self._link(entry[0]) if entry else None
+
+    def put(self, key: str, owner, formato: str, content: bytes, checkout: bool = False) -> str:
+        return self.put_stream(key, owner, formato, lambda f: f.write(content), checkout)
+
+    def put_stream(self, key: str, owner, formato: str, write, checkout: bool = False) -> str:
+        """Guardar un documento escrito directamente al archivo por write(f), sin pasar por memoria"""
+        tmp_path = self.reserve(key, owner, formato)
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+        except BaseException:
+            self.discard(tmp_path)
+            raise
+        return self.adopt(key, owner, formato, tmp_path, checkout)
+
+    def reserve(self, key: str, owner, formato: str) -> str:
+        """Ruta temporal dentro del cache donde otro proceso puede escribir el documento"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self._filename(owner, key, formato))
+        return f"{path}.{os.getpid()}.{get_ident()}.tmp"
+
+    def discard(self, tmp_path: str):
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def adopt(self, key: str, owner, formato: str, tmp_path: str, checkout: bool = False) -> str:
+        """Mover un temporal ya escrito a su ruta final y registrarlo en el LRU.
+
+        Con checkout=True devuelve una ruta privada, como checkout().
+        """
+        path = os.path.join(self.directory, self._filename(owner, key, formato))
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._scan()
+            if key in self._entries:
+                self.total_bytes -= self._entries[key][1]
+                self._owners.get(owner, set()).discard(key)
+                del self._entries[key]
+            self._record(key, path, size, owner)
+            self._evict(keep=key)
+            return self._link(path) if checkout else path
+
+    def get_or_render(self, tipo: str, objeto_id: int, formato: str, snapshot, render=None, write=None) -> str:
+        """Devolver una ruta privada al documento (ver checkout), renderizándolo
+        sólo si no está en cache. El llamador la libera con discard().
+
+        render(snapshot) devuelve bytes; write(snapshot, f) escribe al archivo
+        (los generadores de Excel en modo streaming usan esta variante).
+        """
+        key = snapshot_digest(snapshot, formato)
+        path = self.checkout(key)
+        if path:
+            return path
+        if write is not None:
+            return self.put_stream(key, (tipo, objeto_id), formato, lambda f: write(snapshot, f), checkout=True)
+        return self.put(key, (tipo, objeto_id), formato, render(snapshot), checkout=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def invalidate(self, tipo: str, objeto_id: int):
+        with self._lock:
+            self._scan()
+            for key in list(self._owners.get((tipo, objeto_id), ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+document_cache = DocumentCache(DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_MB * 1024 * 1024)
+
+def invalidate_rutina_documents(rutina_id: int):
+    document_cache.invalidate("rutina", rutina_id)
+
+def invalidate_dieta_documents(dieta_id: int):
+    document_cache.invalidate("dieta", dieta_id)
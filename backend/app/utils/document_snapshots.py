@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+from datetime import datetime
+import hashlib
+import json
+
+# Copias planas (picklables y sin sesión) de lo que leen los generadores de
+# PDF/Excel. Exponen los mismos atributos que los modelos, así los
+# generadores aceptan indistintamente el ORM o el snapshot.
+
+# Subir cuando cambie la salida de algún generador para no servir documentos viejos
+DOCUMENT_RENDER_VERSION = 2
+
+def _alumno_ref(alumno):
+    return SimpleNamespace(id=alumno.id, nombre=alumno.nombre) if alumno else None
+
+def snapshot_rutina(rutina) -> SimpleNamespace:
+    ejercicios = sorted(rutina.ejercicios, key=lambda e: e.id)
+    return SimpleNamespace(
+        id=rutina.id,
+        nombre=rutina.nombre,
+        fecha_inicio=rutina.fecha_inicio,
+        fecha_vencimiento=rutina.fecha_vencimiento,
+        notas=rutina.notas,
+        entrenamientos_semana=rutina.entrenamientos_semana,
+        alumno=_alumno_ref(rutina.alumno),
+        ejercicios=[
+            SimpleNamespace(
+                id=e.id,
+                dia=e.dia,
+                series=e.series,
+                repeticiones=e.repeticiones,
+                peso=e.peso,
+                descanso=e.descanso,
+                notas=e.notas,
+                ejercicio_base=SimpleNamespace(
+                    id=e.ejercicio_base.id,
+                    nombre=e.ejercicio_base.nombre,
+                    categoria=e.ejercicio_base.categoria
+                ) if e.ejercicio_base else None
+            )
+            for e in ejercicios
+        ]
+    )
+
+def snapshot_dieta(dieta) -> SimpleNamespace:
+    comidas = sorted(dieta.comidas, key=lambda c: c.id)
+    return SimpleNamespace(
+        id=dieta.id,
+        nombre=dieta.nombre,
+        fecha_inicio=dieta.fecha_inicio,
+        notas=dieta.notas,
+        alumno=_alumno_ref(dieta.alumno),
+        comidas=[
+            SimpleNamespace(
+                id=c.id,
+                nombre=c.nombre,
+                dia=c.dia,
+                orden=c.orden,
+                alimentos=[
+                    SimpleNamespace(
+                        id=ca.id,
+                        cantidad_gramos=ca.cantidad_gramos,
+                        alimento=SimpleNamespace(
+                            id=ca.alimento.id,
+                            nombre=ca.alimento.nombre,
+                            calorias_100g=ca.alimento.calorias_100g,
+                            proteinas_100g=ca.alimento.proteinas_100g,
+                            carbohidratos_100g=ca.alimento.carbohidratos_100g,
+                            grasas_100g=ca.alimento.grasas_100g
+                        ) if ca.alimento else None
+                    )
+                    for ca in sorted(c.alimentos, key=lambda ca: ca.id)
+                ]
+            )
+            for c in comidas
+        ]
+    )
+
+def _plain(value):
+    if isinstance(value, SimpleNamespace):
+        return {k: _plain(v) for k, v in vars(value).items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def snapshot_digest(snapshot: SimpleNamespace, formato: str) -> str:
+    """Hash del contenido a renderizar: mismo snapshot y formato => mismo archivo"""
+    canonical = json.dumps(
+        {"v": DOCUMENT_RENDER_VERSION, "formato": formato, "data": _plain(snapshot)},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,88 @@
+from sqlalchemy.orm import Session
+from threading import Lock
+from app.models.models import EjercicioBase
+from app.schemas.responses import EjercicioBaseOut
+from app.utils.search_index import TextSearchIndex
+from app.utils.etag import make_etag
+import orjson
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Recarga periódica para ver altas hechas por otros workers o por seeds
+EJERCICIO_CATALOG_REFRESH_SECONDS = int(os.getenv("EJERCICIO_CATALOG_REFRESH_SECONDS", 300))
+
+class CatalogSnapshot:
+    """Versión inmutable del catálogo: items ordenados, JSON pre-serializado y ETag"""
+
+    def __init__(self, version: int, items: list):
+        self.version = version
+        self.items = items
+        self.body = orjson.dumps(items)
+        self.etag = make_etag(self.body)
+        self.loaded_at = time.monotonic()
+
+def _sort_key(item: dict):
+    # Sin distinguir mayúsculas, igual al cargar que al agregar: el orden no
+    # depende de la collation de la DB
+    return ((item["categoria"] or "").casefold(), (item["nombre"] or "").casefold(), item["id"])
+
+def _ejercicio_payload(ejercicio: EjercicioBase) -> dict:
+    return EjercicioBaseOut.model_validate(ejercicio).model_dump(mode="json")
+
+_lock = Lock()
+_snapshot = None
+_version = 0
+ejercicio_index = TextSearchIndex()
+
+def _publish(items: list, reindex: bool) -> CatalogSnapshot:
+    """Reemplazar el snapshot incrementando la versión (llamar con _lock tomado)"""
+    global _snapshot, _version
+    _version += 1
+    if reindex:
+        ejercicio_index.rebuild((item["id"], item["nombre"], item) for item in items)
+    _snapshot = CatalogSnapshot(_version, items)
+    return _snapshot
+
+def load_ejercicio_catalog(db: Session) -> CatalogSnapshot:
+    """Leer la tabla completa y, si cambió, publicar una versión nueva con su índice"""
+    ejercicios = db.query(EjercicioBase).all()
+    items = sorted((_ejercicio_payload(e) for e in ejercicios), key=_sort_key)
+    with _lock:
+        if _snapshot is not None and _snapshot.items == items:
+            # Recarga periódica sin cambios: misma versión y mismo ETag
+            _snapshot.loaded_at = time.monotonic()
+            return _snapshot
+        return _publish(items, reindex=True)
+
+def get_ejercicio_catalog(db: Session) -> CatalogSnapshot:
+    snapshot = _snapshot
+    if snapshot is None or time.monotonic() - snapshot.loaded_at > EJERCICIO_CATALOG_REFRESH_SECONDS:
+        snapshot = load_ejercicio_catalog(db)
+    return snapshot
+
+def add_ejercicio_to_catalog(ejercicio: EjercicioBase):
+    """Incorporar un ejercicio recién creado y avanzar la versión del catálogo"""
+    item = _ejercicio_payload(ejercicio)
+    with _lock:
+        if _snapshot is None:
+            return
+        items = [i for i in _snapshot.items if i["id"] != item["id"]]
+        items.append(item)
+        items.sort(key=_sort_key)
+        ejercicio_index.add(item["id"], item["nombre"], item)
+        _publish(items, reindex=False)
+
+def invalidate_ejercicio_catalog():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+def search_ejercicios_catalog(db: Session, query: str, limit: int = 10) -> list:
+    get_ejercicio_catalog(db)
+    return ejercicio_index.search(query, limit)
+
+def get_catalog_version() -> int:
+    return _version
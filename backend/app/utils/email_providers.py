@@ -0,0 +1,146 @@
+from threading import Lock
+from typing import Optional, List
+from requests.adapters import HTTPAdapter
+import itertools
+import requests
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@fittracker.com")
+# resend (producción) o stub (desarrollo/tests, no sale nada a la red)
+EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "resend")
+EMAIL_HTTP_TIMEOUT_SECONDS = float(os.getenv("EMAIL_HTTP_TIMEOUT_SECONDS", 10))
+# Conexiones keep-alive al proveedor (una por worker alcanza)
+EMAIL_HTTP_POOL_SIZE = int(os.getenv("EMAIL_HTTP_POOL_SIZE", 8))
+
+RESEND_URL = "https://api.resend.com/emails"
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+# Máximo de emails por llamada al endpoint batch de Resend
+RESEND_BATCH_LIMIT = 100
+
+class EmailDeliveryError(Exception):
+    """Error del proveedor; retryable indica si vale la pena reintentar"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class ResendProvider:
+    name = "resend"
+    batch_limit = RESEND_BATCH_LIMIT
+
+    def __init__(self, api_key: Optional[str], from_email: str):
+        self.api_key = api_key
+        self.from_email = from_email
+        # Session compartida entre threads: reutiliza conexiones TLS en lugar
+        # de un handshake por email
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=EMAIL_HTTP_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _post(self, url: str, payload, idempotency_key: str):
+        if not self.api_key:
+            raise EmailDeliveryError("RESEND_API_KEY not configured", retryable=False)
+        try:
+            response = self.session.post(
+                url,
+                json=payload,
+                headers={"Idempotency-Key": idempotency_key},
+                timeout=EMAIL_HTTP_TIMEOUT_SECONDS
+            )
+        except requests.RequestException as e:
+            raise EmailDeliveryError(f"Network error: {e}")
+
+        if response.status_code == 200:
+            return response.json()
+        # 429 y 5xx son transitorios; el resto (validación, dominio) no se arregla reintentando
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise EmailDeliveryError(f"Resend {response.status_code}: {response.text[:500]}", retryable=retryable)
+
+    def send(self, to: str, subject: str, html: str, idempotency_key: str) -> str:
+        """Enviar un email y devolver el id del proveedor.
+
+        Resend deduplica por Idempotency-Key: si el worker se cae después de
+        enviar y antes de marcar el email, el reintento no llega dos veces.
+        """
+        payload = {"from": self.from_email, "to": [to], "subject": subject, "html": html}
+        return self._post(RESEND_URL, payload, idempotency_key).get("id", "")
+
+    def send_batch(self, messages: List[dict], idempotency_key: str) -> List[str]:
+        """Enviar hasta 100 emails ({to, subject, html}) en una sola llamada.
+
+        Devuelve los ids en el mismo orden. Resend valida el lote entero: un
+        error de validación rechaza todos los emails del lote. El
+        Idempotency-Key es del lote: un reintento sólo se deduplica si lleva
+        exactamente los mismos emails.
+        """
+        if len(messages) > self.batch_limit:
+            raise ValueError(f"Batch too large: {len(messages)} > {self.batch_limit}")
+        payload = [
+            {"from": self.from_email, "to": [m["to"]], "subject": m["subject"], "html": m["html"]}
+            for m in messages
+        ]
+        data = self._post(RESEND_BATCH_URL, payload, idempotency_key).get("data") or []
+        return [item.get("id", "") for item in data]
+
+class StubProvider:
+    """Proveedor local: guarda los emails en memoria en lugar de enviarlos"""
+
+    name = "stub"
+    configured = True
+    batch_limit = RESEND_BATCH_LIMIT
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ids = itertools.count(1)
+        self.sent = []
+        self.batches = 0
+        self._by_key = {}
+
+    def send(self, to: str, subject: str, html: str, idempotency_key: str) -> str:
+        with self._lock:
+            # Misma semántica de idempotencia que Resend
+            if idempotency_key in self._by_key:
+                return self._by_key[idempotency_key]
+            provider_id = f"stub-{next(self._ids)}"
+            self._by_key[idempotency_key] = provider_id
+            self.sent.append({"to": to, "subject": subject, "html": html, "idempotency_key": idempotency_key})
+            return provider_id
+
+    def send_batch(self, messages: List[dict], idempotency_key: str) -> List[str]:
+        if len(messages) > self.batch_limit:
+            raise ValueError(f"Batch too large: {len(messages)} > {self.batch_limit}")
+        with self._lock:
+            # Como Resend: el lote se deduplica por su key, no por email
+            if idempotency_key in self._by_key:
+                return self._by_key[idempotency_key]
+            self.batches += 1
+            provider_ids = []
+            for m in messages:
+                provider_ids.append(f"stub-{next(self._ids)}")
+                self.sent.append({"to": m["to"], "subject": m["subject"], "html": m["html"], "idempotency_key": idempotency_key})
+            self._by_key[idempotency_key] = provider_ids
+            return provider_ids
+
+    def clear(self):
+        with self._lock:
+            self.sent.clear()
+            self.batches = 0
+            self._by_key.clear()
+
+def build_email_provider(name: str = EMAIL_PROVIDER):
+    if name == "stub":
+        return StubProvider()
+    if name == "resend":
+        return ResendProvider(RESEND_API_KEY, FROM_EMAIL)
+    raise ValueError(f"Unknown EMAIL_PROVIDER: {name}")
+
+email_provider = build_email_provider()
@@ -1,69 +1,56 @@
-import os
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
-import html
+from typing import List
+from app.utils.email_providers import email_provider, EmailDeliveryError
+from app.utils.email_templates import EmailTemplate, PAYMENT_REMINDER_HTML, PAYMENT_REMINDER_SUBJECT
+import uuid
 
-load_dotenv()
-
-RESEND_API_KEY = os.getenv("RESEND_API_KEY")
-FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@fittracker.com")
+def payment_reminder_template(fecha: datetime = None) -> EmailTemplate:
+    """Plantilla del recordatorio con la fecha del envío ya resuelta"""
+    return PAYMENT_REMINDER_HTML.bind(fecha=(fecha or datetime.now()).strftime('%d/%m/%Y'))
 
 def send_payment_reminder(alumno_email: str, alumno_nombre: str, coach_nombre: str):
     """Enviar recordatorio de pago usando Resend"""
-    if not RESEND_API_KEY:
+    if not email_provider.configured:
         print("RESEND_API_KEY no configurado")
         return False
-    
-    url = "https://api.resend.com/emails"
-    
-    headers = {
-        "Authorization": f"Bearer {RESEND_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "from": FROM_EMAIL,
-        "to": [alumno_email],
-        "subject": "Recordatorio de Pago - FitTracker",
-        "html": f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2563eb;">Recordatorio de Pago</h2>
-                
-                <p>Hola <strong>{html.escape(alumno_nombre)}</strong>,</p>
-                
-                <p>Este es un recordatorio amigable de que tu mensualidad de entrenamiento está próxima a vencer.</p>
-                
-                <div style="background-color: #f3f4f6; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                    <p><strong>Coach:</strong> {html.escape(coach_nombre)}</p>
-                    <p><strong>Fecha de vencimiento:</strong> {datetime.now().strftime('%d/%m/%Y')}</p>
-                </div>
-                
-                <p>Por favor, ponte en contacto con tu coach para coordinar el pago.</p>
-                
-                <p>¡Gracias por confiar en nosotros para tu entrenamiento!</p>
-                
-                <hr style="margin: 30px 0; border: none; border-top: 1px solid #e5e7eb;">
-                <p style="font-size: 12px; color: #6b7280;">
-                    Este es un mensaje automático de FitTracker. Si no deseas recibir estos recordatorios, 
-                    contacta a tu coach para desactivar las notificaciones.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-    }
-    
+
+    html_content = payment_reminder_template().render(alumno=alumno_nombre, coach=coach_nombre)
     try:
-        response = requests.post(url, json=data, headers=headers)
-        if response.status_code == 200:
-            print(f"Email enviado exitosamente a {alumno_email}")
-            return True
-        else:
-            print(f"Error enviando email: {response.status_code} - {response.text}")
-            return False
-    except Exception as e:
+        email_provider.send(alumno_email, PAYMENT_REMINDER_SUBJECT, html_content, uuid.uuid4().hex)
+        print(f"Email enviado exitosamente a {alumno_email}")
+        return True
+    except EmailDeliveryError as e:
         print(f"Error enviando email: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+def send_payment_reminders(reminders: List[dict], batch_key: str) -> List[bool]:
+    """Enviar recordatorios ({email, alumno, coach}) en lotes de hasta 100 por
+    llamada; devuelve un bool por recordatorio, en orden.
+
+    batch_key identifica al lote ante el proveedor (Resend deduplica por lote,
+    no por email): reenviar los mismos recordatorios con el mismo key no
+    duplica envíos.
+    """
+    if not email_provider.configured:
+        print("RESEND_API_KEY no configurado")
+        return [False] * len(reminders)
+
+    template = payment_reminder_template()
+    results = []
+    for start in range(0, len(reminders), email_provider.batch_limit):
+        chunk = reminders[start:start + email_provider.batch_limit]
+        messages = [
+            {
+                "to": r["email"],
+                "subject": PAYMENT_REMINDER_SUBJECT,
+                "html": template.render(alumno=r["alumno"], coach=r["coach"])
+            }
+            for r in chunk
+        ]
+        try:
+            email_provider.send_batch(messages, f"{batch_key}:{start}")
+            results.extend([True] * len(chunk))
+        except EmailDeliveryError as e:
+            print(f"Error enviando lote de {len(chunk)} recordatorios: {str(e)}")
+            results.extend([False] * len(chunk))
+    return results
@@ -0,0 +1,110 @@
+import html
+import re
+
+# Plantillas de email compiladas una vez por proceso.
+#
+# El HTML se parte en trozos fijos y campos {nombre} al importar el módulo.
+# bind() resuelve los campos comunes a todo un envío (coach, monto, fechas)
+# y devuelve otra plantilla con los trozos fijos ya unidos, así por
+# destinatario sólo queda un join con el nombre del alumno.
+
+_FIELD = re.compile(r"\{(\w+)\}")
+
+class SafeHtml(str):
+    """Valor que ya es HTML válido y no se escapa al sustituir"""
+    pass
+
+class EmailTemplate:
+    __slots__ = ("_parts", "escape")
+
+    def __init__(self, source: str, escape: bool = True, _parts: list = None):
+        # Índices pares: texto fijo; impares: nombre de campo
+        self._parts = _parts if _parts is not None else _FIELD.split(source)
+        self.escape = escape
+
+    @property
+    def fields(self) -> set:
+        return set(self._parts[1::2])
+
+    def _value(self, value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, SafeHtml) or not self.escape:
+            return str(value)
+        return html.escape(str(value))
+
+    def bind(self, **values) -> "EmailTemplate":
+        """Sustituir parte de los campos y devolver la plantilla resultante"""
+        parts = [self._parts[0]]
+        for i in range(1, len(self._parts), 2):
+            name, text = self._parts[i], self._parts[i + 1]
+            if name in values:
+                parts[-1] += self._value(values[name]) + text
+            else:
+                parts.extend((name, text))
+        return EmailTemplate("", self.escape, parts)
+
+    def render(self, **values) -> str:
+        parts = self._parts
+        if len(parts) == 1:
+            return parts[0]
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            out.append(self._value(values[parts[i]]))
+            out.append(parts[i + 1])
+        return "".join(out)
+
+def optional_paragraph(text: str) -> SafeHtml:
+    return SafeHtml(f"<p>{html.escape(text)}</p>") if text else SafeHtml("")
+
+QUOTA_INCREASE_SUBJECT = EmailTemplate("Actualización de Cuota - {coach}", escape=False)
+QUOTA_INCREASE_HTML = EmailTemplate("""
+                <h2>Actualización de Cuota - {coach}</h2>
+                <p>Hola {alumno},</p>
+                <p>Te informamos que a partir del próximo mes, la cuota será de <strong>${monto}</strong>.</p>
+                {mensaje}
+                <p>Gracias por tu comprensión.</p>
+                <p>Saludos,<br>{coach}</p>
+                """)
+
+ABSENCE_NOTICE_SUBJECT = EmailTemplate("Aviso de Ausencia - {coach}", escape=False)
+ABSENCE_NOTICE_HTML = EmailTemplate("""
+                <h2>Aviso de Ausencia - {coach}</h2>
+                <p>Hola {alumno},</p>
+                <p>Te informamos que estaré ausente desde el <strong>{desde}</strong> hasta el <strong>{hasta}</strong>.</p>
+                <p><strong>Motivo:</strong> {motivo}</p>
+                {mensaje}
+                <p>Durante este período no habrá entrenamientos. Nos pondremos en contacto para reprogramar.</p>
+                <p>Gracias por tu comprensión.</p>
+                <p>Saludos,<br>{coach}</p>
+                """)
+
+PAYMENT_REMINDER_SUBJECT = "Recordatorio de Pago - FitTracker"
+PAYMENT_REMINDER_HTML = EmailTemplate("""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2563eb;">Recordatorio de Pago</h2>
+
+                <p>Hola <strong>{alumno}</strong>,</p>
+
+                <p>Este es un recordatorio amigable de que tu mensualidad de entrenamiento está próxima a vencer.</p>
+
+                <div style="background-color: #f3f4f6; padding: 15px; border-radius: 8px; margin: 20px 0;">
+                    <p><strong>Coach:</strong> {coach}</p>
+                    <p><strong>Fecha de vencimiento:</strong> {fecha}</p>
+                </div>
+
+                <p>Por favor, ponte en contacto con tu coach para coordinar el pago.</p>
+
+                <p>¡Gracias por confiar en nosotros para tu entrenamiento!</p>
+
+                <hr style="margin: 30px 0; border: none; border-top: 1px solid #e5e7eb;">
+                <p style="font-size: 12px; color: #6b7280;">
+                    Este es un mensaje automático de FitTracker. Si no deseas recibir estos recordatorios,
+                    contacta a tu coach para desactivar las notificaciones.
+                </p>
+            </div>
+        </body>
+        </html>
+        """)
@@ -0,0 +1,22 @@
+from fastapi import Request, Response
+import hashlib
+
+def make_etag(content: bytes) -> str:
+    return f'"{hashlib.sha1(content).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (value.strip() for value in header.split(","))
+    return any(value.removeprefix("W/") == etag.removeprefix("W/") for value in candidates)
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """200 con el cuerpo ya serializado, o 304 si el cliente tiene la misma versión"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from threading import Lock, Thread, Event
+from typing import Optional
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# memory (un solo proceso) o redis (varios workers de uvicorn comparten eventos)
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "fittracker:events")
+# Eventos pendientes por conexión antes de considerarla atrasada
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100))
+
+# Evento que recibe una conexión que se atrasó: se descartaron eventos y el
+# cliente tiene que volver a pedir el estado (contador, listado)
+RESYNC_EVENT = "resync"
+
+class Subscription:
+    """Cola acotada de una conexión SSE, consumida desde su event loop"""
+
+    def __init__(self, coach_id: int, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.coach_id = coach_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.dropped = 0
+        self.lagged = False
+
+    def offer(self, event: dict):
+        """Corre en el loop de la conexión; nunca bloquea al que publica"""
+        if self.lagged:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: vaciar y pedirle un resync en lugar de acumular
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.lagged = True
+            self.queue.put_nowait({"event": RESYNC_EVENT, "data": {}})
+
+    async def get(self) -> dict:
+        event = await self.queue.get()
+        if event["event"] == RESYNC_EVENT:
+            self.lagged = False
+        return event
+
+class InMemoryBroker:
+    """Pub/sub dentro del proceso. publish() se puede llamar desde cualquier
+    thread (rutas sync, workers, scheduler)"""
+    name = "memory"
+
+    def __init__(self, max_queue: int = EVENT_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self._subscriptions = defaultdict(set)
+        self._lock = Lock()
+        self.published = 0
+
+    def subscribe(self, coach_id: int) -> Subscription:
+        subscription = Subscription(coach_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscriptions[coach_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.coach_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.coach_id]
+
+    def publish(self, coach_id: int, event: str, data: dict):
+        self._dispatch(coach_id, {"event": event, "data": data})
+
+    def _dispatch(self, coach_id: int, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(coach_id, ()))
+        self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # El loop ya cerró (shutdown); la conexión se va a desuscribir sola
+                pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscriptions = [s for group in self._subscriptions.values() for s in group]
+        return {
+            "broker": self.name,
+            "coaches": len({s.coach_id for s in subscriptions}),
+            "connections": len(subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscriptions)
+        }
+
+class RedisBroker(InMemoryBroker):
+    """Publica en un canal de Redis; un thread por proceso escucha el canal y
+    reparte a las conexiones locales. Requiere el paquete redis."""
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, channel: str = EVENT_CHANNEL, max_queue: int = EVENT_QUEUE_SIZE):
+        super().__init__(max_queue)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BROKER=redis requiere 'pip install redis'") from e
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._pubsub = None
+
+    def publish(self, coach_id: int, event: str, data: dict):
+        message = json.dumps({"coach_id": coach_id, "event": event, "data": data}, default=str)
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            # Los eventos son best-effort: el cliente se resincroniza al reconectar
+            logger.warning(f"Could not publish event to redis: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._listen, name=f"event-broker-{uuid.uuid4().hex[:6]}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._pubsub is not None:
+            self._pubsub.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(self.channel)
+                while not self._stop.is_set():
+                    message = self._pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    payload = json.loads(message["data"])
+                    self._dispatch(payload["coach_id"], {"event": payload["event"], "data": payload["data"]})
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                logger.error(f"Event broker listener error, reconnecting: {e}")
+                self._stop.wait(1.0)
+
+def build_event_broker(name: str = EVENT_BROKER):
+    if name == "memory":
+        return InMemoryBroker()
+    if name == "redis":
+        return RedisBroker()
+    raise ValueError(f"Unknown EVENT_BROKER: {name}")
+
+event_broker = build_event_broker()
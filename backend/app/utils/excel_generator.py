@@ -1,92 +1,65 @@
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill
-from io import BytesIO
 from app.models.models import Rutina
-import re
+from app.utils.excel_writer import new_sheet, styled, workbook_bytes, iter_workbook_chunks
+
+# Estilos compartidos entre renders
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+DAY_FONT = Font(bold=True, color="000000")
+DAY_FILL = PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid")
+
+COLUMN_WIDTHS = {'A': 20, 'B': 10, 'C': 15, 'D': 12, 'E': 15, 'F': 20}
+EJERCICIO_HEADERS = ["Ejercicio", "Series", "Repeticiones", "Peso (kg)", "Descanso (seg)", "Notas"]
+
+def write_rutina_excel(rutina: Rutina, target):
+    """Escribir el Excel de la rutina en target (ruta o archivo binario)"""
+    wb, ws = new_sheet("Rutina", COLUMN_WIDTHS)
 
-def generate_rutina_excel(rutina: Rutina):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Rutina"
-    
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    day_font = Font(bold=True, color="000000")
-    day_fill = PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid")
-    
     # Información de la rutina
-    ws['A1'] = "Rutina:"
-    ws['B1'] = rutina.nombre
-    ws['A2'] = "Alumno:"
-    ws['B2'] = rutina.alumno.nombre if rutina.alumno else 'Sin asignar'
-    ws['A3'] = "Fecha de inicio:"
-    ws['B3'] = rutina.fecha_inicio.strftime('%d/%m/%Y') if rutina.fecha_inicio else 'No especificada'
-    ws['A4'] = "Entrenamientos/semana:"
-    ws['B4'] = rutina.entrenamientos_semana
-    ws['A5'] = "Notas:"
-    ws['B5'] = rutina.notas or 'Sin notas'
-    
+    ws.append(["Rutina:", rutina.nombre])
+    ws.append(["Alumno:", rutina.alumno.nombre if rutina.alumno else 'Sin asignar'])
+    ws.append(["Fecha de inicio:", rutina.fecha_inicio.strftime('%d/%m/%Y') if rutina.fecha_inicio else 'No especificada'])
+    ws.append(["Entrenamientos/semana:", rutina.entrenamientos_semana])
+    ws.append(["Notas:", rutina.notas or 'Sin notas'])
+    ws.append([])
+
     # Organizar ejercicios por día
     dias_ejercicios = {}
     for i in range(1, rutina.entrenamientos_semana + 1):
         dias_ejercicios[i] = []
-    
+
     for ejercicio in rutina.ejercicios:
         dia = ejercicio.dia if ejercicio.dia else 1
         if dia not in dias_ejercicios:
             dias_ejercicios[dia] = []
         dias_ejercicios[dia].append(ejercicio)
-    
-    row = 7
-    
+
     # Generar contenido por día
     for dia in range(1, rutina.entrenamientos_semana + 1):
         if dias_ejercicios[dia]:
             # Header del día
-            ws[f'A{row}'] = f"DÍA {dia}"
-            ws[f'A{row}'].font = day_font
-            ws[f'A{row}'].fill = day_fill
-            for col in ['B', 'C', 'D', 'E', 'F']:
-                ws[f'{col}{row}'].fill = day_fill
-            row += 1
-            
+            ws.append([styled(ws, f"DÍA {dia}", DAY_FONT, DAY_FILL)] + [styled(ws, fill=DAY_FILL) for _ in range(5)])
+
             # Headers de ejercicios
-            ws[f'A{row}'] = "Ejercicio"
-            ws[f'B{row}'] = "Series"
-            ws[f'C{row}'] = "Repeticiones"
-            ws[f'D{row}'] = "Peso (kg)"
-            ws[f'E{row}'] = "Descanso (seg)"
-            ws[f'F{row}'] = "Notas"
-            
-            for cell in [f'A{row}', f'B{row}', f'C{row}', f'D{row}', f'E{row}', f'F{row}']:
-                ws[cell].font = header_font
-                ws[cell].fill = header_fill
-            row += 1
-            
+            ws.append([styled(ws, header, HEADER_FONT, HEADER_FILL) for header in EJERCICIO_HEADERS])
+
             # Ejercicios del día
             for ejercicio in dias_ejercicios[dia]:
-                ws[f'A{row}'] = ejercicio.ejercicio_base.nombre
-                ws[f'B{row}'] = ejercicio.series
-                ws[f'C{row}'] = ejercicio.repeticiones
-                ws[f'D{row}'] = ejercicio.peso or '-'
-                ws[f'E{row}'] = ejercicio.descanso
-                ws[f'F{row}'] = ejercicio.notas or '-'
-                row += 1
-            
-            row += 1  # Espacio entre días
-    
-    # Ajustar ancho de columnas
-    ws.column_dimensions['A'].width = 20
-    ws.column_dimensions['B'].width = 10
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 20
-    
-    # Guardar en BytesIO
-    excel_buffer = BytesIO()
-    wb.save(excel_buffer)
-    excel_buffer.seek(0)
-    
-    return excel_buffer.getvalue()
\ No newline at end of file
+                ws.append([
+                    ejercicio.ejercicio_base.nombre,
+                    ejercicio.series,
+                    ejercicio.repeticiones,
+                    ejercicio.peso or '-',
+                    ejercicio.descanso,
+                    ejercicio.notas or '-'
+                ])
+
+            ws.append([])  # Espacio entre días
+
+    wb.save(target)
+
+def generate_rutina_excel(rutina: Rutina):
+    return workbook_bytes(write_rutina_excel, rutina)
+
+def iter_rutina_excel(rutina: Rutina):
+    return iter_workbook_chunks(write_rutina_excel, rutina)
@@ -0,0 +1,43 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from io import BytesIO
+import tempfile
+
+# Helpers comunes para los generadores de Excel en modo write_only: las filas
+# se vuelcan a un XML temporal a medida que se agregan, así la memoria no
+# crece con el tamaño del plan. Los estilos se crean una vez por proceso en
+# cada generador y se reutilizan en todas las celdas.
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def new_sheet(title: str, widths: dict):
+    """Workbook write_only con una hoja; los anchos deben fijarse antes de escribir filas"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for column, width in widths.items():
+        ws.column_dimensions[column].width = width
+    return wb, ws
+
+def styled(ws, value=None, font=None, fill=None) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    return cell
+
+def workbook_bytes(write, obj) -> bytes:
+    buffer = BytesIO()
+    write(obj, buffer)
+    return buffer.getvalue()
+
+def iter_workbook_chunks(write, obj, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Escribir el libro en un archivo temporal y devolverlo por partes (StreamingResponse)"""
+    with tempfile.TemporaryFile() as f:
+        write(obj, f)
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,34 @@
+from sqlalchemy.orm import selectinload, joinedload
+from app.models.models import (
+    Rutina, Ejercicio, RutinaPlantilla, EjercicioPlantilla,
+    Dieta, Comida, ComidaAlimento, DietaPlantilla, ComidaPlantilla, ComidaPlantillaAlimento
+)
+
+# Estrategia de carga compartida por los endpoints de listado y exportación:
+# selectinload para colecciones (una consulta IN por nivel, sin producto
+# cartesiano) y joinedload para relaciones many-to-one.
+
+def rutina_loader_options(include_alumno: bool = True) -> list:
+    options = [selectinload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base)]
+    if include_alumno:
+        options.append(joinedload(Rutina.alumno))
+    return options
+
+def rutina_plantilla_loader_options() -> list:
+    return [selectinload(RutinaPlantilla.ejercicios).joinedload(EjercicioPlantilla.ejercicio_base)]
+
+def comida_loader_options() -> list:
+    return [selectinload(Comida.alimentos).joinedload(ComidaAlimento.alimento)]
+
+def dieta_loader_options(include_alumno: bool = True) -> list:
+    options = [
+        selectinload(Dieta.comidas).selectinload(Comida.alimentos).joinedload(ComidaAlimento.alimento)
+    ]
+    if include_alumno:
+        options.append(joinedload(Dieta.alumno))
+    return options
+
+def dieta_plantilla_loader_options() -> list:
+    return [
+        selectinload(DietaPlantilla.comidas).selectinload(ComidaPlantilla.alimentos).joinedload(ComidaPlantillaAlimento.alimento)
+    ]
@@ -0,0 +1,63 @@
+from typing import Dict
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import Notification, NotificationCounter
+
+# Contador de no leídas por coach, mantenido en la misma transacción que el
+# cambio sobre notifications. Los ajustes son UPDATE relativos (no_leidas + delta)
+# para que requests concurrentes no se pisen.
+
+def _count_unread(db: Session, coach_id: int) -> int:
+    return db.execute(
+        select(func.count(Notification.id)).where(
+            Notification.coach_id == coach_id,
+            Notification.leida == False
+        )
+    ).scalar_one()
+
+def _create_counter(db: Session, coach_id: int, delta: int = 0) -> int:
+    """Crear el contador desde un COUNT (coaches sin fila todavía).
+
+    El COUNT ya ve los cambios pendientes de esta transacción, así que no hace
+    falta sumar el delta; si otro request creó la fila en paralelo, su COUNT
+    no veía nuestros cambios y sí hay que aplicarlo.
+    """
+    db.flush()
+    count = _count_unread(db, coach_id)
+    try:
+        with db.begin_nested():
+            db.add(NotificationCounter(coach_id=coach_id, no_leidas=count))
+    except IntegrityError:
+        if delta:
+            _apply_delta(db, coach_id, delta)
+        return db.get(NotificationCounter, coach_id, populate_existing=True).no_leidas
+    return count
+
+def _apply_delta(db: Session, coach_id: int, delta: int) -> int:
+    return db.execute(
+        update(NotificationCounter).where(
+            NotificationCounter.coach_id == coach_id
+        ).values(no_leidas=NotificationCounter.no_leidas + delta)
+    ).rowcount
+
+def adjust_unread_count(db: Session, coach_id: int, delta: int):
+    """Sumar delta a las no leídas del coach; no hace commit"""
+    if not delta or coach_id is None:
+        return
+    if not _apply_delta(db, coach_id, delta):
+        _create_counter(db, coach_id, delta)
+
+def adjust_unread_counts(db: Session, deltas: Dict[int, int]):
+    for coach_id, delta in deltas.items():
+        adjust_unread_count(db, coach_id, delta)
+
+def get_unread_count(db: Session, coach_id: int) -> int:
+    """Lectura por clave primaria; crea el contador la primera vez"""
+    no_leidas = db.execute(
+        select(NotificationCounter.no_leidas).where(NotificationCounter.coach_id == coach_id)
+    ).scalar_one_or_none()
+    if no_leidas is None:
+        no_leidas = _create_counter(db, coach_id)
+        db.commit()
+    return max(no_leidas, 0)
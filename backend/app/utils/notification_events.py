@@ -0,0 +1,24 @@
+from typing import Iterable, List
+from sqlalchemy.orm import Session
+from app.models.models import Notification
+from app.schemas.responses import NotificationEventOut
+from app.utils.event_broker import event_broker
+from app.utils.notification_counters import get_unread_count
+
+# Eventos del canal GET /notifications/stream. Se publican después del commit
+# para que el cliente nunca vea un estado que después se revierte.
+UNREAD_COUNT_EVENT = "unread_count"
+NOTIFICATION_EVENT = "notification"
+
+def publish_unread_count(db: Session, coach_id: int):
+    event_broker.publish(coach_id, UNREAD_COUNT_EVENT, {"count": get_unread_count(db, coach_id)})
+
+def notification_events(notifications: Iterable[Notification]) -> List[dict]:
+    """Serializar antes del commit (después de un flush, con los ids ya
+    asignados): tras el commit las instancias quedan expiradas y cada una
+    costaría un SELECT para recargarse."""
+    return [NotificationEventOut.model_validate(n).model_dump(mode="json") for n in notifications]
+
+def publish_notifications(coach_id: int, events: Iterable[dict]):
+    for event in events:
+        event_broker.publish(coach_id, NOTIFICATION_EVENT, event)
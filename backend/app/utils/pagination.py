@@ -0,0 +1,22 @@
+import base64
+import json
+
+# Tope de elementos por página para los listados paginados
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+
+def encode_cursor(values: dict) -> str:
+    """Serializar la posición de la última fila como token opaco (base64 url-safe)"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str) -> dict:
+    """Decodificar un token de encode_cursor; lanza ValueError si es inválido"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt libera el GIL, así que un pool de threads alcanza para paralelizar
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", 4))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", 32))
+
+class PasswordPoolSaturated(Exception):
+    """La cola de hashing está llena; el caller debe responder 503"""
+    pass
+
+class PasswordPool:
+    """Executor dedicado y acotado para operaciones de bcrypt"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        # Cada tarea (en ejecución o en cola) ocupa un slot
+        self._slots = BoundedSemaphore(max_workers + max_queue)
+        self._lock = Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolSaturated("Password hashing queue is full")
+
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+        queued_at = time.perf_counter()
+
+        def run():
+            started_at = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self.pending -= 1
+                    self.total_wait_seconds += started_at - queued_at
+                    self.total_run_seconds += finished_at - started_at
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / finished, 2) if finished else 0.0,
+                "avg_run_ms": round(self.total_run_seconds * 1000 / finished, 2) if finished else 0.0
+            }
+
+password_pool = PasswordPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_QUEUE)
@@ -0,0 +1,240 @@
+from functools import lru_cache
+from io import BytesIO
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Motor de layout compartido por los PDF de rutinas y dietas.
+#
+# Dibuja directo sobre el canvas (platypus Table es varias veces más lento
+# para este tipo de listados) pero con un modelo de tablas: cada fila se mide
+# antes de dibujarse, así la paginación se resuelve en una sola pasada y el
+# encabezado de la tabla se repite al cortar de página. Estilos, anchos de
+# texto y geometría se calculan una vez por proceso.
+
+# Los streams comprimidos van en binario: ASCII85 sólo sirve para transportes
+# de 7 bits y en reportlab puro es una de las partes más caras del save()
+rl_config.useA85 = 0
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 18 * mm
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+TOP = PAGE_HEIGHT - MARGIN
+BOTTOM = MARGIN + 4 * mm  # deja lugar para el número de página
+
+CELL_PADDING = 3
+GRID_COLOR = colors.HexColor("#BBBBBB")
+ZEBRA_COLOR = colors.HexColor("#F4F6F9")
+MUTED_COLOR = colors.HexColor("#555555")
+
+class TextStyle:
+    __slots__ = ("font", "size", "leading", "color")
+
+    def __init__(self, font: str, size: float, leading: float, color=colors.black):
+        self.font = font
+        self.size = size
+        self.leading = leading
+        self.color = color
+
+STYLES = {
+    "title": TextStyle("Helvetica-Bold", 16, 20),
+    "meta": TextStyle("Helvetica", 10, 13, MUTED_COLOR),
+    "meta_label": TextStyle("Helvetica-Bold", 10, 13, MUTED_COLOR),
+    "section": TextStyle("Helvetica-Bold", 12, 15),
+    "header": TextStyle("Helvetica-Bold", 9, 11, colors.white),
+    "cell": TextStyle("Helvetica", 9, 11),
+    "empty": TextStyle("Helvetica-Oblique", 10, 13, colors.grey),
+    "page": TextStyle("Helvetica", 8, 10, colors.grey),
+}
+
+@lru_cache(maxsize=8192)
+def text_width(value: str, font: str, size: float) -> float:
+    return stringWidth(value, font, size)
+
+@lru_cache(maxsize=4096)
+def wrap(value: str, font: str, size: float, width: float) -> tuple:
+    """Partir el texto en líneas que entren en width (cacheado: los nombres se repiten mucho)"""
+    if text_width(value, font, size) <= width:
+        return (value,)
+    lines = []
+    current = ""
+    for word in value.split():
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate, font, size) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # Palabra más ancha que la columna: cortar por caracteres
+        while text_width(word, font, size) > width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], font, size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    if current:
+        lines.append(current)
+    return tuple(lines) or ("",)
+
+@lru_cache(maxsize=None)
+def column_positions(col_widths: tuple) -> tuple:
+    """Fracciones del ancho útil -> (x inicial, ancho) de cada columna"""
+    positions = []
+    x = MARGIN
+    for fraction in col_widths:
+        width = CONTENT_WIDTH * fraction
+        positions.append((x, width))
+        x += width
+    return tuple(positions)
+
+def _fmt(value) -> str:
+    return "" if value is None else str(value)
+
+class PdfDocument:
+    """Un documento en construcción; el cursor y
+    la página actual viven acá, todo lo demás está precalculado a nivel módulo"""
+
+    def __init__(self, title: str = ""):
+        self.buffer = BytesIO()
+        self.canvas = canvas.Canvas(self.buffer, pagesize=letter, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.page = 1
+        self.y = TOP
+        self._style = None
+
+    def _set_style(self, style: TextStyle):
+        # Evitar re-emitir operadores de fuente/color si no cambiaron
+        if style is self._style:
+            return
+        self.canvas.setFont(style.font, style.size)
+        self.canvas.setFillColor(style.color)
+        self._style = style
+
+    def _finish_page(self):
+        style = STYLES["page"]
+        self._set_style(style)
+        self.canvas.drawRightString(PAGE_WIDTH - MARGIN, MARGIN / 2, f"Página {self.page}")
+
+    def new_page(self):
+        self._finish_page()
+        self.canvas.showPage()
+        self._style = None
+        self.page += 1
+        self.y = TOP
+
+    def ensure(self, height: float) -> bool:
+        """Saltar de página si no entra height; devuelve True si hubo salto"""
+        if self.y - height < BOTTOM:
+            self.new_page()
+            return True
+        return False
+
+    def paragraph(self, value: str, style_name: str, space_after: float = 0):
+        style = STYLES[style_name]
+        lines = wrap(value, style.font, style.size, CONTENT_WIDTH)
+        self._set_style(style)
+        for line in lines:
+            self.ensure(style.leading)
+            self.y -= style.leading
+            self.canvas.drawString(MARGIN, self.y + (style.leading - style.size) / 2, line)
+        self.y -= space_after
+
+    def title(self, value: str):
+        self.paragraph(value, "title", space_after=4)
+
+    def meta(self, label: str, value):
+        """Línea 'Etiqueta: valor' con la etiqueta en negrita"""
+        label_style = STYLES["meta_label"]
+        style = STYLES["meta"]
+        label = f"{label}: "
+        label_width = text_width(label, label_style.font, label_style.size)
+        lines = wrap(_fmt(value), style.font, style.size, CONTENT_WIDTH - label_width)
+        for i, line in enumerate(lines):
+            self.ensure(style.leading)
+            self.y -= style.leading
+            baseline = self.y + (style.leading - style.size) / 2
+            if i == 0:
+                self._set_style(label_style)
+                self.canvas.drawString(MARGIN, baseline, label)
+            self._set_style(style)
+            self.canvas.drawString(MARGIN + label_width, baseline, line)
+
+    def spacer(self, height: float):
+        self.y -= height
+
+    def empty(self, message: str):
+        self.paragraph(message, "empty")
+
+    def _row_lines(self, row, positions, style: TextStyle):
+        width_limit = [w - 2 * CELL_PADDING for _, w in positions]
+        cells = [wrap(_fmt(value), style.font, style.size, width_limit[i]) for i, value in enumerate(row)]
+        height = max(len(lines) for lines in cells) * style.leading + 2 * CELL_PADDING
+        return cells, height
+
+    def _draw_row(self, cells, height, positions, style: TextStyle, background=None):
+        c = self.canvas
+        top = self.y
+        bottom = top - height
+        if background is not None:
+            c.setFillColor(background)
+            c.rect(MARGIN, bottom, CONTENT_WIDTH, height, stroke=0, fill=1)
+            self._style = None
+        self._set_style(style)
+        # Un solo objeto de texto por fila en lugar de un drawString por celda
+        text = c.beginText()
+        for (x, _), lines in zip(positions, cells):
+            baseline = top - CELL_PADDING - style.size
+            for line in lines:
+                if line:
+                    text.setTextOrigin(x + CELL_PADDING, baseline)
+                    text.textOut(line)
+                baseline -= style.leading
+        c.drawText(text)
+        c.line(MARGIN, bottom, MARGIN + CONTENT_WIDTH, bottom)
+        self.y = bottom
+
+    def _draw_column_lines(self, positions, top: float):
+        """Verticales de un tramo de tabla (una vez por página, no por fila)"""
+        c = self.canvas
+        xs = [x for x, _ in positions] + [MARGIN + CONTENT_WIDTH]
+        c.lines([(x, top, x, self.y) for x in xs] + [(MARGIN, top, MARGIN + CONTENT_WIDTH, top)])
+
+    def table(self, title: str, headers: list, rows: list, col_widths: tuple, header_color):
+        """Sección con título y tabla. El título no queda huérfano al pie de
+        página y el encabezado se repite en cada página que ocupe la tabla."""
+        positions = column_positions(col_widths)
+        header_style = STYLES["header"]
+        cell_style = STYLES["cell"]
+        section = STYLES["section"]
+        header_cells, header_height = self._row_lines(headers, positions, header_style)
+        measured = [self._row_lines(row, positions, cell_style) for row in rows]
+
+        first_row_height = measured[0][1] if measured else 0
+        self.ensure(section.leading + 8 + header_height + first_row_height)
+        self.y -= 8
+        self.paragraph(title, "section", space_after=4)
+
+        self.canvas.setStrokeColor(GRID_COLOR)
+        self.canvas.setLineWidth(0.25)
+        segment_top = self.y
+        self._draw_row(header_cells, header_height, positions, header_style, header_color)
+        for i, (cells, height) in enumerate(measured):
+            if self.y - height < BOTTOM:
+                self._draw_column_lines(positions, segment_top)
+                self.new_page()
+                self.canvas.setStrokeColor(GRID_COLOR)
+                self.canvas.setLineWidth(0.25)
+                segment_top = self.y
+                self._draw_row(header_cells, header_height, positions, header_style, header_color)
+            self._draw_row(cells, height, positions, cell_style, ZEBRA_COLOR if i % 2 else None)
+        self._draw_column_lines(positions, segment_top)
+        self.y -= 6
+
+    def render(self) -> bytes:
+        self._finish_page()
+        self.canvas.save()
+        return self.buffer.getvalue()
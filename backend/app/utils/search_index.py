@@ -0,0 +1,175 @@
+from bisect import bisect_left, insort
+from threading import Lock
+import math
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_EMPTY = frozenset()
+
+def normalize_text(value: str) -> str:
+    """Minúsculas, sin tildes ni signos: 'Atún en agua' -> 'atun en agua'"""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    without_marks = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", without_marks.lower()).strip()
+
+def trigrams(text: str, padded: bool = True) -> set:
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class _IndexState:
+    """Estructuras del índice; rebuild() arma unas nuevas y add() las modifica en el lugar"""
+
+    def __init__(self):
+        self.entries = {}       # id -> (texto normalizado, trigramas, payload)
+        self.postings = {}      # trigrama -> set(ids)
+        self.tokens = []        # lista ordenada de (palabra, id) para búsqueda por prefijo
+
+class TextSearchIndex:
+    """Índice en memoria con búsqueda por prefijo y similitud de trigramas.
+
+    Pensado para catálogos chicos/medianos (decenas de miles de filas) donde
+    un LIKE '%q%' obligaría a recorrer la tabla completa. Los candidatos se
+    toman de los postings más raros, así una búsqueda no puntúa el catálogo
+    entero. El lock sólo cubre la lectura de candidatos y los add(); el
+    ranking corre fuera del lock.
+    """
+
+    # Puntajes de ranking: coincidencia exacta > prefijo del nombre >
+    # prefijo de palabra > substring > similitud difusa
+    EXACT = 4.0
+    NAME_PREFIX = 3.0
+    WORD_PREFIX = 2.0
+    SUBSTRING = 1.0
+
+    def __init__(self, min_similarity: float = 0.3):
+        self.min_similarity = min_similarity
+        self._state = _IndexState()
+        self._lock = Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state.entries)
+
+    def rebuild(self, items):
+        """Reemplazar el contenido con items = iterable de (id, texto, payload)"""
+        state = _IndexState()
+        for item_id, text, payload in items:
+            self._add_to_state(state, item_id, text, payload)
+        state.tokens.sort()
+        with self._lock:
+            self._state = state
+            self.loaded = True
+
+    def add(self, item_id, text: str, payload):
+        """Agregar o reemplazar un item tocando sólo sus postings y palabras"""
+        with self._lock:
+            state = self._state
+            if item_id in state.entries:
+                self._remove_from_state(state, item_id)
+            self._add_to_state(state, item_id, text, payload, sorted_tokens=True)
+
+    @staticmethod
+    def _add_to_state(state, item_id, text, payload, sorted_tokens: bool = False):
+        normalized = normalize_text(text)
+        grams = trigrams(normalized)
+        state.entries[item_id] = (normalized, grams, payload)
+        for gram in grams:
+            state.postings.setdefault(gram, set()).add(item_id)
+        for word in set(normalized.split()):
+            if sorted_tokens:
+                insort(state.tokens, (word, item_id))
+            else:
+                state.tokens.append((word, item_id))
+
+    @staticmethod
+    def _remove_from_state(state, item_id):
+        normalized = state.entries[item_id][0]
+        TextSearchIndex._remove_postings(state, item_id)
+        for word in set(normalized.split()):
+            position = bisect_left(state.tokens, (word, item_id))
+            if position < len(state.tokens) and state.tokens[position] == (word, item_id):
+                del state.tokens[position]
+
+    @staticmethod
+    def _remove_postings(state, item_id):
+        _, grams, _ = state.entries.pop(item_id)
+        for gram in grams:
+            ids = state.postings.get(gram)
+            if ids:
+                ids.discard(item_id)
+                if not ids:
+                    del state.postings[gram]
+
+    def _prefix_ids(self, state, prefix: str) -> set:
+        ids = set()
+        position = bisect_left(state.tokens, (prefix,))
+        while position < len(state.tokens) and state.tokens[position][0].startswith(prefix):
+            ids.add(state.tokens[position][1])
+            position += 1
+        return ids
+
+    def _gram_candidates(self, state, q: str, q_grams: set) -> set:
+        """Ids que pueden contener q o superar min_similarity, sin recorrer los postings comunes.
+
+        Substring: tiene que estar en todos los trigramas sin padding de q, así
+        que se intersecan empezando por el más raro. Similitud: con k
+        trigramas en q hace falta compartir al menos t = ceil(min_similarity * k),
+        y todo item que comparte t aparece en alguno de los k - t + 1 postings
+        más raros; los padded ("  a", que matchea medio catálogo) quedan afuera.
+        """
+        inner = sorted((state.postings.get(gram, _EMPTY) for gram in trigrams(q, padded=False)), key=len)
+        substring = set(inner[0])
+        for ids in inner[1:]:
+            if not substring:
+                break
+            substring &= ids
+
+        postings = sorted((state.postings.get(gram, _EMPTY) for gram in q_grams), key=len)
+        needed = max(1, math.ceil(self.min_similarity * len(postings)))
+        fuzzy = set()
+        for ids in postings[:len(postings) - needed + 1]:
+            fuzzy |= ids
+        return substring | fuzzy
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """Devolver hasta `limit` payloads ordenados por relevancia"""
+        q = normalize_text(query)
+        if not q:
+            return []
+
+        words = q.split()
+        q_grams = trigrams(q)
+        with self._lock:
+            state = self._state
+            candidates = self._prefix_ids(state, words[0])
+            for word in words[1:]:
+                candidates &= self._prefix_ids(state, word)
+            if len(q) >= 3:
+                candidates |= self._gram_candidates(state, q, q_grams)
+            entries = [(item_id, state.entries[item_id]) for item_id in candidates]
+
+        scored = []
+        for item_id, (normalized, grams, payload) in entries:
+            shared = len(q_grams & grams)
+            similarity = shared / (len(q_grams) + len(grams) - shared) if grams else 0.0
+
+            if normalized == q:
+                score = self.EXACT
+            elif normalized.startswith(q):
+                score = self.NAME_PREFIX
+            elif all(any(w.startswith(qw) for w in normalized.split()) for qw in words):
+                score = self.WORD_PREFIX
+            elif q in normalized:
+                score = self.SUBSTRING
+            elif similarity >= self.min_similarity:
+                score = 0.0
+            else:
+                continue
+            scored.append((-(score + similarity), len(normalized), normalized, item_id, payload))
+
+        scored.sort(key=lambda entry: entry[:4])
+        return [entry[4] for entry in scored[:limit]]
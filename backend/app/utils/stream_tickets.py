@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from app.models.models import StreamTicket
+import secrets
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# EventSource no permite headers: en lugar del JWT (que quedaría en los logs
+# de acceso del proxy) la URL del stream lleva un ticket corto y de un solo uso.
+# Vive en la DB para que lo canjee cualquier worker.
+STREAM_TICKET_TTL_SECONDS = int(os.getenv("STREAM_TICKET_TTL_SECONDS", 30))
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def issue_stream_ticket(db: Session, coach_id: int) -> str:
+    """Emitir un ticket para el coach; hace commit"""
+    ticket = secrets.token_urlsafe(32)
+    db.add(StreamTicket(
+        ticket=ticket,
+        coach_id=coach_id,
+        expira_en=_utcnow() + timedelta(seconds=STREAM_TICKET_TTL_SECONDS)
+    ))
+    db.commit()
+    return ticket
+
+def redeem_stream_ticket(db: Session, ticket: str) -> Optional[int]:
+    """Canjear el ticket: devuelve el coach_id o None si no existe, venció o ya se usó.
+
+    El DELETE es el canje: con dos requests con el mismo ticket sólo uno
+    borra la fila. Un ticket vencido también se borra.
+    """
+    row = db.execute(
+        select(StreamTicket.coach_id, StreamTicket.expira_en).where(StreamTicket.ticket == ticket)
+    ).first()
+    if row is None:
+        return None
+    redeemed = db.execute(
+        delete(StreamTicket).where(StreamTicket.ticket == ticket),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.commit()
+    if not redeemed or row.expira_en <= _utcnow():
+        return None
+    return row.coach_id
+
+def purge_expired_stream_tickets(db: Session) -> int:
+    """Borrar los tickets emitidos y nunca canjeados (job de limpieza)"""
+    deleted = db.execute(
+        delete(StreamTicket).where(StreamTicket.expira_en <= _utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.commit()
+    return deleted
@@ -0,0 +1,132 @@
+"""
+Benchmark del generador de notificaciones de vencimiento.
+
+Compara el recorrido fila por fila con el ORM (cargar planes vencidos,
+consultar si ya hay notificación, agregarla) contra el INSERT ... SELECT
+de app/tasks/expiry_notifications.py sobre un dataset sembrado. También
+mide la segunda corrida, que no debe crear nada.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_expiry_notifications --rutinas 100000
+    python -m benchmarks.bench_expiry_notifications --url mysql+mysqlconnector://...
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+from app.database import Base
+from app.models.models import Coach, Alumno, Rutina, Dieta, Notification
+from app.tasks.expiry_notifications import (
+    insert_expiry_notifications, EXPIRY_TARGETS, NOTIFICATION_EXPIRY_LOOKBACK_DAYS
+)
+
+def seed(engine, n_rutinas, n_dietas, expired_ratio, notified_ratio, now):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    n_alumnos = max(n_rutinas, n_dietas) // 5 or 1
+    with engine.begin() as conn:
+        conn.execute(insert(Coach), [{"id": i + 1, "nombre": f"Coach {i}", "email": f"c{i}@bench.com", "password_hash": "x"} for i in range(100)])
+        conn.execute(insert(Alumno), [{"id": i + 1, "coach_id": i % 100 + 1, "nombre": f"Alumno {i}", "email": f"a{i}@bench.com"} for i in range(n_alumnos)])
+
+        notificaciones = []
+        for model, total in ((Rutina, n_rutinas), (Dieta, n_dietas)):
+            tipo = EXPIRY_TARGETS[model][0]
+            vencidas = int(total * expired_ratio)
+            rows = []
+            for i in range(total):
+                vencida = i < vencidas
+                rows.append({
+                    "id": i + 1,
+                    "alumno_id": i % n_alumnos + 1,
+                    "nombre": f"Plan {i}",
+                    "activa": True,
+                    "eliminado": False,
+                    "fecha_vencimiento": now - timedelta(hours=1 + i % 100) if vencida else now + timedelta(days=30)
+                })
+                if vencida and i < vencidas * notified_ratio:
+                    notificaciones.append({
+                        "coach_id": (i % n_alumnos) % 100 + 1, "alumno_id": i % n_alumnos + 1, "tipo": tipo,
+                        "referencia_id": i + 1, "titulo": "ya notificada", "mensaje": "", "leida": False, "creada_en": now
+                    })
+            for start in range(0, len(rows), 10000):
+                conn.execute(insert(model), rows[start:start + 10000])
+        if notificaciones:
+            conn.execute(insert(Notification), notificaciones)
+
+def orm_loop(db: Session, now: datetime) -> dict:
+    """Implementación ingenua: un SELECT por plan para deduplicar y un objeto por notificación"""
+    desde = now - timedelta(days=NOTIFICATION_EXPIRY_LOOKBACK_DAYS)
+    creadas = {}
+    for model, (tipo, titulo, sustantivo, cierre) in EXPIRY_TARGETS.items():
+        creadas[tipo] = 0
+        planes = db.query(model).options(joinedload(model.alumno)).filter(
+            model.activa == True,
+            model.eliminado == False,
+            model.fecha_vencimiento <= now,
+            model.fecha_vencimiento > desde,
+            model.alumno_id.is_not(None)
+        ).all()
+        for plan in planes:
+            existe = db.query(Notification.id).filter(
+                Notification.tipo == tipo,
+                Notification.referencia_id == plan.id
+            ).first()
+            if existe:
+                continue
+            db.add(Notification(
+                coach_id=plan.alumno.coach_id,
+                alumno_id=plan.alumno_id,
+                tipo=tipo,
+                referencia_id=plan.id,
+                titulo=titulo,
+                mensaje=f"{sustantivo} {plan.nombre} de {plan.alumno.nombre} {cierre}",
+                leida=False,
+                creada_en=now
+            ))
+            creadas[tipo] += 1
+    return creadas
+
+def set_based(db: Session, now: datetime) -> dict:
+    return insert_expiry_notifications(db, now)
+
+def run(engine, label, strategy, args, now):
+    seed(engine, args.rutinas, args.dietas, args.expired_ratio, args.notified_ratio, now)
+    for attempt in ("primera", "segunda"):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            creadas = strategy(db, now)
+            db.commit()
+            elapsed = time.perf_counter() - start
+        print(f"{label:<12} {attempt:<8} {elapsed * 1000:>12.1f} {sum(creadas.values()):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rutinas", type=int, default=100000)
+    parser.add_argument("--dietas", type=int, default=20000)
+    parser.add_argument("--expired-ratio", type=float, default=0.3, help="fracción de planes vencidos")
+    parser.add_argument("--notified-ratio", type=float, default=0.1, help="fracción de vencidos ya notificados")
+    parser.add_argument("--url", help="base de datos a usar (por defecto SQLite temporal)")
+    parser.add_argument("--skip-orm", action="store_true", help="no correr la versión fila por fila")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_expiry.db')}"
+    engine = create_engine(url)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    print(f"rutinas={args.rutinas} dietas={args.dietas} vencidas={args.expired_ratio:.0%} ya notificadas={args.notified_ratio:.0%}")
+    print(f"{'estrategia':<12} {'corrida':<8} {'ms':>12} {'creadas':>10}")
+    if not args.skip_orm:
+        run(engine, "orm_loop", orm_loop, args, now)
+    run(engine, "set_based", set_based, args, now)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark de estrategias de carga para los listados de rutinas y dietas.
+
+Compara los joinedload encadenados (antes) con app/utils/loaders.py
+(selectinload para colecciones, joinedload para many-to-one) sobre un
+dataset sembrado en SQLite. Reporta filas y celdas transferidas y el
+tiempo de hidratación del ORM.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_loader_strategies --dietas 200 --rutinas 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, joinedload
+from app.database import Base
+from app.models.models import (
+    Coach, Alumno, Rutina, Ejercicio, EjercicioBase, Dieta, Comida, ComidaAlimento, Alimento
+)
+from app.utils.loaders import rutina_loader_options, dieta_loader_options
+
+def seed(engine, n_rutinas, n_dietas, ejercicios_por_rutina, comidas_por_dieta, alimentos_por_comida):
+    with Session(engine) as db:
+        coach = Coach(nombre="Bench", email="bench@example.com", password_hash="x")
+        db.add(coach)
+        db.flush()
+        
+        alumnos = [Alumno(coach_id=coach.id, nombre=f"Alumno {i}", email=f"a{i}@example.com") for i in range(max(n_rutinas, n_dietas))]
+        db.add_all(alumnos)
+        bases = [EjercicioBase(nombre=f"Ejercicio {i}", categoria="general") for i in range(50)]
+        alimentos = [Alimento(nombre=f"Alimento {i}", calorias_100g=100, proteinas_100g=10, carbohidratos_100g=10, grasas_100g=5) for i in range(200)]
+        db.add_all(bases + alimentos)
+        db.flush()
+        
+        for i in range(n_rutinas):
+            rutina = Rutina(alumno_id=alumnos[i].id, nombre=f"Rutina {i}", notas="Notas de la rutina " * 5)
+            db.add(rutina)
+            db.flush()
+            db.add_all([
+                Ejercicio(rutina_id=rutina.id, ejercicio_base_id=bases[j % len(bases)].id, dia=j % 5 + 1,
+                          series=4, repeticiones=10, peso=50, descanso=90)
+                for j in range(ejercicios_por_rutina)
+            ])
+        
+        for i in range(n_dietas):
+            dieta = Dieta(alumno_id=alumnos[i].id, nombre=f"Dieta {i}", notas="Notas de la dieta " * 5)
+            db.add(dieta)
+            db.flush()
+            comidas = [Comida(dieta_id=dieta.id, nombre=f"Comida {j}", dia=j % 7 + 1, orden=j) for j in range(comidas_por_dieta)]
+            db.add_all(comidas)
+            db.flush()
+            db.add_all([
+                ComidaAlimento(comida_id=comida.id, alimento_id=alimentos[(k + comida.id) % len(alimentos)].id, cantidad_gramos=100)
+                for comida in comidas for k in range(alimentos_por_comida)
+            ])
+        db.commit()
+
+class StatementRecorder:
+    """Captura las sentencias emitidas para luego medir filas y celdas"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def reset(self):
+        self.statements = []
+
+    def measure(self):
+        rows = cells = 0
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        try:
+            with self.engine.connect() as conn:
+                for statement, parameters in self.statements:
+                    result = conn.exec_driver_sql(statement, parameters).fetchall()
+                    rows += len(result)
+                    cells += sum(len(row) for row in result)
+        finally:
+            event.listen(self.engine, "before_cursor_execute", self._record)
+        return len(self.statements), rows, cells
+
+def run_case(engine, recorder, label, build_query, repeat):
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            recorder.reset()
+            start = time.perf_counter()
+            objects = build_query(db).all()
+            timings.append(time.perf_counter() - start)
+    statements, rows, cells = recorder.measure()
+    best = min(timings) * 1000
+    print(f"{label:<34} {len(objects):>7} {statements:>6} {rows:>9} {cells:>10} {best:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rutinas", type=int, default=200)
+    parser.add_argument("--dietas", type=int, default=200)
+    parser.add_argument("--ejercicios", type=int, default=30, help="ejercicios por rutina")
+    parser.add_argument("--comidas", type=int, default=35, help="comidas por dieta")
+    parser.add_argument("--alimentos", type=int, default=4, help="alimentos por comida")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-loaders-"), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    seed(engine, args.rutinas, args.dietas, args.ejercicios, args.comidas, args.alimentos)
+    recorder = StatementRecorder(engine)
+    
+    print(f"{'caso':<34} {'objetos':>7} {'stmts':>6} {'filas':>9} {'celdas':>10} {'ms (min)':>10}")
+    run_case(engine, recorder, "rutinas joinedload (antes)", lambda db: db.query(Rutina).options(
+        joinedload(Rutina.ejercicios).joinedload(Ejercicio.ejercicio_base),
+        joinedload(Rutina.alumno)
+    ).order_by(Rutina.activa.desc(), Rutina.id.desc()), args.repeat)
+    run_case(engine, recorder, "rutinas loaders (después)", lambda db: db.query(Rutina).options(
+        *rutina_loader_options()
+    ).order_by(Rutina.activa.desc(), Rutina.id.desc()), args.repeat)
+    run_case(engine, recorder, "dietas joinedload (antes)", lambda db: db.query(Dieta).options(
+        joinedload(Dieta.comidas).joinedload(Comida.alimentos).joinedload(ComidaAlimento.alimento),
+        joinedload(Dieta.alumno)
+    ).order_by(Dieta.activa.desc(), Dieta.id.desc()), args.repeat)
+    run_case(engine, recorder, "dietas loaders (después)", lambda db: db.query(Dieta).options(
+        *dieta_loader_options()
+    ).order_by(Dieta.activa.desc(), Dieta.id.desc()), args.repeat)
+
+if __name__ == "__main__":
+    main()
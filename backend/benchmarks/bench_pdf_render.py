@@ -0,0 +1,107 @@
+"""
+Micro-benchmark de los generadores de PDF (app/utils/pdf_layout.py).
+
+Renderiza snapshots sintéticos de rutinas y dietas de tres tamaños y
+reporta renders/segundo, latencia media y tamaño del archivo. No necesita
+base de datos: usa los mismos snapshots planos que el export masivo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pdf_render --seconds 3
+    python -m benchmarks.bench_pdf_render --only huge
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.utils.pdf_generator import generate_rutina_pdf
+from app.utils.dieta_pdf_generator import generate_dieta_pdf
+
+# tamaño -> (ejercicios por rutina, comidas por dieta, alimentos por comida)
+SIZES = {
+    "small": (8, 5, 3),
+    "medium": (40, 35, 4),
+    "huge": (400, 140, 8),
+}
+
+def make_rutina(n_ejercicios: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1,
+        nombre="Rutina benchmark",
+        notas="Priorizar técnica en los básicos",
+        entrenamientos_semana=5,
+        alumno=SimpleNamespace(id=1, nombre="Alumno Benchmark"),
+        ejercicios=[
+            SimpleNamespace(
+                id=i,
+                dia=i % 5 + 1,
+                series=4,
+                repeticiones=10,
+                peso=40.0 + i % 20,
+                descanso=90,
+                notas="Bajar controlado en 3 segundos y pausa abajo" if i % 4 == 0 else None,
+                ejercicio_base=SimpleNamespace(id=i % 50, nombre=f"Ejercicio {i % 50}", categoria="general")
+            )
+            for i in range(n_ejercicios)
+        ]
+    )
+
+def make_dieta(n_comidas: int, alimentos_por_comida: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1,
+        nombre="Dieta benchmark",
+        notas="Hidratación 3 litros diarios",
+        fecha_inicio=None,
+        alumno=SimpleNamespace(id=1, nombre="Alumno Benchmark"),
+        comidas=[
+            SimpleNamespace(
+                id=j,
+                nombre=f"Comida {j % 5 + 1}",
+                dia=j % 7 + 1,
+                orden=j,
+                alimentos=[
+                    SimpleNamespace(
+                        id=k,
+                        cantidad_gramos=100 + k * 10,
+                        alimento=SimpleNamespace(id=k, nombre=f"Alimento {(j + k) % 200}", calorias_100g=120.0)
+                    )
+                    for k in range(alimentos_por_comida)
+                ]
+            )
+            for j in range(n_comidas)
+        ]
+    )
+
+def bench(label: str, render, snapshot, seconds: float):
+    render(snapshot)  # warm-up: estilos y fuentes quedan cacheados en el proceso
+    count = 0
+    size = 0
+    start = time.perf_counter()
+    while True:
+        size = len(render(snapshot))
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+    print(f"{label:<18} {count / elapsed:>12.1f} {elapsed * 1000 / count:>10.2f} {size / 1024:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="tiempo de medición por caso")
+    parser.add_argument("--only", choices=sorted(SIZES), help="correr un solo tamaño")
+    args = parser.parse_args()
+
+    print(f"{'caso':<18} {'renders/s':>12} {'ms/render':>10} {'KB':>10}")
+    for name, (ejercicios, comidas, alimentos) in SIZES.items():
+        if args.only and name != args.only:
+            continue
+        bench(f"rutina {name}", generate_rutina_pdf, make_rutina(ejercicios), args.seconds)
+        bench(f"dieta {name}", generate_dieta_pdf, make_dieta(comidas, alimentos), args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
-Script para ejecutar recordatorios de pago.
-Ejecutar diariamente con cron job o tarea programada.
+Script para ejecutar recordatorios de pago a mano.
+La API ya los corre con su scheduler interno (SCHEDULE_PAYMENT_REMINDERS);
+el cron sólo hace falta con SCHEDULER_ENABLED=false.
 
 Ejemplo cron job (ejecutar todos los días a las 9:00 AM):
 0 9 * * * cd /path/to/fittracker/backend && python run_payment_reminders.py
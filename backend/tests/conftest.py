@@ -0,0 +1,20 @@
+import pytest
+import os
+import tempfile
+
+# Base de datos SQLite temporal para correr los tests sin MySQL
+_db_dir = tempfile.mkdtemp(prefix="fittracker-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-with-at-least-32-characters")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("EXPORTS_DIR", os.path.join(_db_dir, "exports"))
+os.environ.setdefault("DOCUMENT_CACHE_DIR", os.path.join(_db_dir, "document_cache"))
+os.environ.setdefault("EMAIL_PROVIDER", "stub")
+
+@pytest.fixture(scope="session", autouse=True)
+def tables():
+    # Lo mismo que hace app.main al importarse: los tests de tareas y
+    # utilidades que no usan la app no dependen del orden en que corren
+    from app.database import engine
+    from app.models.models import Base
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import EjercicioBase
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Async Coach",
+        "email": "async@example.com",
+        "password": "Testpassword1"
+    })
+    token = client.post("/auth/login", json={
+        "email": "async@example.com",
+        "password": "Testpassword1"
+    }).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="module")
+def alumno_id(headers):
+    response = client.post("/alumnos/", headers=headers, json={
+        "nombre": "Alumno Async",
+        "email": "alumno.async@example.com",
+        "fecha_nacimiento": "1990-01-01T00:00:00",
+        "altura": 1.8,
+        "objetivo": "fuerza"
+    })
+    return response.json()["id"]
+
+def test_get_all_rutinas_includes_ejercicios(headers, alumno_id):
+    db = SessionLocal()
+    base = EjercicioBase(nombre="Sentadilla async", categoria="piernas")
+    db.add(base)
+    db.commit()
+    base_id = base.id
+    db.close()
+    
+    rutina = client.post(f"/rutinas/create/{alumno_id}", headers=headers, json={"nombre": "Fuerza"}).json()
+    client.post(f"/rutinas/{rutina['id']}/ejercicios", headers=headers, json={
+        "ejercicio_base_id": base_id, "series": 4, "repeticiones": 8, "descanso": 90
+    })
+    
+    response = client.get("/rutinas/", headers=headers)
+    assert response.status_code == 200
+    rutinas = response.json()["items"]
+    assert [r["id"] for r in rutinas] == [rutina["id"]]
+    assert rutinas[0]["ejercicios"][0]["ejercicio_base"]["nombre"] == "Sentadilla async"
+    assert rutinas[0]["alumno"]["id"] == alumno_id
+
+def test_get_all_dietas(headers, alumno_id):
+    dieta = client.post(f"/dietas/create/{alumno_id}", headers=headers, json={"nombre": "Volumen"}).json()
+    client.post(f"/dietas/{dieta['id']}/comidas", headers=headers, json={"nombre": "Desayuno"})
+    
+    response = client.get("/dietas/", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["comidas"][0]["nombre"] == "Desayuno"
+
+def test_alumno_dashboard(headers, alumno_id):
+    client.post(f"/alumnos/{alumno_id}/pesos", headers=headers, json={"peso": 80})
+    
+    response = client.get(f"/alumnos/{alumno_id}/dashboard", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["alumno"]["peso_actual"] == 80
+    assert [r["nombre"] for r in data["rutinas"]] == ["Fuerza"]
+    assert client.get("/alumnos/999999/dashboard", headers=headers).status_code == 404
+
+def test_get_notifications(headers):
+    client.post("/notifications/generate-test", headers=headers)
+    
+    response = client.get("/notifications/", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.auth_cache import TTLCache, token_cache, coach_cache, invalidate_coach
+from app.utils.auth_utils import create_access_token
+
+client = TestClient(app)
+
+def _login(email):
+    client.post("/auth/register", json={
+        "nombre": "Cache Coach",
+        "email": email,
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": email,
+        "password": "Testpassword1"
+    })
+    return response.json()
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_cache_respects_shorter_ttl():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set("expired", 1, ttl_seconds=-1)
+    assert cache.get("expired") is None
+
+def test_authenticated_requests_hit_cache():
+    data = _login("cache@example.com")
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    
+    assert client.get("/dashboard/", headers=headers).status_code == 200
+    hits_before = coach_cache.hits
+    assert client.get("/dashboard/", headers=headers).status_code == 200
+    assert coach_cache.hits == hits_before + 1
+    assert token_cache.get(data["access_token"])["coach_id"] == data["coach"]["id"]
+
+def test_invalidate_coach_drops_tokens():
+    data = _login("cache2@example.com")
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    client.get("/dashboard/", headers=headers)
+    
+    invalidate_coach(data["coach"]["id"])
+    
+    assert coach_cache.get(data["coach"]["id"]) is None
+    assert token_cache.get(data["access_token"]) is None
+
+def test_login_only_drops_replaced_token():
+    data = _login("cache3@example.com")
+    anterior = data["access_token"]
+    # Sesión en otro dispositivo (un claim extra para que el JWT no coincida)
+    otro = create_access_token(data={"coach_id": data["coach"]["id"], "device": "tablet"})
+    client.get("/dashboard/", headers={"Authorization": f"Bearer {otro}"})
+    client.get("/dashboard/", headers={"Authorization": f"Bearer {anterior}"})
+    
+    response = client.post("/auth/login", json={
+        "email": "cache3@example.com",
+        "password": "Testpassword1"
+    }, headers={"Authorization": f"Bearer {anterior}"})
+    
+    assert response.status_code == 200
+    assert token_cache.get(otro) is not None
+    assert token_cache.get(anterior) is None
+
+def test_invalid_token_is_rejected():
+    response = client.get("/dashboard/", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
@@ -0,0 +1,150 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import Ejercicio, Comida, ComidaAlimento, EjercicioPlantilla, ComidaPlantilla
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Clone Coach",
+        "email": "clone@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "clone@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _alumno(headers, nombre):
+    return client.post("/alumnos/", json={
+        "nombre": nombre,
+        "email": f"{nombre.lower()}@clone.com",
+        "fecha_nacimiento": "1990-01-01",
+        "altura": 170,
+        "objetivo": "fuerza"
+    }, headers=headers).json()["id"]
+
+def _ejercicios(db, rutina_id):
+    return sorted(
+        (e.dia, e.ejercicio_base_id, e.series, e.repeticiones, e.peso, e.descanso, e.notas)
+        for e in db.query(Ejercicio).filter(Ejercicio.rutina_id == rutina_id)
+    )
+
+def _comidas(db, dieta_id):
+    comidas = db.query(Comida).filter(Comida.dieta_id == dieta_id).all()
+    return sorted(
+        (c.dia, c.nombre, c.orden, tuple(sorted(
+            (a.alimento_id, a.cantidad_gramos)
+            for a in db.query(ComidaAlimento).filter(ComidaAlimento.comida_id == c.id)
+        )))
+        for c in comidas
+    )
+
+def test_copy_rutina_and_templates_keep_every_exercise(headers):
+    origen_id = _alumno(headers, "Origen")
+    destino_id = _alumno(headers, "Destino")
+    rutina = client.post(f"/rutinas/create/{origen_id}", json={"nombre": "Full", "fecha_vencimiento": "2030-01-31T00:00:00"}, headers=headers).json()
+    db = SessionLocal()
+    db.add_all([
+        Ejercicio(rutina_id=rutina["id"], ejercicio_base_id=i % 3 + 1, dia=i % 4 + 1, series=4, repeticiones=8 + i, peso=None if i % 2 else 50.0 + i, descanso=90, notas=f"n{i}")
+        for i in range(12)
+    ])
+    db.commit()
+    original = _ejercicios(db, rutina["id"])
+
+    copia = client.post(f"/rutinas/{rutina['id']}/copy/{destino_id}", headers=headers).json()
+    # Se conserva el día de cada ejercicio (antes la copia los dejaba a todos en el día 1)
+    assert _ejercicios(db, copia["id"]) == original
+    assert sorted(e[0] for e in _ejercicios(db, copia["id"])) == [1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4]
+    assert copia["fecha_vencimiento"] == rutina["fecha_vencimiento"] == "2030-01-31T00:00:00"
+
+    plantilla = client.post(f"/rutinas/{rutina['id']}/save-as-template", headers=headers).json()
+    assert db.query(EjercicioPlantilla).filter(EjercicioPlantilla.rutina_plantilla_id == plantilla["id"]).count() == 12
+    desde_plantilla = client.post(f"/rutinas/plantillas/{plantilla['id']}/create-rutina/{destino_id}", headers=headers).json()
+    assert [e[1:] for e in _ejercicios(db, desde_plantilla["id"])] == sorted(e[1:] for e in original)
+
+    response = client.post(f"/rutinas/{rutina['id']}/copy-day", json={"source_day": 1, "target_day": 2}, headers=headers)
+    assert response.json()["exercises_copied"] == 3
+    dias = [e[0] for e in _ejercicios(db, rutina["id"])]
+    assert dias.count(1) == 3 and dias.count(2) == 3
+    assert client.post(f"/rutinas/{rutina['id']}/copy-day", json={"source_day": 7, "target_day": 1}, headers=headers).status_code == 404
+    assert [e[0] for e in _ejercicios(db, rutina["id"])].count(1) == 3  # el 404 no borró el día destino
+    db.close()
+
+def test_copy_dieta_and_templates_map_alimentos_to_their_comida(headers):
+    origen_id = _alumno(headers, "DietaOrigen")
+    destino_id = _alumno(headers, "DietaDestino")
+    dieta = client.post(f"/dietas/create/{origen_id}", json={"nombre": "Volumen"}, headers=headers).json()
+    db = SessionLocal()
+    for i in range(6):
+        comida = Comida(dieta_id=dieta["id"], nombre=f"Comida {i}", dia=i % 2 + 1, orden=i)
+        db.add(comida)
+        db.flush()
+        db.add_all([ComidaAlimento(comida_id=comida.id, alimento_id=i * 10 + j, cantidad_gramos=100.0 + j) for j in range(i)])
+    db.commit()
+    original = _comidas(db, dieta["id"])
+
+    copia = client.post(f"/dietas/{dieta['id']}/copy/{destino_id}", headers=headers).json()
+    assert _comidas(db, copia["id"]) == original
+
+    plantilla = client.post(f"/dietas/{dieta['id']}/save-as-template", headers=headers).json()
+    assert db.query(ComidaPlantilla).filter(ComidaPlantilla.dieta_plantilla_id == plantilla["id"]).count() == 6
+    desde_plantilla = client.post(f"/dietas/plantillas/{plantilla['id']}/create-dieta/{destino_id}", headers=headers).json()
+    assert [c[1:] for c in _comidas(db, desde_plantilla["id"])] == sorted(c[1:] for c in original)
+
+    response = client.post(f"/dietas/{dieta['id']}/copy-day", json={"source_day": 1, "target_day": 2}, headers=headers)
+    assert response.json()["meals_copied"] == 3
+    por_dia = _comidas(db, dieta["id"])
+    assert [c[1:] for c in por_dia if c[0] == 1] == [c[1:] for c in por_dia if c[0] == 2]
+    db.close()
+
+def test_bulk_assign_template(headers):
+    from app.models.models import Rutina
+    alumnos = [_alumno(headers, f"Masivo{i}") for i in range(4)]
+    previa = client.post(f"/rutinas/create/{alumnos[0]}", json={"nombre": "Vieja"}, headers=headers).json()
+    rutina = client.post("/rutinas/create/none", json={"nombre": "Base"}, headers=headers).json()
+    db = SessionLocal()
+    db.add_all([Ejercicio(rutina_id=rutina["id"], ejercicio_base_id=1, dia=1, series=3, repeticiones=i, descanso=60) for i in range(5)])
+    db.commit()
+    plantilla = client.post(f"/rutinas/{rutina['id']}/save-as-template", headers=headers).json()
+
+    response = client.post(f"/rutinas/plantillas/{plantilla['id']}/assign", json={"alumno_ids": alumnos + [alumnos[1], 999999]}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["asignadas"] == 4
+    resultados = {r["alumno_id"]: r for r in data["resultados"]}
+    assert len(data["resultados"]) == 5  # duplicados colapsados
+    assert resultados[999999]["estado"] == "error"
+    assert resultados[alumnos[0]]["reemplazo"] and not resultados[alumnos[1]]["reemplazo"]
+    for alumno_id in alumnos:
+        rutina_id = resultados[alumno_id]["plan_id"]
+        assert db.query(Ejercicio).filter(Ejercicio.rutina_id == rutina_id).count() == 5
+    vieja = db.get(Rutina, previa["id"])
+    assert (vieja.activa, vieja.eliminado) == (False, True)
+    db.close()
+
+    assert client.post("/rutinas/plantillas/999999/assign", json={"alumno_ids": alumnos}, headers=headers).status_code == 404
+    assert client.post(f"/rutinas/plantillas/{plantilla['id']}/assign", json={"alumno_ids": []}, headers=headers).status_code == 400
+
+def test_bulk_assign_dieta_template(headers):
+    alumnos = [_alumno(headers, f"DietaMasiva{i}") for i in range(3)]
+    dieta = client.post("/dietas/create/none", json={"nombre": "Base"}, headers=headers).json()
+    db = SessionLocal()
+    for i in range(3):
+        comida = Comida(dieta_id=dieta["id"], nombre=f"Comida {i}", orden=i)
+        db.add(comida)
+        db.flush()
+        db.add_all([ComidaAlimento(comida_id=comida.id, alimento_id=j, cantidad_gramos=50.0 * (i + 1)) for j in range(i + 1)])
+    db.commit()
+    original = [c[1:] for c in _comidas(db, dieta["id"])]
+    plantilla = client.post(f"/dietas/{dieta['id']}/save-as-template", headers=headers).json()
+
+    data = client.post(f"/dietas/plantillas/{plantilla['id']}/assign", json={"alumno_ids": alumnos}, headers=headers).json()
+    assert data["asignadas"] == 3
+    for resultado in data["resultados"]:
+        assert [c[1:] for c in _comidas(db, resultado["plan_id"])] == original
+    db.close()
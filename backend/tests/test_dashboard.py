@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import DashboardCounter
+from app.utils.dashboard_counters import count_dashboard_totals
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def coach():
+    client.post("/auth/register", json={
+        "nombre": "Dashboard Coach",
+        "email": "dashboard@example.com",
+        "password": "Testpassword1"
+    })
+    data = client.post("/auth/login", json={
+        "email": "dashboard@example.com",
+        "password": "Testpassword1"
+    }).json()
+    return {"id": data["coach"]["id"], "headers": {"Authorization": f"Bearer {data['access_token']}"}}
+
+def _create_alumno(headers, nombre):
+    return client.post("/alumnos/", headers=headers, json={
+        "nombre": nombre,
+        "email": f"{nombre.lower()}@example.com",
+        "fecha_nacimiento": "1995-05-05T00:00:00",
+        "altura": 1.7,
+        "objetivo": "salud"
+    }).json()["id"]
+
+def _totals(coach_id):
+    db = SessionLocal()
+    try:
+        return count_dashboard_totals(db, coach_id)
+    finally:
+        db.close()
+
+def _stored(coach_id):
+    db = SessionLocal()
+    try:
+        counter = db.get(DashboardCounter, coach_id)
+        return counter and {k: getattr(counter, k) for k in ("total_alumnos", "total_rutinas", "total_dietas")}
+    finally:
+        db.close()
+
+def test_counters_follow_mutations(coach):
+    headers = coach["headers"]
+    assert client.get("/dashboard/", headers=headers).json()["total_alumnos"] == 0
+    assert _stored(coach["id"]) == {"total_alumnos": 0, "total_rutinas": 0, "total_dietas": 0}
+    
+    ana = _create_alumno(headers, "Ana")
+    beto = _create_alumno(headers, "Beto")
+    client.post(f"/rutinas/create/{ana}", headers=headers, json={"nombre": "A1"})
+    # Reemplaza a la anterior: el total de rutinas activas no cambia
+    client.post(f"/rutinas/create/{ana}", headers=headers, json={"nombre": "A2"})
+    client.post(f"/rutinas/create/{beto}", headers=headers, json={"nombre": "B1"})
+    client.post("/rutinas/create/none", headers=headers, json={"nombre": "Suelta"})
+    d1 = client.post(f"/dietas/create/{beto}", headers=headers, json={"nombre": "D1"}).json()
+    
+    data = client.get("/dashboard/", headers=headers).json()
+    assert (data["total_alumnos"], data["total_rutinas"], data["total_dietas"]) == (2, 2, 1)
+    
+    client.delete(f"/dietas/{d1['id']}", headers=headers)
+    data = client.get("/dashboard/", headers=headers).json()
+    assert data["total_dietas"] == 0
+    
+    # La fila compartida por todos los workers coincide con el conteo real
+    assert _stored(coach["id"]) == _totals(coach["id"])
+    assert [a["nombre"] for a in data["ultimos_alumnos"]] == ["Beto", "Ana"]
+
+def test_aggregate_query_ignores_deleted_plans(coach):
+    totals = _totals(coach["id"])
+    assert totals == {"total_alumnos": 2, "total_rutinas": 2, "total_dietas": 0}
+
+def test_deleting_alumno_recounts_plans(coach):
+    headers = coach["headers"]
+    carla = _create_alumno(headers, "Carla")
+    client.post(f"/rutinas/create/{carla}", headers=headers, json={"nombre": "C1"})
+    assert client.get("/dashboard/", headers=headers).json()["total_rutinas"] == 3
+    
+    client.delete(f"/alumnos/{carla}", headers=headers)
+    data = client.get("/dashboard/", headers=headers).json()
+    assert (data["total_alumnos"], data["total_rutinas"]) == (2, 2)
+    assert _stored(coach["id"]) == _totals(coach["id"])
@@ -0,0 +1,103 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.document_cache import DocumentCache, document_cache
+from app.utils.document_snapshots import snapshot_digest
+from types import SimpleNamespace
+import os
+
+client = TestClient(app)
+
+@pytest.fixture
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Docs Coach",
+        "email": "documents@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "documents@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_digest_depends_on_content_and_format():
+    snapshot = SimpleNamespace(id=1, nombre="A", ejercicios=[SimpleNamespace(id=1, series=3)])
+    same = SimpleNamespace(id=1, nombre="A", ejercicios=[SimpleNamespace(id=1, series=3)])
+    changed = SimpleNamespace(id=1, nombre="A", ejercicios=[SimpleNamespace(id=1, series=4)])
+    assert snapshot_digest(snapshot, "pdf") == snapshot_digest(same, "pdf")
+    assert snapshot_digest(snapshot, "pdf") != snapshot_digest(snapshot, "excel")
+    assert snapshot_digest(snapshot, "pdf") != snapshot_digest(changed, "pdf")
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    cache = DocumentCache(str(tmp_path), max_bytes=250)
+    cache.put("a" * 64, ("rutina", 1), "pdf", b"x" * 100)
+    cache.put("b" * 64, ("rutina", 2), "pdf", b"x" * 100)
+    assert cache.get("a" * 64)  # "a" pasa a ser el más reciente
+    cache.put("c" * 64, ("rutina", 3), "pdf", b"x" * 100)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) and cache.get("c" * 64)
+    assert cache.stats()["evictions"] == 1
+
+    # Un proceso nuevo recupera las entradas del directorio
+    reopened = DocumentCache(str(tmp_path), max_bytes=250)
+    assert reopened.get("c" * 64)
+    reopened.invalidate("rutina", 3)
+    assert reopened.get("c" * 64) is None
+
+def test_checkout_survives_invalidation(tmp_path):
+    cache = DocumentCache(str(tmp_path), max_bytes=1000)
+    cache.put("a" * 64, ("rutina", 1), "pdf", b"documento")
+    served = cache.checkout("a" * 64)
+
+    # Una edición de la rutina mientras se descarga no corta el envío
+    cache.invalidate("rutina", 1)
+    assert cache.get("a" * 64) is None
+    with open(served, "rb") as f:
+        assert f.read() == b"documento"
+
+    cache.discard(served)
+    assert os.listdir(tmp_path) == []
+
+def test_repeat_download_served_from_cache(headers):
+    rutina_id = client.post("/rutinas/create/none", json={"nombre": "Rutina cacheada"}, headers=headers).json()["id"]
+    ejercicio_base_id = client.post("/ejercicios-base/", json={"nombre": "Remo con barra docs", "categoria": "Espalda"}).json()["id"]
+    client.post(f"/rutinas/{rutina_id}/ejercicios", json={
+        "ejercicio_base_id": ejercicio_base_id, "dia": 1, "series": 4, "repeticiones": 10, "descanso": 90
+    }, headers=headers)
+
+    misses = document_cache.stats()["misses"]
+    first = client.get(f"/rutinas/{rutina_id}/pdf", headers=headers)
+    assert first.status_code == 200
+    assert first.content.startswith(b"%PDF")
+    assert "attachment" in first.headers["content-disposition"]
+
+    hits = document_cache.stats()["hits"]
+    second = client.get(f"/rutinas/{rutina_id}/pdf", headers=headers)
+    assert second.content == first.content
+    assert document_cache.stats()["hits"] == hits + 1
+    assert document_cache.stats()["misses"] == misses + 1
+
+    # Editar la rutina libera la versión cacheada y fuerza un nuevo render
+    client.patch(f"/rutinas/{rutina_id}", json={"nombre": "Rutina cacheada v2"}, headers=headers)
+    assert not document_cache._owners.get(("rutina", rutina_id))
+    client.get(f"/rutinas/{rutina_id}/pdf", headers=headers)
+    assert document_cache.stats()["misses"] == misses + 2
+
+def test_excel_streams_without_cache(headers, monkeypatch):
+    import io
+    import openpyxl
+    dieta_id = client.post("/dietas/create/none", json={"nombre": "Dieta stream"}, headers=headers).json()["id"]
+    client.post(f"/dietas/{dieta_id}/comidas", json={"nombre": "Almuerzo", "dia": 2, "orden": 1}, headers=headers)
+
+    monkeypatch.setattr(document_cache, "max_bytes", 0)
+    entries = document_cache.stats()["entries"]
+    response = client.get(f"/dietas/{dieta_id}/excel", headers=headers)
+    assert response.status_code == 200
+    assert "dieta_Dieta stream.xlsx" in response.headers["content-disposition"]
+    assert document_cache.stats()["entries"] == entries
+
+    rows = list(openpyxl.load_workbook(io.BytesIO(response.content)).active.iter_rows(values_only=True))
+    assert rows[0][:2] == ("Dieta:", "Dieta stream")
+    assert ("Almuerzo", "Sin alimentos", None, None) in rows
@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.utils.ejercicio_catalog import get_catalog_version, load_ejercicio_catalog
+
+client = TestClient(app)
+
+def test_catalog_etag_and_not_modified():
+    first = client.get("/ejercicios-base/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get("/ejercicios-base/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    weak = client.get("/ejercicios-base/", headers={"If-None-Match": f'"otro", W/{etag}'})
+    assert weak.status_code == 304
+
+def test_create_bumps_version_and_etag():
+    before = client.get("/ejercicios-base/")
+    version = get_catalog_version()
+
+    response = client.post("/ejercicios-base/", json={"nombre": "Press militar catálogo", "categoria": "Hombros"})
+    assert response.status_code == 200
+    assert get_catalog_version() == version + 1
+
+    after = client.get("/ejercicios-base/", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert "Press militar catálogo" in [e["nombre"] for e in after.json()]
+
+    # Duplicado: devuelve el existente sin invalidar el catálogo
+    client.post("/ejercicios-base/", json={"nombre": "press militar catálogo", "categoria": "Hombros"})
+    assert get_catalog_version() == version + 1
+
+def test_search_uses_index():
+    client.post("/ejercicios-base/", json={"nombre": "Sentadilla búlgara", "categoria": "Piernas"})
+
+    response = client.get("/ejercicios-base/search/bulgara")
+    assert response.status_code == 200
+    assert response.json()[0]["nombre"] == "Sentadilla búlgara"
+    assert response.json()[0]["categoria"] == "Piernas"
+
+    cached = client.get("/ejercicios-base/search/bulgara", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+def test_reload_keeps_version_and_casefold_order():
+    client.post("/ejercicios-base/", json={"nombre": "Bicho muerto", "categoria": "Core"})
+    client.post("/ejercicios-base/", json={"nombre": "abdominal rueda", "categoria": "Core"})
+    version = get_catalog_version()
+    nombres = [e["nombre"] for e in client.get("/ejercicios-base/").json() if e["categoria"] == "Core"]
+    assert nombres.index("abdominal rueda") < nombres.index("Bicho muerto")
+
+    # Recargar desde la DB sin cambios no avanza la versión ni cambia el orden
+    db = SessionLocal()
+    snapshot = load_ejercicio_catalog(db)
+    db.close()
+    assert snapshot.version == version
+    assert [e["nombre"] for e in snapshot.items if e["categoria"] == "Core"] == nombres
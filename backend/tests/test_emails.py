@@ -0,0 +1,162 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import EmailOutbox
+from app.utils.email_providers import StubProvider, EmailDeliveryError
+from app.utils.rate_limit import TokenBucket
+from app.utils.email_templates import EmailTemplate, optional_paragraph
+from app.tasks.email_worker import run_pending_emails, ESTADO_PENDIENTE, ESTADO_ENVIADO, ESTADO_ERROR
+
+client = TestClient(app)
+
+@pytest.fixture
+def provider(monkeypatch):
+    stub = StubProvider()
+    monkeypatch.setattr("app.tasks.email_worker.email_provider", stub)
+    monkeypatch.setattr("app.tasks.email_worker.rate_limiter", TokenBucket(1000, 1000))
+    return stub
+
+@pytest.fixture
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Email Coach",
+        "email": "emails@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "emails@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _create_alumnos(headers, count):
+    ids = []
+    for i in range(count):
+        response = client.post("/alumnos/", json={
+            "nombre": f"Alumno Email {i}",
+            "email": f"alumno{i}@test.com",
+            "fecha_nacimiento": "1990-01-01",
+            "altura": 170,
+            "objetivo": "fuerza"
+        }, headers=headers)
+        ids.append(response.json()["id"])
+    return ids
+
+def _outbox(tipo):
+    db = SessionLocal()
+    try:
+        return db.query(EmailOutbox).filter(EmailOutbox.tipo == tipo).all()
+    finally:
+        db.close()
+
+def test_quota_increase_enqueues_and_worker_delivers(headers, provider):
+    alumno_ids = _create_alumnos(headers, 3)
+    body = {"alumno_ids": alumno_ids, "new_amount": 15000, "message": "Gracias"}
+
+    response = client.post("/emails/quota-increase", json=body, headers={**headers, "Idempotency-Key": "quota-1"})
+    assert response.status_code == 202
+    assert response.json()["encolados"] == 3
+    assert provider.sent == []  # el request no envía nada
+
+    # Reintentar el mismo request no duplica el outbox
+    again = client.post("/emails/quota-increase", json=body, headers={**headers, "Idempotency-Key": "quota-1"})
+    assert again.json()["encolados"] == 0
+
+    assert run_pending_emails() == 3
+    assert provider.batches == 1  # los 3 emails salen en una sola llamada batch
+    assert sorted(m["to"] for m in provider.sent) == ["alumno0@test.com", "alumno1@test.com", "alumno2@test.com"]
+    assert all(email.estado == ESTADO_ENVIADO and email.provider_id for email in _outbox("quota_increase"))
+
+def test_transient_failure_is_retried_with_backoff(headers, provider, monkeypatch):
+    alumno_ids = _create_alumnos(headers, 1)
+    calls = []
+
+    def flaky_send(to, subject, html, idempotency_key):
+        calls.append(idempotency_key)
+        if len(calls) == 1:
+            raise EmailDeliveryError("Resend 503")
+        if len(calls) == 2:
+            raise EmailDeliveryError("Resend 422", retryable=False)
+        return "never"
+
+    monkeypatch.setattr(provider, "send", flaky_send)
+    client.post("/emails/absence-notice", json={
+        "alumno_ids": alumno_ids,
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-10",
+        "reason": "Vacaciones"
+    }, headers=headers)
+
+    assert run_pending_emails() == 1
+    [email] = _outbox("absence_notice")
+    assert email.estado == ESTADO_PENDIENTE
+    assert email.intentos == 1
+    assert email.proximo_intento > email.iniciado_en
+    # Con backoff pendiente no hay nada listo para enviar
+    assert run_pending_emails() == 0
+
+    db = SessionLocal()
+    db.query(EmailOutbox).filter(EmailOutbox.id == email.id).update({"proximo_intento": email.iniciado_en})
+    db.commit()
+    db.close()
+
+    assert run_pending_emails() == 1
+    [email] = _outbox("absence_notice")
+    assert email.estado == ESTADO_ERROR
+    assert calls[0] == calls[1]  # mismo idempotency key en el reintento
+
+def test_batch_accepted_then_timeout_is_retried_as_same_batch(headers, provider, monkeypatch):
+    alumno_ids = _create_alumnos(headers, 3)
+    real_send_batch = provider.send_batch
+    keys = []
+
+    def timeout_after_accept(messages, idempotency_key):
+        keys.append(idempotency_key)
+        provider_ids = real_send_batch(messages, idempotency_key)
+        if len(keys) == 1:
+            raise EmailDeliveryError("Network error: read timeout")  # Resend ya lo aceptó
+        return provider_ids
+
+    monkeypatch.setattr(provider, "send_batch", timeout_after_accept)
+    previos = {email.id for email in _outbox("quota_increase") + _outbox("absence_notice")}
+    client.post("/emails/quota-increase", json={"alumno_ids": alumno_ids[:2], "new_amount": 20000},
+                headers={**headers, "Idempotency-Key": "quota-timeout"})
+    assert run_pending_emails() == 2
+    failed = [email for email in _outbox("quota_increase") if email.id not in previos]
+    assert {email.estado for email in failed} == {ESTADO_PENDIENTE}
+    assert len({email.proximo_intento for email in failed}) == 1  # el lote se reintenta junto
+
+    # Un email nuevo encolado antes del reintento no se mezcla con el lote
+    client.post("/emails/absence-notice", json={
+        "alumno_ids": alumno_ids[2:],
+        "start_date": "2026-02-01",
+        "end_date": "2026-02-05",
+        "reason": "Viaje"
+    }, headers=headers)
+    db = SessionLocal()
+    db.query(EmailOutbox).filter(EmailOutbox.id.in_([email.id for email in failed])).update(
+        {"proximo_intento": failed[0].iniciado_en}, synchronize_session=False
+    )
+    db.commit()
+    db.close()
+
+    assert run_pending_emails() == 3
+    assert keys[0] == keys[1]  # mismo key de lote: el proveedor deduplica
+    assert sorted(m["to"] for m in provider.sent) == ["alumno0@test.com", "alumno1@test.com", "alumno2@test.com"]
+    nuevos = [email for email in _outbox("quota_increase") + _outbox("absence_notice") if email.id not in previos]
+    assert len(nuevos) == 3 and all(email.estado == ESTADO_ENVIADO for email in nuevos)
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1
+    assert bucket.acquire(timeout=0.5)
+
+def test_template_bind_and_render_escape_values():
+    template = EmailTemplate("<p>{coach}: {alumno}</p>{mensaje}")
+    bound = template.bind(coach="Ana & Co", mensaje=optional_paragraph("<b>hola</b>"))
+    assert bound.fields == {"alumno"}
+    assert bound.render(alumno="<Juan>") == "<p>Ana &amp; Co: &lt;Juan&gt;</p><p>&lt;b&gt;hola&lt;/b&gt;</p>"
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import Notification
+from app.tasks.expiry_notifications import generate_expiry_notifications
+
+client = TestClient(app)
+
+@pytest.fixture
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Expiry Coach",
+        "email": "expiry@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "expiry@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _alumno(headers, nombre):
+    response = client.post("/alumnos/", json={
+        "nombre": nombre,
+        "email": f"{nombre.lower().replace(' ', '')}@test.com",
+        "fecha_nacimiento": "1990-01-01",
+        "altura": 170,
+        "objetivo": "fuerza"
+    }, headers=headers)
+    return response.json()["id"]
+
+def test_expired_plans_are_notified_once(headers):
+    ayer = (datetime.now() - timedelta(days=1)).isoformat()
+    hace_un_anio = (datetime.now() - timedelta(days=365)).isoformat()
+    alumno_id = _alumno(headers, "Juan Vencido")
+    viejo_id = _alumno(headers, "Pedro Viejo")
+
+    rutina = client.post(f"/rutinas/create/{alumno_id}", json={"nombre": "Fuerza A", "fecha_vencimiento": ayer}, headers=headers).json()
+    dieta = client.post(f"/dietas/create/{alumno_id}", json={"nombre": "Volumen", "fecha_vencimiento": ayer}, headers=headers).json()
+    # Vencida fuera de la ventana de lookback: no se notifica
+    client.post(f"/rutinas/create/{viejo_id}", json={"nombre": "Vieja", "fecha_vencimiento": hace_un_anio}, headers=headers)
+
+    creadas = generate_expiry_notifications()
+    assert creadas["rutina_vencida"] >= 1 and creadas["dieta_vencida"] >= 1
+
+    db = SessionLocal()
+    notificaciones = db.query(Notification).filter(Notification.alumno_id.in_([alumno_id, viejo_id])).all()
+    db.close()
+    assert {(n.tipo, n.referencia_id) for n in notificaciones} == {
+        ("rutina_vencida", rutina["id"]),
+        ("dieta_vencida", dieta["id"])
+    }
+    mensajes = {n.tipo: n.mensaje for n in notificaciones}
+    assert mensajes["rutina_vencida"] == "La rutina Fuerza A de Juan Vencido ha vencido y necesita ser actualizada."
+
+    # Segunda corrida: nada nuevo
+    assert generate_expiry_notifications() == {"rutina_vencida": 0, "dieta_vencida": 0}
+
+def test_unread_counter_with_microsecond_now(headers):
+    from app.models.models import Coach
+    from app.tasks.expiry_notifications import insert_expiry_notifications
+    from app.utils.notification_counters import get_unread_count
+
+    alumno_id = _alumno(headers, "Micro Segundo")
+    now = datetime.now(timezone.utc).replace(microsecond=987654)
+    client.post(f"/rutinas/create/{alumno_id}", json={
+        "nombre": "Micro", "fecha_vencimiento": (now - timedelta(hours=2)).replace(tzinfo=None).isoformat()
+    }, headers=headers)
+
+    db = SessionLocal()
+    coach_id = db.query(Coach.id).filter(Coach.email == "expiry@test.com").scalar()
+    antes = get_unread_count(db, coach_id)
+    assert insert_expiry_notifications(db, now)["rutina_vencida"] == 1
+    db.commit()
+    assert get_unread_count(db, coach_id) == antes + 1
+    nueva = db.query(Notification).filter(Notification.alumno_id == alumno_id).one()
+    assert nueva.creada_en == now.replace(tzinfo=None, microsecond=0)
+    db.close()
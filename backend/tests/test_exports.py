@@ -0,0 +1,132 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.models import ExportJob
+from datetime import datetime, timedelta, timezone
+from app.tasks.export_worker import (
+    run_pending_jobs, process_job, requeue_stale_jobs, ESTADO_PENDIENTE, ESTADO_PROCESANDO, EXPORT_JOB_TIMEOUT_SECONDS
+)
+
+client = TestClient(app)
+
+@pytest.fixture
+def headers(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.tasks.export_worker.EXPORTS_DIR", str(tmp_path))
+    client.post("/auth/register", json={
+        "nombre": "Export Coach",
+        "email": "exports@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "exports@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _create_rutina(headers):
+    response = client.post("/rutinas/create/none", json={"nombre": "Rutina export"}, headers=headers)
+    return response.json()["id"]
+
+def test_export_job_lifecycle(headers):
+    rutina_id = _create_rutina(headers)
+
+    response = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "pdf"}, headers=headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["estado"] == ESTADO_PENDIENTE
+
+    # Un segundo pedido igual reutiliza el job pendiente
+    again = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "pdf"}, headers=headers)
+    assert again.json()["id"] == job["id"]
+
+    assert client.get(f"/exports/{job['id']}/download", headers=headers).status_code == 409
+
+    assert run_pending_jobs() >= 1
+
+    status = client.get(f"/exports/{job['id']}", headers=headers).json()
+    assert status["estado"] == "completado"
+    assert status["intentos"] == 1
+
+    download = client.get(f"/exports/{job['id']}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "application/pdf"
+    assert download.content.startswith(b"%PDF")
+
+def test_export_excel_and_missing_target(headers):
+    rutina_id = _create_rutina(headers)
+    response = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "excel"}, headers=headers)
+    job_id = response.json()["id"]
+
+    client.delete(f"/rutinas/{rutina_id}", headers=headers)
+    run_pending_jobs()
+
+    status = client.get(f"/exports/{job_id}", headers=headers).json()
+    assert status["estado"] == "error"
+    assert "not found" in status["error"]
+
+    missing = client.post("/exports/", json={"tipo": "dieta", "objeto_id": 999999, "formato": "pdf"}, headers=headers)
+    assert missing.status_code == 404
+
+def test_claimed_job_is_not_processed_twice(headers):
+    rutina_id = _create_rutina(headers)
+    job_id = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "pdf"}, headers=headers).json()["id"]
+
+    db = SessionLocal()
+    try:
+        db.query(ExportJob).filter(ExportJob.id == job_id).update({"estado": ESTADO_PROCESANDO})
+        db.commit()
+    finally:
+        db.close()
+
+    # Otro worker ya lo tomó: la cola no lo vuelve a entregar
+    assert run_pending_jobs() == 0
+    process_job(job_id)
+    status = client.get(f"/exports/{job_id}", headers=headers).json()
+    assert status["estado"] == "completado"
+
+def test_bulk_export_zip(headers):
+    import io
+    import zipfile
+    alumno = client.post("/alumnos/", json={
+        "nombre": "Alumno Bulk", "email": "bulk@test.com", "fecha_nacimiento": "1995-05-10T00:00:00", "altura": 1.75, "objetivo": "Fuerza"
+    }, headers=headers).json()
+    rutina_id = client.post(f"/rutinas/create/{alumno['id']}", json={"nombre": "Fuerza"}, headers=headers).json()["id"]
+    dieta_id = client.post(f"/dietas/create/{alumno['id']}", json={"nombre": "Volumen"}, headers=headers).json()["id"]
+
+    response = client.get("/exports/bulk", params={"formato": "pdf"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert f"Alumno_Bulk/rutina_Fuerza_{rutina_id}.pdf" in names
+    assert f"Alumno_Bulk/dieta_Volumen_{dieta_id}.pdf" in names
+    assert "errores.txt" not in names
+    assert archive.read(f"Alumno_Bulk/rutina_Fuerza_{rutina_id}.pdf").startswith(b"%PDF")
+
+    # Segunda vez: todo sale del cache de documentos
+    again = client.get("/exports/bulk", params={"formato": "pdf", "incluir": "rutinas"}, headers=headers)
+    assert zipfile.ZipFile(io.BytesIO(again.content)).namelist() == [f"Alumno_Bulk/rutina_Fuerza_{rutina_id}.pdf"]
+
+def test_requeue_only_jobs_with_missed_heartbeat(headers):
+    rutina_id = _create_rutina(headers)
+    vivo = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "pdf"}, headers=headers).json()["id"]
+    caido = client.post("/exports/", json={"tipo": "rutina", "objeto_id": rutina_id, "formato": "excel"}, headers=headers).json()["id"]
+    now = datetime.now(timezone.utc)
+    viejo = now - timedelta(seconds=EXPORT_JOB_TIMEOUT_SECONDS * 10)
+
+    db = SessionLocal()
+    try:
+        # Los dos arrancaron hace rato, pero sólo uno sigue dando heartbeat
+        db.query(ExportJob).filter(ExportJob.id == vivo).update({"estado": ESTADO_PROCESANDO, "iniciado_en": viejo, "heartbeat_en": now})
+        db.query(ExportJob).filter(ExportJob.id == caido).update({"estado": ESTADO_PROCESANDO, "iniciado_en": viejo, "heartbeat_en": viejo})
+        db.commit()
+        assert requeue_stale_jobs(db) == 1
+        assert db.get(ExportJob, vivo).estado == ESTADO_PROCESANDO
+        assert db.get(ExportJob, caido).estado == ESTADO_PENDIENTE
+        db.query(ExportJob).filter(ExportJob.id == vivo).update({"estado": ESTADO_PENDIENTE})
+        db.commit()
+    finally:
+        db.close()
+    run_pending_jobs()
@@ -0,0 +1,132 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+@pytest.fixture
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Feed Coach",
+        "email": "feed@test.com",
+        "password": "Testpassword1"
+    })
+    response = client.post("/auth/login", json={
+        "email": "feed@test.com",
+        "password": "Testpassword1"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _unread(headers):
+    return client.get("/notifications/unread-count", headers=headers).json()["count"]
+
+def test_feed_pagination_and_unread_counter(headers):
+    for _ in range(3):
+        client.post("/notifications/generate-test", headers=headers)
+    assert _unread(headers) == 9
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/notifications/", headers=headers, params=params).json()
+        ids.extend(n["id"] for n in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert len(ids) == 9 and ids == sorted(ids, reverse=True)
+    assert client.get("/notifications/", headers=headers, params={"cursor": "basura"}).status_code == 400
+
+    # Marcar dos veces cuenta una sola
+    client.patch(f"/notifications/{ids[0]}/read", headers=headers)
+    client.patch(f"/notifications/{ids[0]}/read", headers=headers)
+    assert _unread(headers) == 8
+    # Borrar una leída no descuenta; una no leída sí
+    client.delete(f"/notifications/{ids[0]}", headers=headers)
+    client.delete(f"/notifications/{ids[1]}", headers=headers)
+    assert _unread(headers) == 7
+    assert client.delete(f"/notifications/{ids[1]}", headers=headers).status_code == 404
+    assert client.patch(f"/notifications/{ids[1]}/read", headers=headers).status_code == 404
+
+def test_stream_pushes_unread_count(headers, monkeypatch):
+    import app.routes.notifications as notifications_routes
+    monkeypatch.setattr(notifications_routes, "SSE_MAX_CONNECTION_SECONDS", 0.2)
+    count = _unread(headers)
+    ticket = client.post("/notifications/stream-ticket", headers=headers).json()["ticket"]
+
+    response = client.get("/notifications/stream", params={"ticket": ticket})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert f'event: unread_count\ndata: {{"count":{count}}}' in response.text
+    # De un solo uso, y el JWT ya no sirve en la URL
+    assert client.get("/notifications/stream", params={"ticket": ticket}).status_code == 401
+    assert client.get("/notifications/stream", params={"ticket": headers["Authorization"].split()[1]}).status_code == 401
+
+    monkeypatch.setattr("app.utils.stream_tickets.STREAM_TICKET_TTL_SECONDS", -1)
+    vencido = client.post("/notifications/stream-ticket", headers=headers).json()["ticket"]
+    assert client.get("/notifications/stream", params={"ticket": vencido}).status_code == 401
+
+def test_broker_backpressure_asks_for_resync():
+    import asyncio
+    from app.utils.event_broker import InMemoryBroker, RESYNC_EVENT
+
+    async def scenario():
+        broker = InMemoryBroker(max_queue=2)
+        subscription = broker.subscribe(1)
+        otro = broker.subscribe(2)
+        for i in range(5):
+            broker.publish(1, "unread_count", {"count": i})
+        await asyncio.sleep(0)  # publish entrega via call_soon_threadsafe
+        assert otro.queue.empty()
+        assert (await subscription.get())["event"] == RESYNC_EVENT
+        broker.publish(1, "unread_count", {"count": 9})
+        await asyncio.sleep(0)
+        assert (await subscription.get())["data"] == {"count": 9}
+        assert broker.stats()["dropped"] == 5
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(otro)
+        assert broker.stats()["connections"] == 0
+
+    asyncio.run(scenario())
+
+def test_bulk_mark_read_and_delete(headers):
+    client.post("/notifications/bulk-delete", headers=headers, json={"all": True})
+    for _ in range(2):
+        client.post("/notifications/generate-test", headers=headers)
+    ids = [n["id"] for n in client.get("/notifications/", headers=headers).json()["items"]]
+    assert _unread(headers) == 6
+
+    assert client.post("/notifications/mark-read", headers=headers, json={}).status_code == 400
+    response = client.post("/notifications/mark-read", headers=headers, json={"ids": ids[:2]})
+    assert response.json()["actualizadas"] == 2 and _unread(headers) == 4
+    # Repetir no vuelve a descontar
+    assert client.post("/notifications/mark-read", headers=headers, json={"ids": ids[:2]}).json()["actualizadas"] == 0
+
+    response = client.post("/notifications/bulk-delete", headers=headers, json={"leida": True})
+    assert response.json()["eliminadas"] == 2 and _unread(headers) == 4
+    response = client.post("/notifications/mark-read", headers=headers, json={"older_than": "2000-01-01T00:00:00"})
+    assert response.json()["actualizadas"] == 0
+    response = client.post("/notifications/mark-read", headers=headers, json={"all": True})
+    assert response.json()["actualizadas"] == 4 and _unread(headers) == 0
+    assert client.post("/notifications/bulk-delete", headers=headers, json={"ids": ids}).json()["eliminadas"] == 4
+
+def test_cleanup_purges_old_read_notifications():
+    from datetime import datetime, timedelta
+    from app.database import SessionLocal
+    from app.models.models import Notification
+    from app.tasks.jobs import cleanup_old_records
+
+    viejo = datetime.now() - timedelta(days=365)
+    db = SessionLocal()
+    db.add_all([
+        Notification(tipo="retencion", titulo="leida", leida=True, creada_en=viejo),
+        Notification(tipo="retencion", titulo="no leida", leida=False, creada_en=viejo),
+        Notification(tipo="retencion", titulo="reciente", leida=True)
+    ])
+    db.commit()
+
+    assert cleanup_old_records()["notifications"] >= 1
+    restantes = {n.titulo for n in db.query(Notification).filter(Notification.tipo == "retencion")}
+    db.close()
+    assert restantes == {"no leida", "reciente"}
@@ -0,0 +1,59 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.password_pool import PasswordPool, PasswordPoolSaturated, password_pool
+
+client = TestClient(app)
+
+def test_pool_rejects_when_queue_is_full():
+    pool = PasswordPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+    
+    running = pool.submit(release.wait)
+    queued = pool.submit(lambda: "ok")
+    with pytest.raises(PasswordPoolSaturated):
+        pool.submit(lambda: "rejected")
+    
+    release.set()
+    assert queued.result(timeout=5) == "ok"
+    running.result(timeout=5)
+    
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["pending"] == 0
+    pool.shutdown()
+
+def test_login_returns_503_when_pool_is_saturated(monkeypatch):
+    client.post("/auth/register", json={
+        "nombre": "Busy Coach",
+        "email": "busy@example.com",
+        "password": "Testpassword1"
+    })
+    
+    def saturated(*args):
+        raise PasswordPoolSaturated()
+    monkeypatch.setattr(password_pool, "submit", saturated)
+    
+    response = client.post("/auth/login", json={
+        "email": "busy@example.com",
+        "password": "Testpassword1"
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_register_and_login_through_pool():
+    response = client.post("/auth/register", json={
+        "nombre": "Pool Coach",
+        "email": "pool@example.com",
+        "password": "Testpassword1"
+    })
+    assert response.status_code == 200
+    
+    response = client.post("/auth/login", json={
+        "email": "pool@example.com",
+        "password": "Testpassword1"
+    })
+    assert response.status_code == 200
+    assert client.get("/health/password-pool").json()["completed"] >= 2
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+import uuid
+from app.database import SessionLocal
+from app.models.models import Coach, Alumno, PaymentReminderRun
+from app.utils.email_providers import StubProvider
+from app.utils.email_service import send_payment_reminders
+from app.utils.rate_limit import TokenBucket
+from app.tasks import payment_reminders
+from app.tasks.payment_reminders import check_payment_reminders, RUN_EN_CURSO, RUN_COMPLETADO, RUN_ABANDONADO, REMINDER_RESUME_MAX_HOURS
+
+@pytest.fixture
+def provider(monkeypatch):
+    stub = StubProvider()
+    monkeypatch.setattr("app.utils.email_service.email_provider", stub)
+    monkeypatch.setattr("app.tasks.payment_reminders.rate_limiter", TokenBucket(1000, 1000))
+    monkeypatch.setattr("app.tasks.payment_reminders.REMINDER_CHUNK_SIZE", 2)
+    return stub
+
+@pytest.fixture
+def alumnos_a_cobrar():
+    db = SessionLocal()
+    coach = Coach(nombre="Coach Cobros", email=f"cobros-{uuid.uuid4().hex[:8]}@test.com", password_hash="x")
+    db.add(coach)
+    db.flush()
+    vencido = datetime.now(timezone.utc) - timedelta(days=1)
+    alumnos = [
+        Alumno(coach_id=coach.id, nombre=f"Moroso {i}", email=f"moroso{i}@test.com",
+               fecha_cobro=vencido, notificaciones_activas=True)
+        for i in range(5)
+    ]
+    db.add_all(alumnos)
+    db.commit()
+    ids = [a.id for a in alumnos]
+    db.close()
+    return ids
+
+def test_reminder_run_resumes_from_checkpoint(provider, alumnos_a_cobrar, monkeypatch):
+    calls = []
+
+    def crash_on_second_chunk(reminders, batch_key):
+        calls.append(batch_key)
+        if len(calls) == 2:
+            raise RuntimeError("worker killed")
+        return send_payment_reminders(reminders, batch_key)
+
+    monkeypatch.setattr(payment_reminders, "send_payment_reminders", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        check_payment_reminders()
+
+    db = SessionLocal()
+    run = db.query(PaymentReminderRun).order_by(PaymentReminderRun.id.desc()).first()
+    assert run.estado == RUN_EN_CURSO
+    assert run.ultimo_alumno_id == alumnos_a_cobrar[1]  # primer chunk confirmado
+    db.close()
+    assert len(provider.sent) == 2
+    # El lote caído se reintenta con el mismo key aunque se reanude otro día
+    assert calls[1] == f"payment-reminders:{run.id}:{alumnos_a_cobrar[1]}:0"
+
+    monkeypatch.setattr(payment_reminders, "send_payment_reminders", send_payment_reminders)
+    result = check_payment_reminders()
+    assert result["run_id"] == run.id
+    assert result["enviados"] == 5
+    assert sorted(m["to"] for m in provider.sent) == sorted(f"moroso{i}@test.com" for i in range(5))
+
+    db = SessionLocal()
+    assert db.get(PaymentReminderRun, run.id).estado == RUN_COMPLETADO
+    notificados = db.query(Alumno).filter(Alumno.id.in_(alumnos_a_cobrar), Alumno.ultima_notificacion.is_not(None)).count()
+    db.close()
+    assert notificados == 5
+
+    # Una corrida nueva no vuelve a notificar a nadie
+    assert check_payment_reminders()["enviados"] == 0
+
+def test_leased_run_is_skipped_and_stale_run_abandoned(provider, alumnos_a_cobrar):
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    run = PaymentReminderRun(estado=RUN_EN_CURSO, fecha_corte=now, ultimo_alumno_id=0, procesados=0, enviados=0,
+                             fallidos=0, owner="cron:1", lease_expira_en=now + timedelta(minutes=5))
+    db.add(run)
+    db.commit()
+
+    # El cron la está corriendo: el scheduler no la toma
+    assert check_payment_reminders() == {"omitida": True}
+    assert provider.sent == []
+
+    # Semanas después, con el lease vencido, no se reanuda con la fecha de corte vieja
+    run.fecha_corte = now - timedelta(hours=REMINDER_RESUME_MAX_HOURS * 20)
+    run.lease_expira_en = now - timedelta(minutes=1)
+    db.commit()
+    result = check_payment_reminders()
+    assert result["run_id"] != run.id
+    assert result["enviados"] == 5
+    db.refresh(run)
+    assert run.estado == RUN_ABANDONADO
+    db.close()
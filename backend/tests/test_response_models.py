@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas.responses import RutinaOut, RutinaDetailOut
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def headers():
+    client.post("/auth/register", json={
+        "nombre": "Schema Coach",
+        "email": "schema@example.com",
+        "password": "Testpassword1"
+    })
+    token = client.post("/auth/login", json={
+        "email": "schema@example.com",
+        "password": "Testpassword1"
+    }).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_mutations_return_flat_models(headers):
+    response = client.post("/rutinas/create/none", headers=headers, json={"nombre": "Plana"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    # Sin relaciones: serializar la respuesta nunca dispara lazy loads
+    assert set(response.json()) == set(RutinaOut.model_fields)
+
+def test_detail_includes_eager_loaded_children(headers):
+    rutina = client.post("/rutinas/create/none", headers=headers, json={"nombre": "Detalle"}).json()
+    
+    data = client.get(f"/rutinas/{rutina['id']}", headers=headers).json()
+    assert set(data) == set(RutinaDetailOut.model_fields)
+    assert data["ejercicios"] == []
+    assert data["alumno"] is None
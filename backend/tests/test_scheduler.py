@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.database import SessionLocal
+from app.models.models import SchedulerRun
+from app.utils.cron import CronSchedule, CronError
+from app.tasks.scheduler import Scheduler, acquire_lease, release_lease, RUN_OK, RUN_ERROR
+
+def test_cron_next_after():
+    base = datetime(2026, 1, 30, 9, 0)  # viernes
+    assert CronSchedule("0 9 * * *").next_after(base) == datetime(2026, 1, 31, 9, 0)
+    assert CronSchedule("*/15 * * * *").next_after(base) == datetime(2026, 1, 30, 9, 15)
+    assert CronSchedule("0 8-18/2 * * 1-5").next_after(base) == datetime(2026, 1, 30, 10, 0)
+    assert CronSchedule("0 0 * * 0").next_after(base) == datetime(2026, 2, 1, 0, 0)  # domingo
+    assert CronSchedule("@monthly").next_after(base) == datetime(2026, 2, 1, 0, 0)
+    assert CronSchedule("0 0 29 2 *").next_after(base) == datetime(2028, 2, 29, 0, 0)
+    with pytest.raises(CronError):
+        CronSchedule("61 * * * *")
+
+def test_lease_runs_each_slot_once():
+    db = SessionLocal()
+    slot = datetime.now(timezone.utc).replace(microsecond=0)
+    try:
+        assert acquire_lease(db, "test-lease", "worker-a", slot, 60)
+        assert not acquire_lease(db, "test-lease", "worker-b", slot, 60)
+        release_lease(db, "test-lease", "worker-a")
+        # Liberado, pero el slot ya corrió: otro worker no lo repite
+        assert not acquire_lease(db, "test-lease", "worker-b", slot, 60)
+        assert acquire_lease(db, "test-lease", "worker-b", slot + timedelta(minutes=1), 60)
+    finally:
+        db.close()
+
+def test_run_now_records_history():
+    scheduler = Scheduler(workers=1, tz="UTC")
+    scheduler.register("test-ok", "@daily", lambda: {"procesados": 3})
+    scheduler.register("test-error", "@daily", lambda: 1 / 0)
+
+    assert scheduler.run_now("test-ok")
+    assert scheduler.run_now("test-error")
+
+    db = SessionLocal()
+    runs = {run.job: run for run in db.query(SchedulerRun).filter(SchedulerRun.job.in_(["test-ok", "test-error"]))}
+    db.close()
+    assert runs["test-ok"].estado == RUN_OK
+    assert runs["test-ok"].resultado == '{"procesados": 3}'
+    assert runs["test-error"].estado == RUN_ERROR
+    assert "division by zero" in runs["test-error"].error
+
+    stats = scheduler.stats()["jobs"]
+    assert stats["test-ok"]["runs"] == 1 and stats["test-error"]["errors"] == 1
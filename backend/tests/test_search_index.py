@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.search_index import TextSearchIndex, normalize_text, trigrams
+
+client = TestClient(app)
+
+def _index(names):
+    index = TextSearchIndex()
+    index.rebuild((i, name, name) for i, name in enumerate(names))
+    return index
+
+def test_normalize_removes_accents():
+    assert normalize_text("Atún en AGUA, ñandú") == "atun en agua nandu"
+
+def test_ranking_prefers_exact_then_prefix():
+    index = _index(["Arroz integral", "Arroz", "Leche de arroz", "Harina de arroz"])
+    results = index.search("arroz")
+    assert results[0] == "Arroz"
+    assert results[1] == "Arroz integral"
+    assert set(results[2:]) == {"Leche de arroz", "Harina de arroz"}
+
+def test_accent_insensitive_and_multiword_prefix():
+    index = _index(["Atún en agua", "Atún en aceite", "Papa cocida"])
+    assert index.search("atun ag")[0] == "Atún en agua"
+    assert set(index.search("ATÚN")) == {"Atún en agua", "Atún en aceite"}
+
+def test_substring_and_fuzzy_matches():
+    index = _index(["Pechuga de pollo", "Banana", "Manzana verde"])
+    assert index.search("chuga") == ["Pechuga de pollo"]
+    assert "Manzana verde" in index.search("manzna")
+
+def test_add_replaces_entry():
+    index = _index(["Avena"])
+    index.add(1, "Avellana", "Avellana")
+    index.add(1, "Avellanas tostadas", "Avellanas tostadas")
+    assert index.search("avell")[0] == "Avellanas tostadas"
+    assert "Avellana" not in index.search("avellana")
+    assert len(index) == 2
+
+def test_candidates_skip_common_padded_grams():
+    index = _index([f"Alimento {i}" for i in range(2000)] + ["Arroz", "Arroz integral"])
+    q = normalize_text("arroz")
+    candidates = index._gram_candidates(index._state, q, trigrams(q))
+    # "  a" está en todo el catálogo; los postings raros acotan el conjunto
+    assert candidates == {2000, 2001}
+    assert index.search("arroz") == ["Arroz", "Arroz integral"]
+
+def test_search_endpoint_sees_new_alimentos():
+    client.post("/dietas/alimentos", json={
+        "nombre": "Yogur griego",
+        "calorias_100g": 97,
+        "proteinas_100g": 9,
+        "carbohidratos_100g": 4,
+        "grasas_100g": 5
+    })
+    client.post("/dietas/alimentos", json={
+        "nombre": "Garbanzos cocidos",
+        "calorias_100g": 164,
+        "proteinas_100g": 9,
+        "carbohidratos_100g": 27,
+        "grasas_100g": 2.6
+    })
+
+    response = client.get("/dietas/alimentos/search/yogúr")
+    assert response.status_code == 200
+    assert [a["nombre"] for a in response.json()] == ["Yogur griego"]
+    assert response.json()[0]["calorias_100g"] == 97
@@ -6,9 +6,47 @@ const NotificationBell = () => {
   const [unreadCount, setUnreadCount] = useState(0);
 
   useEffect(() => {
-    fetchUnreadCount();
-    // Actualizar cada 2 minutos para reducir carga
-    const interval = setInterval(fetchUnreadCount, 120000);
+    // El servidor empuja el contador por SSE (primero al conectar y después
+    // en cada cambio). El stream se abre con un ticket de un solo uso, así
+    // que al cortarse se pide uno nuevo en lugar de dejar reconectar a EventSource
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) {
+        retryTimer = setTimeout(connect, 3000);
+      }
+    };
+
+    const connect = async () => {
+      try {
+        const response = await notificationsAPI.getStreamTicket();
+        if (closed) return;
+        source = new EventSource(notificationsAPI.streamUrl(response.data.ticket));
+      } catch (error) {
+        console.error('Error opening notifications stream:', error);
+        reconnect();
+        return;
+      }
+      source.addEventListener('unread_count', (event) => {
+        setUnreadCount(JSON.parse(event.data).count);
+      });
+      // La conexión se atrasó y se descartaron eventos: pedir el estado
+      source.addEventListener('resync', () => {
+        fetchUnreadCount();
+        window.dispatchEvent(new CustomEvent('notificationResync'));
+      });
+      source.addEventListener('notification', (event) => {
+        window.dispatchEvent(new CustomEvent('notificationReceived', { detail: JSON.parse(event.data) }));
+      });
+      source.onerror = () => {
+        source.close();
+        reconnect();
+      };
+    };
+
+    connect();
     
     // Escuchar eventos para actualizar el contador
     const handleNotificationUpdate = () => {
@@ -18,7 +56,9 @@ const NotificationBell = () => {
     window.addEventListener('notificationUpdated', handleNotificationUpdate);
     
     return () => {
-      clearInterval(interval);
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
       window.removeEventListener('notificationUpdated', handleNotificationUpdate);
     };
   }, []);
@@ -7,6 +7,8 @@ const AllRutinas = () => {
   const [rutinas, setRutinas] = useState([]);
   const [alumnos, setAlumnos] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchData();
@@ -20,14 +22,8 @@ const AllRutinas = () => {
       ]);
       
       setAlumnos(alumnosResponse.data);
-      
-      // Map rutinas with alumno names
-      const rutinasWithAlumnoNames = rutinasResponse.data.map(rutina => ({
-        ...rutina,
-        alumno_nombre: rutina.alumno ? rutina.alumno.nombre : 'Sin asignar'
-      }));
-      
-      setRutinas(rutinasWithAlumnoNames.sort((a, b) => new Date(b.fecha_inicio || 0) - new Date(a.fecha_inicio || 0)));
+      setRutinas(sortRutinas(withAlumnoNames(rutinasResponse.data.items)));
+      setNextCursor(rutinasResponse.data.next_cursor);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -35,6 +31,27 @@ const AllRutinas = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await rutinasAPI.getAll({ cursor: nextCursor });
+      setRutinas(prev => sortRutinas([...prev, ...withAlumnoNames(response.data.items)]));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching rutinas:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Map rutinas with alumno names
+  const withAlumnoNames = (items) => items.map(rutina => ({
+    ...rutina,
+    alumno_nombre: rutina.alumno ? rutina.alumno.nombre : 'Sin asignar'
+  }));
+
+  const sortRutinas = (items) => items.sort((a, b) => new Date(b.fecha_inicio || 0) - new Date(a.fecha_inicio || 0));
+
   const handleSaveAsTemplate = async (rutinaId) => {
     try {
       await rutinasAPI.saveAsTemplate(rutinaId);
@@ -161,6 +178,18 @@ const AllRutinas = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              className="bg-gray-200 hover:bg-gray-300 text-gray-800 px-4 py-2 rounded-lg disabled:opacity-50"
+            >
+              {loadingMore ? 'Cargando...' : 'Cargar más'}
+            </button>
+          </div>
+        )}
+
         {rutinas.length === 0 && (
           <div className="text-center py-12">
             <p className="text-gray-500 mb-4">No hay rutinas creadas</p>
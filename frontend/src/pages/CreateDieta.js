@@ -9,6 +9,7 @@ const CreateDieta = () => {
   const [dietaForm, setDietaForm] = useState({
     nombre: '',
     fecha_inicio: '',
+    fecha_vencimiento: '',
     notas: ''
   });
   const [comidas, setComidas] = useState([]);
@@ -40,7 +41,10 @@ const CreateDieta = () => {
 
   const createDieta = async () => {
     try {
-      const response = await dietasAPI.create(alumnoId, dietaForm);
+      const response = await dietasAPI.create(alumnoId, {
+        ...dietaForm,
+        fecha_vencimiento: dietaForm.fecha_vencimiento ? dietaForm.fecha_vencimiento + 'T00:00:00' : null
+      });
       navigate(`/dietas/${response.data.id}/edit`);
     } catch (error) {
       console.error('Error creating dieta:', error);
@@ -76,6 +80,15 @@ const CreateDieta = () => {
               value={dietaForm.fecha_inicio}
               onChange={(e) => setDietaForm({ ...dietaForm, fecha_inicio: e.target.value })}
             />
+            <div>
+              <label className="block text-sm text-gray-600 mb-1">Fecha de vencimiento</label>
+              <input
+                type="date"
+                className="w-full border border-gray-300 rounded-lg px-3 py-2"
+                value={dietaForm.fecha_vencimiento}
+                onChange={(e) => setDietaForm({ ...dietaForm, fecha_vencimiento: e.target.value })}
+              />
+            </div>
           </div>
           <textarea
             placeholder="Notas (opcional)"
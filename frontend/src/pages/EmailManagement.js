@@ -49,12 +49,12 @@ const EmailManagement = () => {
   const sendQuotaIncrease = async (e) => {
     e.preventDefault();
     try {
-      await emailAPI.sendQuotaIncrease({
+      const response = await emailAPI.sendQuotaIncrease({
         alumno_ids: selectedAlumnos,
         new_amount: parseFloat(quotaForm.newAmount),
         message: quotaForm.message
       });
-      alert('Emails enviados exitosamente');
+      alert(response.data.message);
       setQuotaForm({ newAmount: '', message: '' });
       setSelectedAlumnos([]);
     } catch (error) {
@@ -66,14 +66,14 @@ const EmailManagement = () => {
   const sendAbsenceNotice = async (e) => {
     e.preventDefault();
     try {
-      await emailAPI.sendAbsenceNotice({
+      const response = await emailAPI.sendAbsenceNotice({
         alumno_ids: selectedAlumnos,
         start_date: absenceForm.startDate,
         end_date: absenceForm.endDate,
         reason: absenceForm.reason,
         message: absenceForm.message
       });
-      alert('Emails enviados exitosamente');
+      alert(response.data.message);
       setAbsenceForm({ startDate: '', endDate: '', reason: '', message: '' });
       setSelectedAlumnos([]);
     } catch (error) {
@@ -5,15 +5,34 @@ import Layout from '../components/Layout';
 const Notifications = () => {
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchNotifications();
+    
+    // Notificaciones nuevas que llegan por el canal SSE de NotificationBell
+    const handleReceived = (event) => {
+      const notification = event.detail;
+      setNotifications(prev => (
+        prev.some(n => n.id === notification.id) ? prev : [notification, ...prev]
+      ));
+    };
+    
+    window.addEventListener('notificationReceived', handleReceived);
+    window.addEventListener('notificationResync', fetchNotifications);
+    
+    return () => {
+      window.removeEventListener('notificationReceived', handleReceived);
+      window.removeEventListener('notificationResync', fetchNotifications);
+    };
   }, []);
 
   const fetchNotifications = async () => {
     try {
       const response = await notificationsAPI.getAll();
-      setNotifications(response.data);
+      setNotifications(response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching notifications:', error);
     } finally {
@@ -21,6 +40,19 @@ const Notifications = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await notificationsAPI.getAll({ cursor: nextCursor });
+      setNotifications(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching notifications:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const markAsRead = async (id) => {
     try {
       await notificationsAPI.markAsRead(id);
@@ -45,6 +77,25 @@ const Notifications = () => {
     }
   };
 
+  const markAllAsRead = async () => {
+    try {
+      await notificationsAPI.markManyAsRead({ all: true });
+      setNotifications(notifications.map(n => ({ ...n, leida: true })));
+      window.dispatchEvent(new CustomEvent('notificationUpdated'));
+    } catch (error) {
+      console.error('Error marking all as read:', error);
+    }
+  };
+
+  const deleteRead = async () => {
+    try {
+      await notificationsAPI.deleteMany({ leida: true });
+      setNotifications(notifications.filter(n => !n.leida));
+    } catch (error) {
+      console.error('Error deleting read notifications:', error);
+    }
+  };
+
   const generateTestNotifications = async () => {
     try {
       await notificationsAPI.generateTest();
@@ -71,12 +122,26 @@ const Notifications = () => {
       <div className="max-w-4xl mx-auto space-y-6">
         <div className="flex justify-between items-center">
           <h1 className="text-3xl font-bold text-gray-900">Notificaciones</h1>
-          <button
-            onClick={generateTestNotifications}
-            className="bg-blue-600 hover:bg-blue-700 text-white px-4 py-2 rounded-lg text-sm"
-          >
-            Generar Test
-          </button>
+          <div className="flex space-x-2">
+            <button
+              onClick={markAllAsRead}
+              className="bg-green-600 hover:bg-green-700 text-white px-4 py-2 rounded-lg text-sm"
+            >
+              Marcar todas como leídas
+            </button>
+            <button
+              onClick={deleteRead}
+              className="bg-red-600 hover:bg-red-700 text-white px-4 py-2 rounded-lg text-sm"
+            >
+              Eliminar leídas
+            </button>
+            <button
+              onClick={generateTestNotifications}
+              className="bg-blue-600 hover:bg-blue-700 text-white px-4 py-2 rounded-lg text-sm"
+            >
+              Generar Test
+            </button>
+          </div>
         </div>
 
         <div className="space-y-3">
@@ -128,6 +193,18 @@ const Notifications = () => {
             </div>
           )}
         </div>
+
+        {nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              className="bg-gray-200 hover:bg-gray-300 text-gray-800 px-4 py-2 rounded-lg disabled:opacity-50"
+            >
+              {loadingMore ? 'Cargando...' : 'Cargar más'}
+            </button>
+          </div>
+        )}
       </div>
     </Layout>
   );
@@ -72,20 +72,23 @@ export const alumnosAPI = {
 
 // Rutinas endpoints
 export const rutinasAPI = {
-  getAll: () => api.get('/rutinas'),
+  // Paginado por cursor: params = { cursor, limit, alumno_id, activa, standalone }
+  getAll: (params = {}) => api.get('/rutinas', { params }),
   getByAlumno: (alumnoId) => api.get(`/alumnos/${alumnoId}/rutinas`),
   create: (alumnoId, data) => api.post(`/rutinas/create/${alumnoId || 'none'}`, data),
   getById: (id) => api.get(`/rutinas/${id}`),
   update: (id, data) => api.patch(`/rutinas/${id}`, data),
   delete: (id) => api.delete(`/rutinas/${id}`),
   addEjercicio: (id, data) => api.post(`/rutinas/${id}/ejercicios`, data),
-  downloadPDF: (id) => api.get(`/rutinas/${id}/pdf`, { responseType: 'blob' }),
-  downloadExcel: (id) => api.get(`/rutinas/${id}/excel`, { responseType: 'blob' }),
+  downloadPDF: (id) => exportsAPI.run('rutina', id, 'pdf'),
+  downloadExcel: (id) => exportsAPI.run('rutina', id, 'excel'),
   copy: (rutinaId, targetAlumnoId) => api.post(`/rutinas/${rutinaId}/copy/${targetAlumnoId}`),
   copyDay: (rutinaId, sourceDay, targetDay) => api.post(`/rutinas/${rutinaId}/copy-day`, { source_day: sourceDay, target_day: targetDay }),
   saveAsTemplate: (rutinaId) => api.post(`/rutinas/${rutinaId}/save-as-template`),
   getPlantillas: () => api.get('/rutinas/plantillas'),
   createFromTemplate: (plantillaId, alumnoId) => api.post(`/rutinas/plantillas/${plantillaId}/create-rutina/${alumnoId}`),
+  // Asignación masiva: devuelve { asignadas, resultados } con el estado por alumno
+  assignTemplate: (plantillaId, alumnoIds) => api.post(`/rutinas/plantillas/${plantillaId}/assign`, { alumno_ids: alumnoIds }),
 };
 
 // Ejercicios endpoints
@@ -124,8 +127,37 @@ export const dietasAPI = {
   saveAsTemplate: (dietaId) => api.post(`/dietas/${dietaId}/save-as-template`),
   getPlantillas: () => api.get('/dietas/plantillas'),
   createFromTemplate: (plantillaId, alumnoId) => api.post(`/dietas/plantillas/${plantillaId}/create-dieta/${alumnoId}`),
-  downloadPDF: (id) => api.get(`/dietas/${id}/pdf`, { responseType: 'blob' }),
-  downloadExcel: (id) => api.get(`/dietas/${id}/excel`, { responseType: 'blob' }),
+  assignTemplate: (plantillaId, alumnoIds) => api.post(`/dietas/plantillas/${plantillaId}/assign`, { alumno_ids: alumnoIds }),
+  downloadPDF: (id) => exportsAPI.run('dieta', id, 'pdf'),
+  downloadExcel: (id) => exportsAPI.run('dieta', id, 'excel'),
+};
+
+// Exportaciones en segundo plano: se encola el job y se consulta hasta que el archivo está listo
+const EXPORT_POLL_MS = 1000;
+const EXPORT_TIMEOUT_MS = 120000;
+
+export const exportsAPI = {
+  create: (tipo, objetoId, formato) => api.post('/exports', { tipo, objeto_id: objetoId, formato }),
+  get: (jobId) => api.get(`/exports/${jobId}`),
+  download: (jobId) => api.get(`/exports/${jobId}/download`, { responseType: 'blob' }),
+  // ZIP con todas las rutinas/dietas activas; incluir = 'todo' | 'rutinas' | 'dietas'
+  bulk: (formato = 'pdf', incluir = 'todo') => api.get('/exports/bulk', { params: { formato, incluir }, responseType: 'blob' }),
+  run: async (tipo, objetoId, formato) => {
+    const { data: job } = await exportsAPI.create(tipo, objetoId, formato);
+    const deadline = Date.now() + EXPORT_TIMEOUT_MS;
+    let estado = job.estado;
+    while (estado !== 'completado') {
+      if (estado === 'error') {
+        throw new Error('Error generando el archivo');
+      }
+      if (Date.now() > deadline) {
+        throw new Error('La exportación está tardando demasiado');
+      }
+      await new Promise((resolve) => setTimeout(resolve, EXPORT_POLL_MS));
+      estado = (await exportsAPI.get(job.id)).data.estado;
+    }
+    return exportsAPI.download(job.id);
+  },
 };
 
 // Alimentos endpoints
@@ -137,11 +169,19 @@ export const alimentosAPI = {
 
 // Notifications endpoints
 export const notificationsAPI = {
-  getAll: () => api.get('/notifications'),
+  // Paginado por cursor: params = { cursor, limit }
+  getAll: (params = {}) => api.get('/notifications', { params }),
   markAsRead: (id) => api.patch(`/notifications/${id}/read`),
   delete: (id) => api.delete(`/notifications/${id}`),
+  // Operaciones masivas: selection = { ids, older_than, leida, all }
+  markManyAsRead: (selection) => api.post('/notifications/mark-read', selection),
+  deleteMany: (selection) => api.post('/notifications/bulk-delete', selection),
   getUnreadCount: () => api.get('/notifications/unread-count'),
   generateTest: () => api.post('/notifications/generate-test'),
+  // EventSource no permite headers: se abre con un ticket de un solo uso
+  // (así el JWT no queda en la URL); hace falta uno nuevo por conexión
+  getStreamTicket: () => api.post('/notifications/stream-ticket'),
+  streamUrl: (ticket) => `${API_BASE_URL}/notifications/stream?ticket=${encodeURIComponent(ticket)}`,
 };
 
 // Lesiones endpoints